@@ -0,0 +1,131 @@
+"""
+Benchmark da serialização das listagens (GET /vendas/, /produtos/, /funcionarios/).
+
+Compara, com objetos ORM sintéticos (sem banco), o custo por linha de:
+    antes:  o caminho padrão do FastAPI (response_model validado de novo,
+            jsonable_encoder e JSONResponse com o json da biblioteca padrão);
+    depois: services.serializacao.resposta_json (TypeAdapter pré-montado,
+            uma validação e dump_json no pydantic-core).
+
+Uso (a partir da pasta src):
+    python bench_serializacao.py [--linhas 100 1000 5000] [--repeticoes 5]
+"""
+import argparse
+import asyncio
+import time
+from datetime import date, datetime, timezone
+from typing import Callable, List
+
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+from pydantic import TypeAdapter
+
+from models import models_funcionarios, models_produtos, models_vendas
+from schemas.schema_funcionarios import FuncionarioResponse
+from schemas.schema_produtos import Produto
+from schemas.schema_vendas import PaginaVendas, PaginaVendasStats
+from services.serializacao import resposta_json
+
+
+def gerar_vendas(quantidade: int) -> dict:
+    vendas = [
+        models_vendas.Venda(
+            id=i, data_venda=datetime(2026, 1, 1, 12, tzinfo=timezone.utc), valor_total=30.0,
+            funcionario_id=1, nome_funcionario="Ana", cpf="12345678909", cargo="caixa",
+            itens=[
+                models_vendas.ItemVenda(id=i * 3 + j, venda_id=i, produto_id=j, quantidade=2, preco_unitario=5.0)
+                for j in range(3)
+            ],
+        )
+        for i in range(quantidade)
+    ]
+    estatisticas = PaginaVendasStats(total_registros=quantidade, valor_total_periodo=30.0 * quantidade, total_produtos_periodo=6 * quantidade)
+    return {"estatisticas": estatisticas, "vendas": vendas, "next_cursor": None}
+
+
+def gerar_produtos(quantidade: int) -> list:
+    return [
+        models_produtos.Produto(
+            id=i, titulo=f"Produto {i}", descricao="descrição", preco=9.9, peso=1.0,
+            data_fabricacao=date(2026, 1, 1), data_validade=date(2027, 1, 1),
+            data_cadastro=datetime(2026, 1, 1, tzinfo=timezone.utc), data_atualizacao=None,
+        )
+        for i in range(quantidade)
+    ]
+
+
+def gerar_funcionarios(quantidade: int) -> list:
+    return [
+        models_funcionarios.Funcionarios(
+            id=i, nome=f"Funcionário {i}", cpf="12345678909", email=f"f{i}@sgm.com", telefone="86999999999",
+            data_nascimento=date(1990, 1, 1), cargo="caixa", salario=2000.0, senha="$argon2id$...",
+            data_contratacao=date(2020, 1, 1), created_at=datetime(2026, 1, 1, tzinfo=timezone.utc), updated_at=None,
+            enderecos=[models_funcionarios.Enderecos(
+                funcionario_id=i, logradouro="Rua A", numero="1", bairro="Centro", cidade="Teresina", estado="PI", cep="64000000"
+            )],
+        )
+        for i in range(quantidade)
+    ]
+
+
+def caminho_padrao(tipo) -> Callable:
+    campo = create_model_field(name="resposta", type_=tipo, mode="serialization")
+
+    def serializar(dados):
+        conteudo = asyncio.run(serialize_response(field=campo, response_content=dados))
+        return JSONResponse(conteudo).body
+    return serializar
+
+
+def caminho_orjson(tipo) -> Callable:
+    """Só troca a classe de resposta padrão (default_response_class=ORJSONResponse)."""
+    campo = create_model_field(name="resposta", type_=tipo, mode="serialization")
+
+    def serializar(dados):
+        conteudo = asyncio.run(serialize_response(field=campo, response_content=dados))
+        return ORJSONResponse(conteudo).body
+    return serializar
+
+
+def caminho_rapido(tipo) -> Callable:
+    adapter = TypeAdapter(tipo)
+    return lambda dados: resposta_json(adapter, dados).body
+
+
+def medir(serializar: Callable, dados, repeticoes: int) -> float:
+    """Melhor tempo (segundos) entre as repetições."""
+    serializar(dados)  # aquecimento
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        serializar(dados)
+        tempos.append(time.perf_counter() - inicio)
+    return min(tempos)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--linhas", type=int, nargs="+", default=[100, 1000, 5000])
+    parser.add_argument("--repeticoes", type=int, default=5)
+    args = parser.parse_args()
+
+    cenarios = [
+        ("GET /vendas/ (3 itens/venda)", PaginaVendas, gerar_vendas, lambda dados: len(dados["vendas"])),
+        ("GET /produtos/", List[Produto], gerar_produtos, len),
+        ("GET /funcionarios/", List[FuncionarioResponse], gerar_funcionarios, len),
+    ]
+    print(f"{'listagem':<30} {'linhas':>7} {'antes µs/linha':>15} {'+orjson':>10} {'depois':>10} {'ganho':>7}")
+    for nome, tipo, gerar, contar in cenarios:
+        padrao, orjson, rapido = caminho_padrao(tipo), caminho_orjson(tipo), caminho_rapido(tipo)
+        for linhas in args.linhas:
+            dados = gerar(linhas)
+            n = contar(dados)
+            antes = medir(padrao, dados, args.repeticoes) / n * 1e6
+            so_orjson = medir(orjson, dados, args.repeticoes) / n * 1e6
+            depois = medir(rapido, dados, args.repeticoes) / n * 1e6
+            print(f"{nome:<30} {linhas:>7} {antes:>15.2f} {so_orjson:>10.2f} {depois:>10.2f} {antes / depois:>6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Comandos de manutenção da API SGM.
+
+Uso (a partir da pasta src):
+    python cli.py migrar [--revisao head]
+    python cli.py reconstruir-resumos
+    python cli.py importar-produtos catalogo.csv [--formato csv|jsonl] [--atualizar]
+"""
+import argparse
+import sys
+
+from db.connection import SessionLocal
+from db import migracoes, querys_resumos
+from services import importacao_produtos
+
+
+def migrar(args):
+    """Aplica as migrações do Alembic até a revisão pedida."""
+    migracoes.migrar(args.revisao)
+    print(f"Banco migrado para {args.revisao}.")
+
+
+def reconstruir_resumos(args):
+    """Recalcula os resumos diários de vendas a partir de vendas e itens_venda."""
+    with SessionLocal() as db:
+        querys_resumos.reconstruir_resumos(db)
+    print("Resumos diários reconstruídos.")
+
+
+def importar_produtos(args):
+    """Importa um catálogo de produtos em CSV ou JSON Lines."""
+    formato = args.formato or importacao_produtos.detectar_formato(args.arquivo)
+    if formato is None:
+        sys.exit("Não foi possível detectar o formato pela extensão; use --formato csv|jsonl.")
+
+    with open(args.arquivo, encoding="utf-8-sig", newline="") as arquivo, SessionLocal() as db:
+        registros = importacao_produtos.ler_registros(arquivo, formato)
+        resultado = importacao_produtos.importar_produtos(db, registros, atualizar=args.atualizar)
+
+    print(
+        f"{resultado.total_linhas} linhas: {resultado.inseridos} inseridos, "
+        f"{resultado.atualizados} atualizados, {resultado.ignorados} ignorados, "
+        f"{len(resultado.erros)} com erro."
+    )
+    for erro in resultado.erros:
+        print(f"  linha {erro.linha} ({erro.titulo or '-'}): {erro.erro}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Comandos de manutenção da API SGM.")
+    subparsers = parser.add_subparsers(dest="comando", required=True)
+
+    parser_migrar = subparsers.add_parser(
+        "migrar",
+        help="Cria/atualiza o esquema do banco aplicando as migrações (Alembic)."
+    )
+    parser_migrar.add_argument("--revisao", default="head", help="Revisão de destino (padrão: head)")
+    parser_migrar.set_defaults(func=migrar)
+
+    parser_resumos = subparsers.add_parser(
+        "reconstruir-resumos",
+        help="Reconstrói as tabelas de resumo diário a partir dos dados brutos de vendas."
+    )
+    parser_resumos.set_defaults(func=reconstruir_resumos)
+
+    parser_importar = subparsers.add_parser(
+        "importar-produtos",
+        help="Importa um catálogo de produtos (CSV com cabeçalho ou JSON Lines)."
+    )
+    parser_importar.add_argument("arquivo", help="Caminho do arquivo .csv, .jsonl ou .ndjson")
+    parser_importar.add_argument("--formato", choices=importacao_produtos.FORMATOS, help="Padrão: pela extensão do arquivo")
+    parser_importar.add_argument(
+        "--atualizar", action="store_true",
+        help="Atualiza os produtos que já existem com o mesmo título (padrão: ignora)"
+    )
+    parser_importar.set_defaults(func=importar_produtos)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,11 @@
 import os
 from dotenv import load_dotenv
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import declarative_base, sessionmaker
 
+from db.pool_metricas import AsyncQueuePoolMedido, QueuePoolMedido
+
 # Carrega as variáveis do arquivo .env para o sistema
 load_dotenv()
 
@@ -15,7 +18,48 @@ DB_NAME = os.getenv("DB_NAME")
 
 SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL")
 
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
+
+def _url_assincrona(url: str | None) -> str | None:
+    """Troca o driver da DATABASE_URL (psycopg2) pelo asyncpg."""
+    if url is None:
+        return None
+    for prefixo in ("postgresql+psycopg2://", "postgresql://", "postgres://"):
+        if url.startswith(prefixo):
+            return "postgresql+asyncpg://" + url[len(prefixo):]
+    return url
+
+
+# URL do engine assíncrono; por padrão a mesma DATABASE_URL com o driver asyncpg
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or _url_assincrona(SQLALCHEMY_DATABASE_URL)
+
+# Pool de conexões (valores por engine e por processo). Cada worker do uvicorn
+# abre até DB_POOL_SIZE + DB_MAX_OVERFLOW conexões em cada um dos dois engines;
+# a soma entre os workers precisa caber no max_connections do Postgres.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+# segundos até uma conexão ser reciclada; -1 desativa
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "-1"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "false").lower() == "true"
+
+_OPCOES_POOL = {
+    "pool_size": DB_POOL_SIZE,
+    "max_overflow": DB_MAX_OVERFLOW,
+    "pool_timeout": DB_POOL_TIMEOUT,
+    "pool_recycle": DB_POOL_RECYCLE,
+    "pool_pre_ping": DB_POOL_PRE_PING,
+}
+
+# Engine síncrono: comandos (cli.py) e código que ainda usa Session
+engine = create_engine(SQLALCHEMY_DATABASE_URL, poolclass=QueuePoolMedido, **_OPCOES_POOL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Engine assíncrono (asyncpg): usado pelas rotas
+async_engine = create_async_engine(ASYNC_DATABASE_URL, poolclass=AsyncQueuePoolMedido, **_OPCOES_POOL)
+# expire_on_commit=False: os objetos retornados continuam legíveis depois do
+# commit sem disparar IO implícito (que não é permitido fora do run_sync)
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine, autocommit=False, autoflush=False, expire_on_commit=False
+)
+
 Base = declarative_base()
@@ -0,0 +1,45 @@
+"""
+Ponte entre a aplicação e as migrações do Alembic (pasta migrations/).
+O esquema do banco é criado e alterado só pelas migrações; na subida a API
+apenas confere se o banco está na revisão que o código espera.
+"""
+import os
+
+from alembic import command
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+
+from db.connection import async_engine
+
+ALEMBIC_INI = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "alembic.ini")
+
+
+def config_alembic() -> Config:
+    return Config(ALEMBIC_INI)
+
+
+def revisao_esperada() -> str:
+    """Última revisão (head) entre as migrações do código."""
+    return ScriptDirectory.from_config(config_alembic()).get_current_head()
+
+
+def revisao_do_banco(conexao) -> str | None:
+    """Revisão gravada na tabela alembic_version (None se nunca migrado)."""
+    return MigrationContext.configure(conexao).get_current_revision()
+
+
+def migrar(revisao: str = "head"):
+    command.upgrade(config_alembic(), revisao)
+
+
+async def verificar_esquema():
+    """Falha a subida se o banco não estiver na revisão esperada pelo código."""
+    async with async_engine.connect() as conexao:
+        atual = await conexao.run_sync(revisao_do_banco)
+    esperada = revisao_esperada()
+    if atual != esperada:
+        raise RuntimeError(
+            f"Esquema do banco na revisão {atual or 'nenhuma'}, mas o código espera {esperada}. "
+            "Rode 'python cli.py migrar' antes de subir a API."
+        )
@@ -0,0 +1,87 @@
+import threading
+import time
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+
+class MetricasCheckout:
+    """Contadores de espera por conexão de um pool (tempo de checkout e timeouts)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.espera_total = 0.0
+        self.espera_maxima = 0.0
+
+    def registrar(self, espera: float, timeout: bool = False):
+        with self._lock:
+            if timeout:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+                self.espera_total += espera
+                self.espera_maxima = max(self.espera_maxima, espera)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            media = self.espera_total / self.checkouts if self.checkouts else 0.0
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "espera_media_ms": round(media * 1000, 3),
+                "espera_maxima_ms": round(self.espera_maxima * 1000, 3),
+            }
+
+
+class _MedirCheckout:
+    """
+    Mixin que cronometra o _do_get do pool: é ali que a requisição fica
+    na fila quando todas as conexões (pool_size + max_overflow) estão em uso.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metricas = MetricasCheckout()
+
+    def _do_get(self):
+        inicio = time.perf_counter()
+        try:
+            conexao = super()._do_get()
+        except exc.TimeoutError:
+            self.metricas.registrar(time.perf_counter() - inicio, timeout=True)
+            raise
+        self.metricas.registrar(time.perf_counter() - inicio)
+        return conexao
+
+    def recreate(self):
+        novo = super().recreate()
+        # o pool recriado (ex.: engine.dispose) continua somando nas mesmas métricas
+        novo.metricas = self.metricas
+        return novo
+
+
+class QueuePoolMedido(_MedirCheckout, QueuePool):
+    pass
+
+
+class AsyncQueuePoolMedido(_MedirCheckout, AsyncAdaptedQueuePool):
+    pass
+
+
+def estado_pool(pool) -> dict:
+    """Retrato do pool: conexões em uso, ociosas, overflow e esperas por checkout."""
+    estado = {
+        "pool_size": pool.size(),
+        "em_uso": pool.checkedout(),
+        "ociosas": pool.checkedin(),
+        # overflow() começa em -pool_size; só conta o que passou do tamanho fixo
+        "overflow_em_uso": max(pool.overflow(), 0),
+        "max_overflow": pool._max_overflow,
+        "timeout_segundos": pool.timeout(),
+    }
+    metricas = getattr(pool, "metricas", None)
+    if metricas is not None:
+        estado.update(metricas.snapshot())
+    return estado
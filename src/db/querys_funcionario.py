@@ -1,17 +1,70 @@
-from sqlalchemy.orm import Session,joinedload
+from sqlalchemy import Integer, any_, bindparam, select
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.orm import Session, noload, selectinload
 from models.models_funcionarios import Funcionarios, Enderecos
 from schemas.schema_funcionarios import FuncionarioCreate, EnderecoCreate, FuncionarioUpdate
+from services.cache import cache_principais
 
 
 """ def listar_todos_funcionarios(db: Session):
     return db.query(Funcionarios).all() """
 
-def listar_todos_funcionarios(db: Session):
-    return db.query(Funcionarios).options(joinedload(Funcionarios.enderecos)).all()
-
+def listar_todos_funcionarios(db: Session, skip: int = 0, limit: int | None = None):
+    """Funcionários (com endereços) ordenados por id, com a página aplicada no banco."""
+    query = db.query(Funcionarios).options(selectinload(Funcionarios.enderecos)).order_by(Funcionarios.id)
+    return query.offset(skip).limit(limit).all()
+
+
+def listar_funcionarios_campos(
+    db: Session, campos: tuple[str, ...], skip: int = 0, limit: int | None = None, id: int | None = None
+) -> list[dict]:
+    """
+    Funcionários só com as colunas pedidas (?fields=), como dicts, ordenados
+    por id. Os endereços só são buscados se "enderecos" estiver nos campos,
+    numa segunda consulta para todos os funcionários da página. Com id,
+    filtra um funcionário só.
+    """
+    colunas = [getattr(Funcionarios, campo) for campo in campos if campo != "enderecos"]
+    query = select(*colunas).order_by(Funcionarios.id)
+    if id is not None:
+        query = query.where(Funcionarios.id == id)
+    funcionarios = [dict(linha) for linha in db.execute(query.offset(skip).limit(limit)).mappings()]
+
+    if "enderecos" in campos and funcionarios:
+        for funcionario in funcionarios:
+            funcionario["enderecos"] = []
+        por_id = {funcionario["id"]: funcionario for funcionario in funcionarios}
+        enderecos = db.execute(
+            select(Enderecos).where(Enderecos.funcionario_id == any_(bindparam("ids", list(por_id), type_=ARRAY(Integer))))
+        ).scalars()
+        for endereco in enderecos:
+            por_id[endereco.funcionario_id]["enderecos"].append(endereco)
+    return funcionarios
 
 def obter_funcionario(db: Session, id: int):
-    return db.query(Funcionarios).filter(Funcionarios.id == id).first()
+    """Funcionário com os endereços (para responder com FuncionarioResponse)."""
+    return (
+        db.query(Funcionarios)
+        .options(selectinload(Funcionarios.enderecos))
+        .populate_existing()
+        .filter(Funcionarios.id == id)
+        .first()
+    )
+
+def obter_funcionarios_por_ids(db: Session, ids: list[int]):
+    """Busca vários funcionários pelo id em uma única consulta, sem os endereços."""
+    if not ids:
+        return []
+    return db.query(Funcionarios).options(noload(Funcionarios.enderecos)).filter(Funcionarios.id.in_(set(ids))).all()
+
+def obter_funcionarios_resumidos_por_ids(db: Session, ids: list[int]):
+    """(id, nome, cpf, cargo) dos funcionários com WHERE id = ANY(:ids), sem carregar os objetos ORM."""
+    if not ids:
+        return []
+    return db.execute(
+        select(Funcionarios.id, Funcionarios.nome, Funcionarios.cpf, Funcionarios.cargo)
+        .where(Funcionarios.id == any_(bindparam("ids", list(set(ids)), type_=ARRAY(Integer))))
+    ).all()
 
 def obter_funcionarios_email(db: Session, email: str):
     return db.query(Funcionarios).filter(Funcionarios.email == email).first()
@@ -31,7 +84,9 @@ def atualizar_funcionario(db: Session, id: int, funcionario: FuncionarioUpdate):
             setattr(funcionario_db, key, value)
             
         db.commit()
-        db.refresh(funcionario_db)
+        funcionario_db = obter_funcionario(db, id)
+        # nome/cargo do token autenticado (security.get_current_funcionario)
+        cache_principais.remover(funcionario_db.cpf)
     return funcionario_db
 
 def deletar_funcionario(db: Session, id: int):
@@ -39,14 +94,14 @@ def deletar_funcionario(db: Session, id: int):
     if funcionario_db:
         db.delete(funcionario_db)
         db.commit()
+        cache_principais.remover(funcionario_db.cpf)
     return funcionario_db
 
 
 def criar_funcionario(db: Session, funcionario: FuncionarioCreate):
     db.add(funcionario)
     db.commit()
-    db.refresh(funcionario)
-    return funcionario
+    return obter_funcionario(db, funcionario.id)
 
 
 def atualizar_endereco(db: Session, id: int, endereco: EnderecoCreate):
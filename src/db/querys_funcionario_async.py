@@ -0,0 +1,53 @@
+"""
+Versões assíncronas de querys_funcionario. Cada função executa a query
+síncrona correspondente com AsyncSession.run_sync, sobre a conexão
+asyncpg, sem ocupar uma thread do threadpool.
+"""
+from sqlalchemy.ext.asyncio import AsyncSession
+from db import querys_funcionario
+from schemas.schema_funcionarios import EnderecoCreate, FuncionarioUpdate
+
+
+async def listar_todos_funcionarios(db: AsyncSession, skip: int = 0, limit: int | None = None):
+    return await db.run_sync(querys_funcionario.listar_todos_funcionarios, skip, limit)
+
+async def obter_funcionario(db: AsyncSession, id: int):
+    return await db.run_sync(querys_funcionario.obter_funcionario, id)
+
+async def listar_funcionarios_campos(
+    db: AsyncSession, campos: tuple[str, ...], skip: int = 0, limit: int | None = None, id: int | None = None
+):
+    return await db.run_sync(querys_funcionario.listar_funcionarios_campos, campos, skip, limit, id)
+
+async def obter_funcionarios_por_ids(db: AsyncSession, ids: list[int]):
+    return await db.run_sync(querys_funcionario.obter_funcionarios_por_ids, ids)
+
+async def obter_funcionarios_resumidos_por_ids(db: AsyncSession, ids: list[int]):
+    return await db.run_sync(querys_funcionario.obter_funcionarios_resumidos_por_ids, ids)
+
+async def obter_funcionarios_email(db: AsyncSession, email: str):
+    return await db.run_sync(querys_funcionario.obter_funcionarios_email, email)
+
+async def obter_funcionarios_cpf(db: AsyncSession, cpf: str):
+    return await db.run_sync(querys_funcionario.obter_funcionarios_cpf, cpf)
+
+async def atualizar_funcionario(db: AsyncSession, id: int, funcionario: FuncionarioUpdate):
+    return await db.run_sync(querys_funcionario.atualizar_funcionario, id, funcionario)
+
+async def deletar_funcionario(db: AsyncSession, id: int):
+    return await db.run_sync(querys_funcionario.deletar_funcionario, id)
+
+async def criar_funcionario(db: AsyncSession, funcionario):
+    return await db.run_sync(querys_funcionario.criar_funcionario, funcionario)
+
+async def atualizar_endereco(db: AsyncSession, id: int, endereco: EnderecoCreate):
+    return await db.run_sync(querys_funcionario.atualizar_endereco, id, endereco)
+
+async def deletar_endereco(db: AsyncSession, id: int):
+    return await db.run_sync(querys_funcionario.deletar_endereco, id)
+
+async def obter_enderecos_funcionario(db: AsyncSession, funcionario_id: int):
+    return await db.run_sync(querys_funcionario.obter_enderecos_funcionario, funcionario_id)
+
+async def criar_endereco(db: AsyncSession, endereco: EnderecoCreate):
+    return await db.run_sync(querys_funcionario.criar_endereco, endereco)
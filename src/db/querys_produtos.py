@@ -1,26 +1,122 @@
-from sqlalchemy import func
+from sqlalchemy import Integer, any_, bindparam, case, func, insert, literal, or_, select, text, update
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.orm import Session, joinedload
 from models.models_produtos import Produto
+from services.cache import cache_produtos
 
 
 def criar_produto(db: Session, produto):
     db.add(produto)
     db.commit()
     db.refresh(produto)
+    cache_produtos.guardar(produto)
+    cache_produtos.catalogo_alterado()
     return produto
 
 def obter_produtos(db: Session):
     return db.query(Produto).all()
 
+def listar_produtos_campos(db: Session, campos: tuple[str, ...]):
+    """Todos os produtos, só com as colunas pedidas (?fields=), como dicts."""
+    return db.execute(select(*(getattr(Produto, campo) for campo in campos))).mappings().all()
+
 def obter_produto_id(db: Session, id: int):
     return db.query(Produto).filter(Produto.id == id).first()
 
 def obter_produto_por_titulo(db: Session, titulo: str):
     return db.query(Produto).filter(Produto.titulo == titulo).first()
 
+def obter_produtos_por_titulos_ou_ids(db: Session, titulos: list[str], ids: list[int]):
+    """Produtos de um carrinho: WHERE titulo IN (...) OR id IN (...) numa consulta só."""
+    filtros = []
+    if titulos:
+        filtros.append(Produto.titulo.in_(set(titulos)))
+    if ids:
+        filtros.append(Produto.id.in_(set(ids)))
+    if not filtros:
+        return []
+    return db.query(Produto).filter(or_(*filtros)).all()
+
+def obter_produtos_resumidos_por_ids(db: Session, ids: list[int]):
+    """(id, titulo, preco) dos produtos com WHERE id = ANY(:ids): um parâmetro só, qualquer quantidade de ids."""
+    if not ids:
+        return []
+    return db.execute(
+        select(Produto.id, Produto.titulo, Produto.preco)
+        .where(Produto.id == any_(bindparam("ids", list(set(ids)), type_=ARRAY(Integer))))
+    ).all()
+
+def obter_produtos_com_cache(db: Session, titulos: list[str] = (), ids: list[int] = ()):
+    """
+    Produtos pelos títulos e/ou ids, lidos do cache em memória; só os que
+    faltam vão ao banco (numa consulta) e entram no cache. Retorna cópias
+    (schema Produto), não objetos ORM.
+    """
+    encontrados, faltam_titulos, faltam_ids = cache_produtos.buscar_varios(titulos, ids)
+    if faltam_titulos or faltam_ids:
+        for produto in obter_produtos_por_titulos_ou_ids(db, faltam_titulos, faltam_ids):
+            copia = cache_produtos.guardar(produto)
+            encontrados[copia.id] = copia
+    return list(encontrados.values())
+
+def busca_trigram_disponivel(db: Session) -> bool:
+    """Se a migração 0003 conseguiu criar f_unaccent e o índice de trigramas."""
+    return db.execute(text(
+        "SELECT to_regprocedure('f_unaccent(text)') IS NOT NULL "
+        "AND to_regclass('ix_produtos_titulo_trgm') IS NOT NULL"
+    )).scalar()
+
+def buscar_produtos_por_trecho(db: Session, termo: str, limit: int = 10):
+    """
+    Busca por trecho do título, sem diferenciar acentos e maiúsculas, usando
+    o índice GIN de trigramas sobre lower(f_unaccent(titulo)). Ordena por:
+    título começa com o termo, alguma palavra começa com o termo, o resto;
+    depois pela similaridade de trigramas. Retorna linhas (id, titulo, preco).
+    """
+    # a expressão precisa ser idêntica à do índice ix_produtos_titulo_trgm
+    titulo_normalizado = func.lower(func.f_unaccent(Produto.titulo))
+    termo_escapado = termo.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    termo_normalizado = func.lower(func.f_unaccent(termo_escapado))
+
+    def contem(prefixo: str, sufixo: str):
+        return titulo_normalizado.like(literal(prefixo) + termo_normalizado + literal(sufixo), escape="\\")
+
+    nivel = case((contem("", "%"), 0), (contem("% ", "%"), 1), else_=2)
+    similaridade = func.similarity(titulo_normalizado, func.lower(func.f_unaccent(termo)))
+    return db.execute(
+        select(Produto.id, Produto.titulo, Produto.preco)
+        .where(contem("%", "%"))
+        .order_by(nivel, similaridade.desc(), Produto.titulo)
+        .limit(limit)
+    ).all()
+
+def listar_produtos_resumidos(db: Session):
+    """(id, titulo, preco) de todo o catálogo, para montar o índice de busca em memória."""
+    return db.execute(select(Produto.id, Produto.titulo, Produto.preco).where(Produto.titulo.is_not(None))).all()
+
+def obter_ids_por_titulos(db: Session, titulos: list[str]) -> dict[str, list[int]]:
+    """Mapeia titulo -> ids dos produtos já cadastrados com esse título."""
+    ids: dict[str, list[int]] = {}
+    if titulos:
+        linhas = db.execute(select(Produto.titulo, Produto.id).where(Produto.titulo.in_(set(titulos))))
+        for titulo, produto_id in linhas:
+            ids.setdefault(titulo, []).append(produto_id)
+    return ids
+
+def inserir_produtos_lote(db: Session, produtos: list[dict]):
+    """INSERT multi-linha de produtos (sem commit)."""
+    if produtos:
+        db.execute(insert(Produto).values(produtos))
+
+def atualizar_produtos_lote(db: Session, produtos: list[dict]):
+    """UPDATE em lote pela chave primária: cada dict traz o id e os campos (sem commit)."""
+    if produtos:
+        db.execute(update(Produto), produtos)
+
 def atualiza_produto(db: Session, id: int, produto):
     db_produto = db.query(Produto).filter(Produto.id == id).first()
     if db_produto:
+        titulo_anterior = db_produto.titulo
         # já ajustado anteriormente para não sobrescrever com None e não mexer em id
         data = produto.model_dump(exclude_unset=True, exclude_none=True)
         data.pop("id", None)
@@ -28,6 +124,8 @@ def atualiza_produto(db: Session, id: int, produto):
             setattr(db_produto, key, value)
         db.commit()
         db.refresh(db_produto)
+        cache_produtos.invalidar(ids=[id], titulos=[titulo_anterior])
+        cache_produtos.guardar(db_produto)
     return db_produto
 
 def deleta_produto(db: Session, produto_id: int):
@@ -35,6 +133,7 @@ def deleta_produto(db: Session, produto_id: int):
     if db_produto:
         db.delete(db_produto)
         db.commit()
+        cache_produtos.invalidar(ids=[produto_id], titulos=[db_produto.titulo])
     return db_produto
 
 def contar_produtos(db: Session):
@@ -0,0 +1,53 @@
+"""
+Versões assíncronas de querys_produtos. Cada função executa a query
+síncrona correspondente com AsyncSession.run_sync, sobre a conexão
+asyncpg, sem ocupar uma thread do threadpool.
+"""
+from sqlalchemy.ext.asyncio import AsyncSession
+from db import querys_produtos
+
+
+async def criar_produto(db: AsyncSession, produto):
+    return await db.run_sync(querys_produtos.criar_produto, produto)
+
+async def obter_produtos(db: AsyncSession):
+    return await db.run_sync(querys_produtos.obter_produtos)
+
+async def listar_produtos_campos(db: AsyncSession, campos: tuple[str, ...]):
+    return await db.run_sync(querys_produtos.listar_produtos_campos, campos)
+
+async def obter_produto_id(db: AsyncSession, id: int):
+    return await db.run_sync(querys_produtos.obter_produto_id, id)
+
+async def obter_produto_por_titulo(db: AsyncSession, titulo: str):
+    return await db.run_sync(querys_produtos.obter_produto_por_titulo, titulo)
+
+async def obter_produtos_por_titulos_ou_ids(db: AsyncSession, titulos: list[str], ids: list[int]):
+    return await db.run_sync(querys_produtos.obter_produtos_por_titulos_ou_ids, titulos, ids)
+
+async def obter_produtos_com_cache(db: AsyncSession, titulos: list[str] = (), ids: list[int] = ()):
+    return await db.run_sync(querys_produtos.obter_produtos_com_cache, titulos, ids)
+
+async def obter_produtos_resumidos_por_ids(db: AsyncSession, ids: list[int]):
+    return await db.run_sync(querys_produtos.obter_produtos_resumidos_por_ids, ids)
+
+async def busca_trigram_disponivel(db: AsyncSession):
+    return await db.run_sync(querys_produtos.busca_trigram_disponivel)
+
+async def buscar_produtos_por_trecho(db: AsyncSession, termo: str, limit: int = 10):
+    return await db.run_sync(querys_produtos.buscar_produtos_por_trecho, termo, limit)
+
+async def listar_produtos_resumidos(db: AsyncSession):
+    return await db.run_sync(querys_produtos.listar_produtos_resumidos)
+
+async def atualiza_produto(db: AsyncSession, id: int, produto):
+    return await db.run_sync(querys_produtos.atualiza_produto, id, produto)
+
+async def deleta_produto(db: AsyncSession, produto_id: int):
+    return await db.run_sync(querys_produtos.deleta_produto, produto_id)
+
+async def contar_produtos(db: AsyncSession):
+    return await db.run_sync(querys_produtos.contar_produtos)
+
+async def sum_valor_total(db: AsyncSession):
+    return await db.run_sync(querys_produtos.sum_valor_total)
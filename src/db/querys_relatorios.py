@@ -0,0 +1,169 @@
+import os
+from datetime import date
+
+from sqlalchemy import DateTime, cast, desc, func, literal_column
+from sqlalchemy.orm import Session
+
+from db import querys_vendas
+from db.querys_vendas import filtrar_periodo
+from db.querys_resumos import data_local
+from models import models_vendas as models
+from models.models_produtos import Produto
+from models.models_funcionarios import Funcionarios
+from models.models_resumos import ResumoVendasDia, ResumoProdutoDia, ResumoFuncionarioDia
+
+# Os filtros dos relatórios são sempre dias inteiros, então por padrão eles
+# leem dos resumos diários; "false" força o cálculo sobre vendas/itens_venda.
+RELATORIOS_USAR_RESUMOS = os.getenv("RELATORIOS_USAR_RESUMOS", "true").lower() == "true"
+
+_UNIDADES = {"dia": "day", "mes": "month"}
+
+
+def _filtrar_dias(query, coluna_dia, data_inicio: date | None, data_fim: date | None):
+    """Mesmo filtro de filtrar_periodo, sobre a coluna 'dia' de um resumo."""
+    if data_inicio:
+        query = query.filter(coluna_dia >= data_inicio)
+    if data_fim:
+        query = query.filter(coluna_dia <= data_fim)
+    return query
+
+
+def sumario_vendas(
+    db: Session,
+    data_inicio: date | None = None,
+    data_fim: date | None = None
+):
+    """Retorna (total_vendas, valor_total, quantidade_itens) do período."""
+    if not RELATORIOS_USAR_RESUMOS:
+        query_base = filtrar_periodo(db.query(models.Venda), data_inicio, data_fim)
+        return querys_vendas.agregar_vendas(db, query_base).one()
+
+    query = db.query(
+        func.coalesce(func.sum(ResumoVendasDia.quantidade_vendas), 0).label("total_vendas"),
+        func.coalesce(func.sum(ResumoVendasDia.valor_total), 0.0).label("valor_total"),
+        func.coalesce(func.sum(ResumoVendasDia.quantidade_itens), 0).label("quantidade_itens"),
+    )
+    return _filtrar_dias(query, ResumoVendasDia.dia, data_inicio, data_fim).one()
+
+
+def vendas_por_periodo(
+    db: Session,
+    data_inicio: date | None = None,
+    data_fim: date | None = None,
+    granularidade: str = "dia"
+):
+    """
+    Agrupa as vendas por dia ou mês no próprio banco (date_trunc no fuso
+    configurado). Retorna linhas (periodo, quantidade_vendas, valor_total)
+    ordenadas por período; períodos sem vendas não aparecem.
+    """
+    # literal (e não parâmetro) para a expressão do SELECT e do GROUP BY serem idênticas
+    unidade = literal_column(f"'{_UNIDADES[granularidade]}'")
+
+    if RELATORIOS_USAR_RESUMOS:
+        periodo = func.date_trunc(unidade, cast(ResumoVendasDia.dia, DateTime))
+        query = db.query(
+            periodo.label("periodo"),
+            func.sum(ResumoVendasDia.quantidade_vendas).label("quantidade_vendas"),
+            func.coalesce(func.sum(ResumoVendasDia.valor_total), 0.0).label("valor_total"),
+        )
+        query = _filtrar_dias(query, ResumoVendasDia.dia, data_inicio, data_fim)
+        # dias que ficaram zerados depois de exclusões não contam
+        query = query.filter(ResumoVendasDia.quantidade_vendas > 0)
+    else:
+        periodo = func.date_trunc(unidade, data_local(models.Venda.data_venda))
+        query = db.query(
+            periodo.label("periodo"),
+            func.count(models.Venda.id).label("quantidade_vendas"),
+            func.coalesce(func.sum(models.Venda.valor_total), 0.0).label("valor_total"),
+        )
+        query = filtrar_periodo(query, data_inicio, data_fim)
+
+    return query.group_by(periodo).order_by(periodo).all()
+
+
+def ranking_produtos(
+    db: Session,
+    data_inicio: date | None = None,
+    data_fim: date | None = None,
+    ordenar_por: str = "valor",
+    top: int = 10,
+    incluir_titulos: bool = False
+):
+    """
+    Top-N de produtos somando itens_venda (ou o resumo diário por produto)
+    no banco. Com incluir_titulos, o título vem de um LEFT JOIN com produtos
+    na mesma consulta. Retorna linhas (produto_id, qtd_total, valor_total[, titulo]).
+    """
+    if RELATORIOS_USAR_RESUMOS:
+        produto_id = ResumoProdutoDia.produto_id
+        qtd_total = func.sum(ResumoProdutoDia.quantidade_itens)
+        valor_total = func.sum(ResumoProdutoDia.valor_total)
+        query = db.query(produto_id, qtd_total.label("qtd_total"), valor_total.label("valor_total"))
+        query = _filtrar_dias(query, ResumoProdutoDia.dia, data_inicio, data_fim)
+    else:
+        produto_id = models.ItemVenda.produto_id
+        qtd_total = func.sum(models.ItemVenda.quantidade)
+        valor_total = func.sum(models.ItemVenda.quantidade * models.ItemVenda.preco_unitario)
+        query = db.query(produto_id, qtd_total.label("qtd_total"), valor_total.label("valor_total"))
+
+        # o JOIN com vendas só é necessário para filtrar pela data da venda
+        if data_inicio or data_fim:
+            query = query.join(models.Venda, models.Venda.id == models.ItemVenda.venda_id)
+            query = filtrar_periodo(query, data_inicio, data_fim)
+
+    agrupar_por = [produto_id]
+    if incluir_titulos:
+        query = query.add_columns(Produto.titulo.label("titulo")).outerjoin(
+            Produto, Produto.id == produto_id
+        )
+        agrupar_por.append(Produto.titulo)
+
+    ordem = qtd_total if ordenar_por == "qtd" else valor_total
+    return (
+        query.group_by(*agrupar_por)
+        .having(qtd_total > 0)
+        .order_by(ordem.desc(), produto_id)
+        .limit(top)
+        .all()
+    )
+
+
+def ranking_funcionarios(
+    db: Session,
+    data_inicio: date | None = None,
+    data_fim: date | None = None,
+    ordenar_por: str = "valor",
+    top: int = 10,
+    nomes_do_cadastro: bool = False
+):
+    """
+    Top-N de funcionários a partir de uma única consulta agrupada sobre
+    vendas (ou o resumo diário por funcionário). Retorna linhas
+    (funcionario_id, nome, total_vendas, valor_total, quantidade_itens).
+    """
+    if RELATORIOS_USAR_RESUMOS:
+        resumo = ResumoFuncionarioDia
+        nome = func.max(resumo.nome_funcionario)
+        query = db.query(
+            resumo.funcionario_id,
+            func.sum(resumo.quantidade_vendas).label("total_vendas"),
+            func.sum(resumo.valor_total).label("valor_total"),
+            func.sum(resumo.quantidade_itens).label("quantidade_itens"),
+        )
+        query = _filtrar_dias(query, resumo.dia, data_inicio, data_fim)
+        if nomes_do_cadastro:
+            query = query.outerjoin(Funcionarios, Funcionarios.id == resumo.funcionario_id)
+            query = query.add_columns(func.coalesce(Funcionarios.nome, nome).label("nome"))
+            query = query.group_by(resumo.funcionario_id, Funcionarios.nome)
+        else:
+            query = query.add_columns(nome.label("nome")).group_by(resumo.funcionario_id)
+        query = query.having(func.sum(resumo.quantidade_vendas) > 0)
+    else:
+        query_base = filtrar_periodo(db.query(models.Venda), data_inicio, data_fim)
+        query = querys_vendas.agregar_vendas(
+            db, query_base, por_funcionario=True, nomes_do_cadastro=nomes_do_cadastro
+        )
+
+    ordem = "total_vendas" if ordenar_por == "qtd" else "valor_total"
+    return query.order_by(desc(ordem), literal_column("funcionario_id")).limit(top).all()
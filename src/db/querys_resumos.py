@@ -0,0 +1,161 @@
+import logging
+import os
+
+from sqlalchemy import delete, exists, func, literal, literal_column, select, text, true
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from models import models_vendas as models
+from models.models_resumos import ResumoVendasDia, ResumoProdutoDia, ResumoFuncionarioDia, versao_vendas_geral, versao_vendas_historico
+
+# Fuso usado para decidir a que dia/mês cada venda pertence (resumos e relatórios)
+RELATORIOS_TIMEZONE = os.getenv("RELATORIOS_TIMEZONE", "America/Sao_Paulo")
+
+_CAMPOS_SOMADOS = ("quantidade_vendas", "quantidade_itens", "valor_total")
+
+# chave em Session.info com as escritas em vendas ainda não publicadas
+_VENDAS_ALTERADAS = "vendas_alteradas_antes_de_hoje"
+
+logger = logging.getLogger(__name__)
+
+
+def data_local(coluna):
+    """Converte um timestamptz para o horário local do fuso dos relatórios."""
+    # literal (e não parâmetro) para a expressão do SELECT e do GROUP BY serem idênticas
+    return func.timezone(literal_column(f"'{RELATORIOS_TIMEZONE}'"), coluna)
+
+
+def _upsert(db: Session, modelo, chaves, consulta, colunas, atualizar_nome: bool = False):
+    """INSERT ... SELECT que soma os valores nas linhas já existentes."""
+    stmt = insert(modelo).from_select(colunas, consulta)
+    set_ = {campo: getattr(modelo, campo) + stmt.excluded[campo] for campo in _CAMPOS_SOMADOS}
+    if atualizar_nome:
+        set_["nome_funcionario"] = stmt.excluded.nome_funcionario
+    db.execute(stmt.on_conflict_do_update(index_elements=chaves, set_=set_))
+
+
+def _anotar_alteracao(db: Session, venda_ids: list[int] | None):
+    """
+    Anota na sessão que houve escrita em vendas e se alguma delas é de antes
+    de hoje (reconstruções contam como histórico). A versão só avança depois
+    do commit, em publicar_versao_vendas.
+    """
+    if venda_ids is None:
+        antes_de_hoje = True
+    else:
+        antes_de_hoje = db.execute(select(exists().where(
+            models.Venda.id.in_(venda_ids),
+            func.date(data_local(models.Venda.data_venda)) < func.date(data_local(func.now())),
+        ))).scalar()
+    db.info[_VENDAS_ALTERADAS] = db.info.get(_VENDAS_ALTERADAS, False) or antes_de_hoje
+
+
+def publicar_versao_vendas(db: Session):
+    """
+    Avança as versões das vendas anotadas pela escrita; chamar logo depois do
+    commit dela. nextval não bloqueia as escritas concorrentes e só depois do
+    commit os outros processos leem os dados novos com a versão nova. As
+    vendas já estão gravadas: uma falha aqui só é registrada.
+    """
+    if _VENDAS_ALTERADAS not in db.info:
+        return
+    antes_de_hoje = db.info.pop(_VENDAS_ALTERADAS)
+    try:
+        db.execute(select(versao_vendas_geral.next_value()))
+        if antes_de_hoje:
+            db.execute(select(versao_vendas_historico.next_value()))
+        db.commit()
+    except Exception:
+        logger.exception("Não foi possível avançar a versão das vendas")
+        db.rollback()
+
+
+def obter_versao_vendas(db: Session) -> tuple[int, int]:
+    """(geral, historico) atuais, lidas das sequências sem bloquear nada."""
+    # antes do primeiro nextval, last_value já vale 1 (com is_called falso)
+    return tuple(db.execute(text(
+        f"SELECT (SELECT CASE WHEN is_called THEN last_value ELSE 0 END FROM {versao_vendas_geral.name}), "
+        f"(SELECT CASE WHEN is_called THEN last_value ELSE 0 END FROM {versao_vendas_historico.name})"
+    )).one())
+
+
+def _aplicar(db: Session, venda_ids: list[int] | None, sinal: int):
+    dia = func.date(data_local(models.Venda.data_venda))
+    filtro = models.Venda.id.in_(venda_ids) if venda_ids is not None else true()
+
+    # itens pré-agregados por venda, para não multiplicar as linhas de vendas
+    itens = (
+        select(
+            models.ItemVenda.venda_id,
+            func.sum(models.ItemVenda.quantidade).label("quantidade"),
+        )
+        .group_by(models.ItemVenda.venda_id)
+    )
+    if venda_ids is not None:
+        itens = itens.where(models.ItemVenda.venda_id.in_(venda_ids))
+    itens = itens.subquery()
+
+    vendas = select(models.Venda).outerjoin(itens, itens.c.venda_id == models.Venda.id).where(filtro)
+    quantidade_vendas = literal(sinal) * func.count(models.Venda.id)
+    quantidade_itens = literal(sinal) * func.coalesce(func.sum(itens.c.quantidade), 0)
+    valor_total = literal(sinal) * func.sum(models.Venda.valor_total)
+
+    _upsert(
+        db, ResumoVendasDia, ["dia"],
+        vendas.with_only_columns(dia, quantidade_vendas, quantidade_itens, valor_total).group_by(dia),
+        ["dia", *_CAMPOS_SOMADOS],
+    )
+    _upsert(
+        db, ResumoFuncionarioDia, ["dia", "funcionario_id"],
+        vendas.with_only_columns(
+            dia, models.Venda.funcionario_id, func.max(models.Venda.nome_funcionario),
+            quantidade_vendas, quantidade_itens, valor_total
+        ).group_by(dia, models.Venda.funcionario_id),
+        ["dia", "funcionario_id", "nome_funcionario", *_CAMPOS_SOMADOS],
+        atualizar_nome=sinal > 0,
+    )
+    _upsert(
+        db, ResumoProdutoDia, ["dia", "produto_id"],
+        select(
+            dia,
+            models.ItemVenda.produto_id,
+            literal(sinal) * func.count(models.Venda.id.distinct()),
+            literal(sinal) * func.sum(models.ItemVenda.quantidade),
+            literal(sinal) * func.sum(models.ItemVenda.quantidade * models.ItemVenda.preco_unitario),
+        )
+        .select_from(models.ItemVenda)
+        .join(models.Venda, models.Venda.id == models.ItemVenda.venda_id)
+        .where(filtro)
+        .group_by(dia, models.ItemVenda.produto_id),
+        ["dia", "produto_id", *_CAMPOS_SOMADOS],
+    )
+    _anotar_alteracao(db, venda_ids)
+
+
+def somar_vendas(db: Session, venda_ids: list[int]):
+    """
+    Soma as vendas informadas nos resumos diários. Deve rodar na mesma
+    transação da escrita, depois do flush da venda e dos itens; depois do
+    commit, chamar publicar_versao_vendas.
+    """
+    if venda_ids:
+        _aplicar(db, venda_ids, 1)
+
+
+def subtrair_vendas(db: Session, venda_ids: list[int]):
+    """
+    Retira as vendas informadas dos resumos diários. Deve rodar na mesma
+    transação da escrita, antes de apagar ou alterar a venda e os itens;
+    depois do commit, chamar publicar_versao_vendas.
+    """
+    if venda_ids:
+        _aplicar(db, venda_ids, -1)
+
+
+def reconstruir_resumos(db: Session):
+    """Apaga e recalcula todos os resumos a partir de vendas e itens_venda."""
+    for modelo in (ResumoVendasDia, ResumoProdutoDia, ResumoFuncionarioDia):
+        db.execute(delete(modelo))
+    _aplicar(db, None, 1)
+    db.commit()
+    publicar_versao_vendas(db)
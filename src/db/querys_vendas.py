@@ -1,10 +1,41 @@
+import base64
+import json
+
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import func
-from datetime import date, timedelta
+from sqlalchemy import func, select, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from datetime import date, datetime, time, timedelta
+from zoneinfo import ZoneInfo
 from models import models_vendas as models
-from schemas.schema_vendas import VendaCreate, PaginaVendas, RelatorioFuncionario, VendaUpdate, ItemVendaCreate, Venda, PaginaVendasStats, RelatorioFuncionarioStats, Produto
+from models.models_funcionarios import Funcionarios
+from db import querys_resumos
+from schemas.schema_vendas import VendaCreate, RelatorioFuncionario, VendaUpdate, Venda, PaginaVendasStats, RelatorioFuncionarioStats, Produto
+
+_TZ = ZoneInfo(querys_resumos.RELATORIOS_TIMEZONE)
+_ITENS_POR_INSERT = 5000
+
+
+def inicio_do_dia(dia: date) -> datetime:
+    """Meia-noite do dia no fuso dos relatórios (com tzinfo, para comparar com data_venda)."""
+    return datetime.combine(dia, time.min, tzinfo=_TZ)
+
+
+def filtrar_periodo(query, data_inicio: date | None, data_fim: date | None):
+    """
+    Aplica o filtro de período sobre vendas.data_venda. Os limites são
+    calculados aqui (datetime com fuso) para que a comparação use o índice
+    da coluna e o tipo do parâmetro bata com timestamptz.
+    """
+    if data_inicio:
+        query = query.filter(models.Venda.data_venda >= inicio_do_dia(data_inicio))
+    if data_fim:
+        query = query.filter(models.Venda.data_venda < inicio_do_dia(data_fim + timedelta(days=1)))
+    return query
+
 
-from typing import Any
+def com_fuso(momento: datetime) -> datetime:
+    """Horário sem fuso (ex.: vindo do PDV) é lido no fuso dos relatórios, não no do servidor."""
+    return momento if momento.tzinfo is not None else momento.replace(tzinfo=_TZ)
 
 
 def criar_venda(db: Session, venda: VendaCreate):
@@ -25,57 +56,216 @@ def criar_venda(db: Session, venda: VendaCreate):
     ]
 
     # 3. Cria o objeto Venda (model) principal
+    dados = venda.model_dump(exclude={"itens"}, exclude_none=True)
+    if "data_venda" in dados:
+        dados["data_venda"] = com_fuso(dados["data_venda"])
     db_venda = models.Venda(
-        **venda.model_dump(exclude={"itens"}),
+        **dados,
         valor_total=valor_total,
         itens=db_itens  
     )
     db.add(db_venda)
+    db.flush()
+    querys_resumos.somar_vendas(db, [db_venda.id])
     db.commit()
+    querys_resumos.publicar_versao_vendas(db)
     db.refresh(db_venda)
     
     return db_venda
 
 
+def codificar_cursor(venda: models.Venda) -> str:
+    """Cursor opaco com a posição (data_venda, id) da venda na ordenação das listagens."""
+    posicao = [venda.data_venda.isoformat(), venda.id]
+    return base64.urlsafe_b64encode(json.dumps(posicao).encode()).decode().rstrip("=")
+
+
+def filtrar_cursor(query, cursor: str):
+    """
+    Mantém só as vendas depois do cursor na ordem (data_venda desc, id desc).
+    A comparação de tuplas usa o índice composto (data_venda, id). Levanta
+    ValueError se o cursor for inválido.
+    """
+    try:
+        preenchido = cursor + "=" * (-len(cursor) % 4)
+        data_venda, venda_id = json.loads(base64.urlsafe_b64decode(preenchido))
+        data_venda = datetime.fromisoformat(data_venda)
+        venda_id = int(venda_id)
+    except (ValueError, TypeError) as e:
+        raise ValueError("Cursor inválido") from e
+    return query.filter(tuple_(models.Venda.data_venda, models.Venda.id) < tuple_(data_venda, venda_id))
+
+
+def _paginar(linhas: list, limit: int) -> tuple[list, str | None]:
+    """
+    Recebe até limit + 1 linhas (a consulta pede uma a mais) e separa a
+    página do cursor: só há próxima página se essa linha extra veio.
+    """
+    pagina = linhas[:limit]
+    if pagina and len(linhas) > limit:
+        return pagina, codificar_cursor(pagina[-1])
+    return pagina, None
+
+
+def obter_ids_por_chave(db: Session, chaves: list[str]) -> dict[str, int]:
+    """Mapeia chave_idempotencia -> id das vendas que já existem."""
+    if not chaves:
+        return {}
+    linhas = db.execute(
+        select(models.Venda.chave_idempotencia, models.Venda.id)
+        .where(models.Venda.chave_idempotencia.in_(set(chaves)))
+    )
+    return {chave: venda_id for chave, venda_id in linhas}
+
+
+def inserir_vendas_lote(db: Session, vendas: list[VendaCreate]) -> dict[str, int]:
+    """
+    Grava um bloco de vendas (todas com chave_idempotencia) com um INSERT
+    multi-linha para as vendas e outro para os itens, atualiza os resumos e
+    faz um único commit. Chaves que já existem no banco são ignoradas
+    (ON CONFLICT DO NOTHING). Retorna chave -> id das vendas criadas.
+    """
+    if not vendas:
+        return {}
+
+    agora = datetime.now(_TZ)
+    linhas_vendas = [
+        {
+            **venda.model_dump(exclude={"itens", "data_venda"}),
+            "data_venda": com_fuso(venda.data_venda) if venda.data_venda else agora,
+            "valor_total": sum(item.quantidade * item.preco_unitario for item in venda.itens),
+        }
+        for venda in vendas
+    ]
+    stmt = (
+        pg_insert(models.Venda)
+        .values(linhas_vendas)
+        .on_conflict_do_nothing(index_elements=["chave_idempotencia"])
+        .returning(models.Venda.chave_idempotencia, models.Venda.id)
+    )
+    criadas = {chave: venda_id for chave, venda_id in db.execute(stmt)}
+
+    linhas_itens = [
+        {**item.model_dump(), "venda_id": criadas[venda.chave_idempotencia]}
+        for venda in vendas
+        if venda.chave_idempotencia in criadas
+        for item in venda.itens
+    ]
+    # o Postgres aceita até 32767 parâmetros por comando
+    for inicio in range(0, len(linhas_itens), _ITENS_POR_INSERT):
+        db.execute(pg_insert(models.ItemVenda).values(linhas_itens[inicio:inicio + _ITENS_POR_INSERT]))
+
+    querys_resumos.somar_vendas(db, list(criadas.values()))
+    db.commit()
+    querys_resumos.publicar_versao_vendas(db)
+    return criadas
+
+
 def listar_vendas(
     db: Session,
     data_inicio: date | None = None,
     data_fim: date | None = None,
     skip: int = 0,
-    limit: int = 100
+    limit: int = 100,
+    incluir_estatisticas: bool = True,
+    cursor: str | None = None
 ):
     """
-    Lista todas as vendas com estatísticas, filtros por data e paginação.
+    Lista as vendas com filtros por data e paginação, por offset (skip) ou
+    por cursor (next_cursor da página anterior; skip é ignorado).
+    As estatísticas do período saem na mesma consulta da página (funções de
+    janela sobre todas as linhas filtradas) e os itens vêm numa consulta em
+    lote (selectin). Retorna um dict no formato de PaginaVendas; sem
+    incluir_estatisticas, "estatisticas" vem None.
     """
     query_base = db.query(models.Venda)
+    query_base = filtrar_periodo(query_base, data_inicio, data_fim)
+    ordem = (models.Venda.data_venda.desc(), models.Venda.id.desc())
+
+    query_pagina = query_base
+    if cursor:
+        query_pagina = filtrar_cursor(query_base, cursor)
+        skip = 0
+
+    # depois de um cursor a janela só veria o restante do período,
+    # então as estatísticas vêm da consulta agregada
+    usar_janela = incluir_estatisticas and not cursor
+    if usar_janela:
+        # quantidade de itens de cada venda, somada depois pela janela
+        itens_da_venda = (
+            select(func.coalesce(func.sum(models.ItemVenda.quantidade), 0))
+            .where(models.ItemVenda.venda_id == models.Venda.id)
+            .correlate(models.Venda)
+            .scalar_subquery()
+        )
+        query_pagina = query_pagina.add_columns(
+            func.count().over().label("total_registros"),
+            func.coalesce(func.sum(models.Venda.valor_total).over(), 0.0).label("valor_total_periodo"),
+            func.coalesce(func.sum(itens_da_venda).over(), 0).label("total_produtos_periodo"),
+        )
 
-    if data_inicio:
-        query_base = query_base.filter(models.Venda.data_venda >= data_inicio)
-    if data_fim:
-        query_base = query_base.filter(models.Venda.data_venda < data_fim + timedelta(days=1))
-
-    total_registros = query_base.count()
-
-    valor_total_periodo_query = query_base.with_entities(func.sum(models.Venda.valor_total)).scalar()
-    valor_total_periodo = valor_total_periodo_query or 0.0
+    linhas = query_pagina.order_by(*ordem).offset(skip).limit(limit + 1).all()
+    vendas_db, proximo_cursor = _paginar([linha[0] for linha in linhas] if usar_janela else linhas, limit)
 
-    total_produtos_periodo_query = query_base.join(models.ItemVenda).with_entities(func.sum(models.ItemVenda.quantidade)).scalar()
-    total_produtos_periodo = total_produtos_periodo_query or 0
+    estatisticas = None
+    if usar_janela and linhas:
+        primeira = linhas[0]
+        estatisticas = PaginaVendasStats(
+            total_registros=primeira.total_registros,
+            valor_total_periodo=primeira.valor_total_periodo,
+            total_produtos_periodo=primeira.total_produtos_periodo
+        )
+    elif incluir_estatisticas:
+        # página vazia (sem linha para carregar a janela) ou paginação por cursor
+        stats = agregar_vendas(db, query_base).one()
+        estatisticas = PaginaVendasStats(
+            total_registros=stats.total_vendas,
+            valor_total_periodo=stats.valor_total,
+            total_produtos_periodo=stats.quantidade_itens
+        )
 
-    estatisticas_obj = PaginaVendasStats(
-        total_registros=total_registros,
-        valor_total_periodo=valor_total_periodo,
-        total_produtos_periodo=total_produtos_periodo
-    )
+    return {
+        "estatisticas": estatisticas,
+        "vendas": vendas_db,
+        "next_cursor": proximo_cursor
+    }
 
-    vendas_db = query_base.order_by(models.Venda.data_venda.desc()).options(joinedload(models.Venda.itens)).offset(skip).limit(limit).all()
 
-    pagina_data = {
-        "estatisticas": estatisticas_obj,
-        "vendas": vendas_db
-    }
-    
-    return PaginaVendas.model_validate(pagina_data)
+def consulta_exportacao(
+    data_inicio: date | None = None,
+    data_fim: date | None = None,
+    por_item: bool = False
+):
+    """
+    SELECT (Core, sem objetos ORM) das vendas do período em ordem
+    cronológica: uma linha por venda ou, com por_item, uma linha por item
+    com os dados da venda repetidos. Usado pela exportação em streaming.
+    """
+    colunas = [
+        models.Venda.id.label("venda_id"),
+        models.Venda.data_venda,
+        models.Venda.funcionario_id,
+        models.Venda.nome_funcionario,
+        models.Venda.cpf,
+        models.Venda.cargo,
+        models.Venda.valor_total,
+    ]
+    if por_item:
+        colunas += [
+            models.ItemVenda.id.label("item_id"),
+            models.ItemVenda.produto_id,
+            models.ItemVenda.quantidade,
+            models.ItemVenda.preco_unitario,
+        ]
+    stmt = select(*colunas)
+    if por_item:
+        stmt = stmt.join(models.ItemVenda, models.ItemVenda.venda_id == models.Venda.id)
+    stmt = filtrar_periodo(stmt, data_inicio, data_fim)
+
+    ordem = [models.Venda.data_venda, models.Venda.id]
+    if por_item:
+        ordem.append(models.ItemVenda.id)
+    return stmt.order_by(*ordem)
 
 
 def obter_venda_por_id(db: Session, venda_id: int):
@@ -90,45 +280,94 @@ def listar_vendas_por_funcionario(db: Session, funcionario_id: int):
     """
     return db.query(models.Venda).options(joinedload(models.Venda.itens)).filter(models.Venda.funcionario_id == funcionario_id).all()
 
+def agregar_vendas(
+    db: Session,
+    query_base,
+    por_funcionario: bool = False,
+    nomes_do_cadastro: bool = False
+):
+    """
+    Monta a consulta de estatísticas das vendas de query_base em um único
+    SELECT agrupado: COUNT(*), SUM(valor_total) e a soma das quantidades dos
+    itens, pré-agregada por venda para não multiplicar as linhas de vendas.
+
+    Com por_funcionario, agrupa por funcionario_id e traz o nome: do cadastro
+    de funcionários (nomes_do_cadastro) ou da coluna vendas.nome_funcionario.
+    """
+    vendas = (
+        query_base.outerjoin(models.ItemVenda)
+        .with_entities(
+            models.Venda.id,
+            models.Venda.funcionario_id,
+            models.Venda.nome_funcionario,
+            models.Venda.valor_total,
+            func.coalesce(func.sum(models.ItemVenda.quantidade), 0).label("quantidade_itens"),
+        )
+        .group_by(models.Venda.id)
+        .subquery()
+    )
+
+    estatisticas = [
+        func.count().label("total_vendas"),
+        func.coalesce(func.sum(vendas.c.valor_total), 0.0).label("valor_total"),
+        func.coalesce(func.sum(vendas.c.quantidade_itens), 0).label("quantidade_itens"),
+    ]
+    if not por_funcionario:
+        return db.query(*estatisticas)
+
+    nome = func.max(vendas.c.nome_funcionario)
+    query = db.query(vendas.c.funcionario_id, *estatisticas)
+    if nomes_do_cadastro:
+        query = query.outerjoin(Funcionarios, Funcionarios.id == vendas.c.funcionario_id)
+        return query.add_columns(func.coalesce(Funcionarios.nome, nome).label("nome")).group_by(
+            vendas.c.funcionario_id, Funcionarios.nome
+        )
+    return query.add_columns(nome.label("nome")).group_by(vendas.c.funcionario_id)
+
+
 def obter_relatorio_por_funcionario(
     db: Session, 
     funcionario_id: int,
     data_inicio: date | None = None,
     data_fim: date | None = None,
     skip: int = 0,
-    limit: int = 10
+    limit: int = 10,
+    cursor: str | None = None
 ):
     """
     Gera um relatório completo de vendas para um funcionário,
-    com estatísticas, filtros e paginação.
+    com estatísticas, filtros e paginação (offset ou cursor).
     """
     
     query_base = db.query(models.Venda).filter(models.Venda.funcionario_id == funcionario_id)
+    query_base = filtrar_periodo(query_base, data_inicio, data_fim)
 
-    if data_inicio:
-        query_base = query_base.filter(models.Venda.data_venda >= data_inicio)
-    if data_fim:
-        query_base = query_base.filter(models.Venda.data_venda < data_fim + timedelta(days=1))
-
-    total_vendas = query_base.count()
-
-    valor_total_vendido_query = query_base.with_entities(func.sum(models.Venda.valor_total)).scalar()
-    valor_total_vendido = valor_total_vendido_query or 0.0
-
-    total_produtos_vendidos_query = query_base.join(models.ItemVenda).with_entities(func.sum(models.ItemVenda.quantidade)).scalar()
-    total_produtos_vendidos = total_produtos_vendidos_query or 0
+    stats = agregar_vendas(db, query_base).one()
 
     estatisticas_obj = RelatorioFuncionarioStats(
-        total_vendas=total_vendas,
-        valor_total_vendido=valor_total_vendido,
-        total_produtos_vendidos=total_produtos_vendidos
+        total_vendas=stats.total_vendas,
+        valor_total_vendido=stats.valor_total,
+        total_produtos_vendidos=stats.quantidade_itens
     )
 
-    vendas_db = query_base.options(joinedload(models.Venda.itens)).offset(skip).limit(limit).all()
+    query_pagina = query_base
+    if cursor:
+        query_pagina = filtrar_cursor(query_base, cursor)
+        skip = 0
+
+    vendas_db = (
+        query_pagina.order_by(models.Venda.data_venda.desc(), models.Venda.id.desc())
+        .options(joinedload(models.Venda.itens))
+        .offset(skip)
+        .limit(limit + 1)
+        .all()
+    )
+    vendas_db, proximo_cursor = _paginar(vendas_db, limit)
 
     relatorio_data = {
         "estatisticas": estatisticas_obj,
-        "vendas": vendas_db
+        "vendas": vendas_db,
+        "next_cursor": proximo_cursor
     }
 
     return RelatorioFuncionario.model_validate(relatorio_data)
@@ -141,8 +380,10 @@ def deletar_venda(db: Session, venda_id: int):
     db_venda = db.query(models.Venda).filter(models.Venda.id == venda_id).first()
 
     if db_venda:
+        querys_resumos.subtrair_vendas(db, [db_venda.id])
         db.delete(db_venda)
         db.commit()
+        querys_resumos.publicar_versao_vendas(db)
     
     return db_venda
 
@@ -155,6 +396,9 @@ def atualizar_venda(db: Session, venda_id: int, venda_update: VendaUpdate):
     if not db_venda:
         return None
 
+    # tira a versão antiga dos resumos antes de trocar os itens
+    querys_resumos.subtrair_vendas(db, [db_venda.id])
+
     db_venda.itens.clear()
     db.flush()
 
@@ -170,7 +414,10 @@ def atualizar_venda(db: Session, venda_id: int, venda_update: VendaUpdate):
         )
         db.add(novo_item)
 
+    db.flush()
+    querys_resumos.somar_vendas(db, [db_venda.id])
     db.commit()
+    querys_resumos.publicar_versao_vendas(db)
     db.refresh(db_venda)
     
     return db_venda
\ No newline at end of file
@@ -0,0 +1,66 @@
+"""
+Versões assíncronas de querys_vendas. Cada função executa a query
+síncrona correspondente com AsyncSession.run_sync, sobre a conexão
+asyncpg, sem ocupar uma thread do threadpool.
+"""
+from datetime import date
+from sqlalchemy.ext.asyncio import AsyncSession
+from db import querys_vendas
+from schemas.schema_vendas import VendaCreate, VendaUpdate
+
+
+async def criar_venda(db: AsyncSession, venda: VendaCreate):
+    return await db.run_sync(querys_vendas.criar_venda, venda)
+
+
+async def obter_ids_por_chave(db: AsyncSession, chaves: list[str]):
+    return await db.run_sync(querys_vendas.obter_ids_por_chave, chaves)
+
+
+async def inserir_vendas_lote(db: AsyncSession, vendas: list[VendaCreate]):
+    return await db.run_sync(querys_vendas.inserir_vendas_lote, vendas)
+
+
+async def listar_vendas(
+    db: AsyncSession,
+    data_inicio: date | None = None,
+    data_fim: date | None = None,
+    skip: int = 0,
+    limit: int = 100,
+    incluir_estatisticas: bool = True,
+    cursor: str | None = None
+):
+    return await db.run_sync(
+        querys_vendas.listar_vendas, data_inicio, data_fim, skip, limit, incluir_estatisticas, cursor
+    )
+
+
+async def obter_venda_por_id(db: AsyncSession, venda_id: int):
+    return await db.run_sync(querys_vendas.obter_venda_por_id, venda_id)
+
+
+async def listar_vendas_por_funcionario(db: AsyncSession, funcionario_id: int):
+    return await db.run_sync(querys_vendas.listar_vendas_por_funcionario, funcionario_id)
+
+
+async def obter_relatorio_por_funcionario(
+    db: AsyncSession,
+    funcionario_id: int,
+    data_inicio: date | None = None,
+    data_fim: date | None = None,
+    skip: int = 0,
+    limit: int = 10,
+    cursor: str | None = None
+):
+    return await db.run_sync(
+        querys_vendas.obter_relatorio_por_funcionario,
+        funcionario_id, data_inicio, data_fim, skip, limit, cursor
+    )
+
+
+async def deletar_venda(db: AsyncSession, venda_id: int):
+    return await db.run_sync(querys_vendas.deletar_venda, venda_id)
+
+
+async def atualizar_venda(db: AsyncSession, venda_id: int, venda_update: VendaUpdate):
+    return await db.run_sync(querys_vendas.atualizar_venda, venda_id, venda_update)
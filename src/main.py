@@ -1,17 +1,34 @@
 import uvicorn
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
-from routes import  routes_funcionario, routes_produtos, routes_vendas, routes_relatorio
-from db.connection import engine, Base
+from routes import  routes_funcionario, routes_produtos, routes_vendas, routes_relatorio, routes_metricas
+from db.connection import async_engine
+from db import migracoes
+from services import http_clients, security
 
 
-Base.metadata.create_all(bind=engine)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # O esquema é mantido pelas migrações (python cli.py migrar); aqui só confere a versão
+    await migracoes.verificar_esquema()
+    # Clientes HTTP compartilhados (um por serviço) vivem enquanto a aplicação roda
+    await http_clients.iniciar_clientes()
+    yield
+    await http_clients.fechar_clientes()
+    await async_engine.dispose()
+    security.fechar_pool_hash()
+
 
 app = FastAPI(
     title="API FUNCIONÁRIOS - Sistema SGM",
     description="Ponto de entrada.",
-    version="1.0.0"
+    version="1.0.0",
+    # orjson serializa bem mais rápido que o json da biblioteca padrão
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
 
 origins = [
@@ -23,7 +40,6 @@ origins = [
 
 app.add_middleware(
     CORSMiddleware,
-    allowed_hosts=origins,
     allow_origins=origins,
     allow_credentials=True,
     allow_methods=["*"],
@@ -35,5 +51,6 @@ app.include_router(routes_funcionario.router, prefix="/api/v1")
 app.include_router(routes_produtos.router, prefix="/api/v1")
 app.include_router(routes_vendas.router, prefix="/api/v1")
 app.include_router(routes_relatorio.router, prefix="/api/v1")
+app.include_router(routes_metricas.router, prefix="/api/v1")
 
 
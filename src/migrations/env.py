@@ -0,0 +1,46 @@
+from logging.config import fileConfig
+
+from alembic import context
+
+from db.connection import engine, Base
+# importa os models para registrar as tabelas no Base.metadata (autogenerate)
+from models import models_funcionarios, models_produtos, models_resumos, models_vendas  # noqa: F401
+
+config = context.config
+
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+
+# índices de expressão criados só por SQL nas migrações (não estão nos models)
+INDICES_FORA_DOS_MODELS = {"ix_produtos_titulo_trgm"}
+
+
+def incluir_objeto(objeto, nome, tipo, refletido, comparado_com):
+    return not (tipo == "index" and nome in INDICES_FORA_DOS_MODELS)
+
+
+def run_migrations_offline():
+    """Gera o SQL das migrações sem conectar ao banco (alembic upgrade --sql)."""
+    context.configure(
+        url=engine.url.render_as_string(hide_password=False),
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online():
+    with engine.connect() as connection:
+        context.configure(connection=connection, target_metadata=target_metadata, include_object=incluir_objeto)
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,99 @@
+"""esquema inicial (tabelas criadas até então pelo create_all)
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17
+
+Bancos que já existiam (criados pelo create_all do main.py) passam por esta
+revisão sem alterações: cada tabela só é criada se ainda não existir.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    tabelas = set(sa.inspect(op.get_bind()).get_table_names())
+
+    if "produtos" not in tabelas:
+        op.create_table(
+            "produtos",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("titulo", sa.String()),
+            sa.Column("descricao", sa.String()),
+            sa.Column("preco", sa.Float()),
+            sa.Column("peso", sa.Float()),
+            sa.Column("data_fabricacao", sa.Date()),
+            sa.Column("data_validade", sa.Date()),
+            sa.Column("data_cadastro", sa.DateTime(timezone=True), server_default=sa.func.now()),
+            sa.Column("data_atualizacao", sa.DateTime(timezone=True)),
+        )
+        for coluna in ("id", "titulo", "descricao", "preco", "peso"):
+            op.create_index(f"ix_produtos_{coluna}", "produtos", [coluna])
+
+    if "funcionarios" not in tabelas:
+        op.create_table(
+            "funcionarios",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("nome", sa.String(100), nullable=False),
+            sa.Column("cpf", sa.String(11), nullable=False, unique=True),
+            sa.Column("email", sa.String(100), nullable=False, unique=True),
+            sa.Column("telefone", sa.String(15), nullable=False),
+            sa.Column("data_nascimento", sa.Date(), nullable=False),
+            sa.Column("cargo", sa.String(50), nullable=False),
+            sa.Column("salario", sa.Float(), nullable=False),
+            sa.Column("senha", sa.String(255), nullable=False),
+            sa.Column("data_contratacao", sa.Date(), nullable=False),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+            sa.Column("updated_at", sa.DateTime(timezone=True)),
+        )
+        op.create_index("ix_funcionarios_id", "funcionarios", ["id"])
+
+    if "enderecos" not in tabelas:
+        op.create_table(
+            "enderecos",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("funcionario_id", sa.Integer(), sa.ForeignKey("funcionarios.id"), nullable=False),
+            sa.Column("logradouro", sa.String(100), nullable=False),
+            sa.Column("numero", sa.String(10), nullable=False),
+            sa.Column("complemento", sa.String(50)),
+            sa.Column("bairro", sa.String(50), nullable=False),
+            sa.Column("cidade", sa.String(50), nullable=False),
+            sa.Column("estado", sa.String(2), nullable=False),
+            sa.Column("cep", sa.String(10), nullable=False),
+        )
+        op.create_index("ix_enderecos_id", "enderecos", ["id"])
+
+    if "vendas" not in tabelas:
+        op.create_table(
+            "vendas",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("data_venda", sa.DateTime(timezone=True), server_default=sa.func.now()),
+            sa.Column("valor_total", sa.Float(), nullable=False),
+            sa.Column("funcionario_id", sa.Integer(), nullable=False),
+            sa.Column("nome_funcionario", sa.String(), nullable=False),
+            sa.Column("cpf", sa.String(), nullable=False),
+            sa.Column("cargo", sa.String(), nullable=False),
+        )
+        op.create_index("ix_vendas_id", "vendas", ["id"])
+
+    if "itens_venda" not in tabelas:
+        op.create_table(
+            "itens_venda",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("venda_id", sa.Integer(), sa.ForeignKey("vendas.id"), nullable=False),
+            sa.Column("produto_id", sa.Integer(), nullable=False),
+            sa.Column("quantidade", sa.Integer(), nullable=False),
+            sa.Column("preco_unitario", sa.Float(), nullable=False),
+        )
+        op.create_index("ix_itens_venda_id", "itens_venda", ["id"])
+
+
+def downgrade():
+    for tabela in ("itens_venda", "vendas", "enderecos", "funcionarios", "produtos"):
+        op.drop_table(tabela)
@@ -0,0 +1,147 @@
+"""plano de índices, resumos diários e chave de idempotência das vendas
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17
+
+Índices pensados a partir das consultas de querys_vendas, querys_relatorios
+e querys_resumos:
+- vendas (data_venda, id): filtro por período e ordenação/cursor das listagens;
+- vendas (funcionario_id, data_venda, id): relatório e listagem por funcionário;
+- itens_venda (venda_id): itens de cada venda (selectin) e junções com vendas;
+- itens_venda (produto_id): ranking de produtos sem os resumos;
+- enderecos (funcionario_id): endereços de cada funcionário (selectin).
+Saem os índices que só pesavam nas escritas: descricao, preco e peso de
+produtos (nenhuma consulta filtra por eles) e os ix_<tabela>_id, que
+duplicavam o índice da chave primária.
+
+Como o create_all criou parte disso em bancos de desenvolvimento, cada
+passo confere o que já existe antes de criar ou remover.
+"""
+import os
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+INDICES_REMOVIDOS = [
+    ("produtos", "ix_produtos_id", ["id"]),
+    ("produtos", "ix_produtos_descricao", ["descricao"]),
+    ("produtos", "ix_produtos_preco", ["preco"]),
+    ("produtos", "ix_produtos_peso", ["peso"]),
+    ("funcionarios", "ix_funcionarios_id", ["id"]),
+    ("enderecos", "ix_enderecos_id", ["id"]),
+    ("vendas", "ix_vendas_id", ["id"]),
+    ("itens_venda", "ix_itens_venda_id", ["id"]),
+]
+
+INDICES_CRIADOS = [
+    ("vendas", "ix_vendas_data_venda_id", ["data_venda", "id"]),
+    ("vendas", "ix_vendas_funcionario_data_venda_id", ["funcionario_id", "data_venda", "id"]),
+    ("itens_venda", "ix_itens_venda_venda_id", ["venda_id"]),
+    ("itens_venda", "ix_itens_venda_produto_id", ["produto_id"]),
+    ("enderecos", "ix_enderecos_funcionario_id", ["funcionario_id"]),
+]
+
+# Carga inicial dos resumos (mesma conta de querys_resumos, para todas as vendas)
+_ITENS_POR_VENDA = "(SELECT venda_id, sum(quantidade) AS quantidade FROM itens_venda GROUP BY venda_id)"
+CARGA_RESUMOS = {
+    "resumo_vendas_dia": f"""
+        INSERT INTO resumo_vendas_dia (dia, quantidade_vendas, quantidade_itens, valor_total)
+        SELECT date(timezone(:tz, v.data_venda)), count(v.id), coalesce(sum(i.quantidade), 0), sum(v.valor_total)
+        FROM vendas v LEFT JOIN {_ITENS_POR_VENDA} i ON i.venda_id = v.id
+        GROUP BY 1
+    """,
+    "resumo_funcionario_dia": f"""
+        INSERT INTO resumo_funcionario_dia
+            (dia, funcionario_id, nome_funcionario, quantidade_vendas, quantidade_itens, valor_total)
+        SELECT date(timezone(:tz, v.data_venda)), v.funcionario_id, max(v.nome_funcionario),
+               count(v.id), coalesce(sum(i.quantidade), 0), sum(v.valor_total)
+        FROM vendas v LEFT JOIN {_ITENS_POR_VENDA} i ON i.venda_id = v.id
+        GROUP BY 1, 2
+    """,
+    "resumo_produto_dia": """
+        INSERT INTO resumo_produto_dia (dia, produto_id, quantidade_vendas, quantidade_itens, valor_total)
+        SELECT date(timezone(:tz, v.data_venda)), i.produto_id, count(DISTINCT v.id),
+               sum(i.quantidade), sum(i.quantidade * i.preco_unitario)
+        FROM itens_venda i JOIN vendas v ON v.id = i.venda_id
+        GROUP BY 1, 2
+    """,
+}
+
+
+def _colunas_resumo():
+    return [
+        sa.Column("quantidade_vendas", sa.Integer(), nullable=False),
+        sa.Column("quantidade_itens", sa.Integer(), nullable=False),
+        sa.Column("valor_total", sa.Float(), nullable=False),
+    ]
+
+
+def upgrade():
+    inspetor = sa.inspect(op.get_bind())
+    tabelas = set(inspetor.get_table_names())
+
+    def indices(tabela):
+        return {indice["name"] for indice in inspetor.get_indexes(tabela)}
+
+    for tabela, nome, _ in INDICES_REMOVIDOS:
+        if nome in indices(tabela):
+            op.drop_index(nome, table_name=tabela)
+    for tabela, nome, colunas in INDICES_CRIADOS:
+        if nome not in indices(tabela):
+            op.create_index(nome, tabela, colunas)
+
+    # chave de idempotência da ingestão em lote (POST /vendas/lote)
+    if "chave_idempotencia" not in {coluna["name"] for coluna in inspetor.get_columns("vendas")}:
+        op.add_column("vendas", sa.Column("chave_idempotencia", sa.String(), nullable=True))
+    if "vendas_chave_idempotencia_key" not in {uc["name"] for uc in inspetor.get_unique_constraints("vendas")}:
+        op.create_unique_constraint("vendas_chave_idempotencia_key", "vendas", ["chave_idempotencia"])
+
+    criadas = []
+    if "resumo_vendas_dia" not in tabelas:
+        op.create_table(
+            "resumo_vendas_dia",
+            sa.Column("dia", sa.Date(), primary_key=True),
+            *_colunas_resumo(),
+        )
+        criadas.append("resumo_vendas_dia")
+    if "resumo_produto_dia" not in tabelas:
+        op.create_table(
+            "resumo_produto_dia",
+            sa.Column("dia", sa.Date(), primary_key=True),
+            sa.Column("produto_id", sa.Integer(), primary_key=True),
+            *_colunas_resumo(),
+        )
+        criadas.append("resumo_produto_dia")
+    if "resumo_funcionario_dia" not in tabelas:
+        op.create_table(
+            "resumo_funcionario_dia",
+            sa.Column("dia", sa.Date(), primary_key=True),
+            sa.Column("funcionario_id", sa.Integer(), primary_key=True),
+            sa.Column("nome_funcionario", sa.String()),
+            *_colunas_resumo(),
+        )
+        criadas.append("resumo_funcionario_dia")
+
+    # tabelas novas começam com o histórico já somado; as que o create_all
+    # criou antes já vinham sendo mantidas pelas escritas em vendas
+    fuso = os.getenv("RELATORIOS_TIMEZONE", "America/Sao_Paulo")
+    for tabela in criadas:
+        op.execute(sa.text(CARGA_RESUMOS[tabela]).bindparams(tz=fuso))
+
+
+def downgrade():
+    for tabela in ("resumo_funcionario_dia", "resumo_produto_dia", "resumo_vendas_dia"):
+        op.drop_table(tabela)
+    op.drop_constraint("vendas_chave_idempotencia_key", "vendas", type_="unique")
+    op.drop_column("vendas", "chave_idempotencia")
+    for tabela, nome, _ in INDICES_CRIADOS:
+        op.drop_index(nome, table_name=tabela)
+    for tabela, nome, colunas in INDICES_REMOVIDOS:
+        op.create_index(nome, tabela, colunas)
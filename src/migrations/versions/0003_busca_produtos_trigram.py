@@ -0,0 +1,62 @@
+"""busca de produtos por trecho do título (pg_trgm + unaccent)
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17
+
+Cria a função f_unaccent (unaccent marcada como IMMUTABLE, exigência para
+usá-la num índice) e um índice GIN de trigramas sobre
+lower(f_unaccent(titulo)), usado por GET /produtos/busca.
+
+Se o servidor não tiver as extensões (ou o usuário não puder criá-las), a
+migração segue sem o índice e a busca usa o índice em memória
+(services/busca_produtos.py).
+"""
+import logging
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+logger = logging.getLogger("alembic")
+
+EXTENSOES = ("pg_trgm", "unaccent")
+
+
+def upgrade():
+    conexao = op.get_bind()
+    disponiveis = set(conexao.execute(
+        sa.text("SELECT name FROM pg_available_extensions WHERE name = ANY(:nomes)"),
+        {"nomes": list(EXTENSOES)},
+    ).scalars())
+    if disponiveis != set(EXTENSOES):
+        logger.warning("Extensões %s indisponíveis: busca de produtos ficará no índice em memória.", set(EXTENSOES) - disponiveis)
+        return
+
+    try:
+        with conexao.begin_nested():
+            for extensao in EXTENSOES:
+                conexao.execute(sa.text(f"CREATE EXTENSION IF NOT EXISTS {extensao}"))
+    except sa.exc.DBAPIError as e:
+        logger.warning("Sem permissão para criar %s (%s): busca de produtos ficará no índice em memória.", EXTENSOES, e.orig)
+        return
+
+    op.execute("""
+        CREATE OR REPLACE FUNCTION f_unaccent(text) RETURNS text
+        LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+        AS $$ SELECT public.unaccent('public.unaccent', $1) $$
+    """)
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_produtos_titulo_trgm "
+        "ON produtos USING gin (lower(f_unaccent(titulo)) gin_trgm_ops)"
+    )
+
+
+def downgrade():
+    op.execute("DROP INDEX IF EXISTS ix_produtos_titulo_trgm")
+    op.execute("DROP FUNCTION IF EXISTS f_unaccent(text)")
@@ -0,0 +1,32 @@
+"""versão das vendas no banco, para o cache de relatórios
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17
+
+Sequências versao_vendas_geral e versao_vendas_historico: "geral" avança a
+cada escrita em vendas e "historico" só quando a venda é de antes de hoje.
+Avançam logo depois do commit da escrita (querys_resumos), então todos os
+processos (workers da API e a CLI) enxergam a mesma versão; por serem
+sequências, não há linha bloqueada entre escritas concorrentes.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+SEQUENCIAS = ("versao_vendas_geral", "versao_vendas_historico")
+
+
+def upgrade():
+    for nome in SEQUENCIAS:
+        op.execute(sa.schema.CreateSequence(sa.Sequence(nome)))
+
+
+def downgrade():
+    for nome in SEQUENCIAS:
+        op.execute(sa.schema.DropSequence(sa.Sequence(nome)))
@@ -7,7 +7,7 @@ from db.connection import Base
 class Funcionarios(Base):
     __tablename__ = 'funcionarios'
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     nome = Column(String(100), nullable=False)
     cpf = Column(String(11), unique=True, nullable=False)
     email = Column(String(100), unique=True, nullable=False)
@@ -17,7 +17,7 @@ class Funcionarios(Base):
     salario = Column(Float, nullable=False)
     senha = Column(String(255), nullable=False)
     data_contratacao = Column(Date, default=func.current_date(), nullable=False)
-    enderecos = relationship("Enderecos", back_populates="funcionario", cascade="all, delete-orphan")
+    enderecos = relationship("Enderecos", back_populates="funcionario", cascade="all, delete-orphan", lazy="raise")
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
@@ -25,8 +25,8 @@ class Funcionarios(Base):
 class Enderecos(Base):
     __tablename__ = 'enderecos'
 
-    id = Column(Integer, primary_key=True, index=True)
-    funcionario_id = Column(Integer, ForeignKey('funcionarios.id'), nullable=False)
+    id = Column(Integer, primary_key=True)
+    funcionario_id = Column(Integer, ForeignKey('funcionarios.id'), nullable=False, index=True)
     logradouro = Column(String(100), nullable=False)
     numero = Column(String(10), nullable=False)
     complemento = Column(String(50), nullable=True)
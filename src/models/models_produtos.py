@@ -5,11 +5,11 @@ from db.connection import Base
 class Produto(Base):
     __tablename__ = "produtos"
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     titulo = Column(String, index=True)
-    descricao = Column(String, index=True)
-    preco = Column(Float, index=True)
-    peso = Column(Float, index=True)
+    descricao = Column(String)
+    preco = Column(Float)
+    peso = Column(Float)
     data_fabricacao = Column(Date)
     data_validade = Column(Date)
     data_cadastro = Column(DateTime(timezone=True), server_default=func.now())
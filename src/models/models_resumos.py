@@ -0,0 +1,40 @@
+from sqlalchemy import Column, Date, Integer, Sequence, String, Float
+from db.connection import Base
+
+""" Resumos diários de vendas, mantidos na mesma transação das escritas em vendas. """
+class ResumoVendasDia(Base):
+    __tablename__ = 'resumo_vendas_dia'
+
+    dia = Column(Date, primary_key=True)
+    quantidade_vendas = Column(Integer, nullable=False, default=0)
+    quantidade_itens = Column(Integer, nullable=False, default=0)
+    valor_total = Column(Float, nullable=False, default=0.0)
+
+
+class ResumoProdutoDia(Base):
+    __tablename__ = 'resumo_produto_dia'
+
+    dia = Column(Date, primary_key=True)
+    produto_id = Column(Integer, primary_key=True)
+    quantidade_vendas = Column(Integer, nullable=False, default=0)
+    quantidade_itens = Column(Integer, nullable=False, default=0)
+    valor_total = Column(Float, nullable=False, default=0.0)
+
+
+class ResumoFuncionarioDia(Base):
+    __tablename__ = 'resumo_funcionario_dia'
+
+    dia = Column(Date, primary_key=True)
+    funcionario_id = Column(Integer, primary_key=True)
+    nome_funcionario = Column(String, nullable=True)
+    quantidade_vendas = Column(Integer, nullable=False, default=0)
+    quantidade_itens = Column(Integer, nullable=False, default=0)
+    valor_total = Column(Float, nullable=False, default=0.0)
+
+
+# Versões das vendas para a chave do cache de relatórios de todos os processos
+# (API, workers e CLI): "geral" avança a cada escrita em vendas e "historico"
+# só quando a venda é de antes de hoje. Sequências, e não uma linha de
+# contadores, para não bloquear as escritas concorrentes até o commit.
+versao_vendas_geral = Sequence("versao_vendas_geral", metadata=Base.metadata)
+versao_vendas_historico = Sequence("versao_vendas_historico", metadata=Base.metadata)
@@ -1,26 +1,34 @@
-from sqlalchemy import Column, DateTime, ForeignKey, Integer, String, Float
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, String, Float
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from db.connection import Base
 
 class Venda(Base):
     __tablename__ = 'vendas'
+    # índices da paginação por cursor: (data_venda, id) e por funcionário
+    __table_args__ = (
+        Index("ix_vendas_data_venda_id", "data_venda", "id"),
+        Index("ix_vendas_funcionario_data_venda_id", "funcionario_id", "data_venda", "id"),
+    )
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     data_venda = Column(DateTime(timezone=True), server_default=func.now())
     valor_total = Column(Float, nullable=False)
     funcionario_id = Column(Integer, nullable=False) # ID do funcionário do ms-funcionarios
     nome_funcionario = Column(String, nullable=False)
     cpf = Column(String, nullable=False)
     cargo = Column(String, nullable=False)
-    itens = relationship("ItemVenda", back_populates="venda", cascade="all, delete-orphan")
+    # chave enviada pelo PDV na ingestão em lote; reenviar a mesma venda não duplica
+    chave_idempotencia = Column(String, unique=True, nullable=True)
+    # selectin: os itens sempre vão na resposta, então já vêm numa consulta em lote
+    itens = relationship("ItemVenda", back_populates="venda", cascade="all, delete-orphan", lazy="selectin")
 
 class ItemVenda(Base):
     __tablename__ = 'itens_venda'
 
-    id = Column(Integer, primary_key=True, index=True)
-    venda_id = Column(Integer, ForeignKey('vendas.id'), nullable=False)
-    produto_id = Column(Integer, nullable=False) # ID do produto do ms-produtos
+    id = Column(Integer, primary_key=True)
+    venda_id = Column(Integer, ForeignKey('vendas.id'), nullable=False, index=True)
+    produto_id = Column(Integer, nullable=False, index=True) # ID do produto do ms-produtos
     quantidade = Column(Integer, nullable=False)
     preco_unitario = Column(Float, nullable=False)
 
@@ -1,30 +1,40 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 
-from typing import List
-from sqlalchemy.orm import Session
+from typing import List, Optional
+from pydantic import TypeAdapter
+from sqlalchemy.ext.asyncio import AsyncSession
 from services import security
+from services.campos import adaptador_parcial, ler_campos
+from services.serializacao import resposta_json
 
 from schemas.schema_funcionarios import (
     FuncionarioCreate,
     FuncionarioResponse,
     EnderecoResponse,
     EnderecoUpdate,
-    FuncionarioUpdate
+    FuncionarioUpdate,
+    FuncionarioResumo,
+    LoteFuncionarios
 )
+from schemas.schema_lote import IdsLote, LOTE_MAX_IDS
 from models.models_funcionarios import Funcionarios, Enderecos
-from db.dependeces import get_db
-from db import querys_funcionario
+from db.dependeces import get_async_db
+from db import querys_funcionario_async as querys_funcionario
 
 router = APIRouter(prefix="/funcionarios")
 
+_LISTA_FUNCIONARIOS = TypeAdapter(List[FuncionarioResponse])
+
+_DESCRICAO_FIELDS = "Campos separados por vírgula (ex.: id,nome,cargo,enderecos); padrão: todos"
+
 
 
 @router.post("/auth/")
-def login_funcionario(cpf: str, senha: str, db: Session = Depends(get_db)):
+async def login_funcionario(cpf: str, senha: str, db: AsyncSession = Depends(get_async_db)):
     """ Rota de login para funcionários """
     
     # Chama a função de autenticação passando a sessão 'db', o cpf e a senha
-    funcionario = security.authenticate_user(db=db, cpf=cpf, password=senha)
+    funcionario = await security.authenticate_user(db=db, cpf=cpf, password=senha)
    
     # Cria o token usando o CPF do funcionário autenticado
     token = security.create_access_token(data_payload={"sub": funcionario.cpf})
@@ -33,28 +43,77 @@ def login_funcionario(cpf: str, senha: str, db: Session = Depends(get_db)):
     return {"access_token": token, "token_type": "bearer"}
 
 @router.get("/", response_model=List[FuncionarioResponse])
-def obter_funcionario(skip: int = 0, limit: int = 10, db: Session = Depends(get_db)):
-    funcionarios = querys_funcionario.listar_todos_funcionarios(db)[skip : skip + limit]
-    return funcionarios
+async def obter_funcionario(
+    skip: int = 0,
+    limit: int = 10,
+    fields: Optional[str] = Query(None, description=_DESCRICAO_FIELDS),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """ Lista os funcionários; com fields, só essas colunas (e os endereços só se pedidos) """
+    campos = ler_campos(fields, FuncionarioResponse)
+    if campos:
+        funcionarios = await querys_funcionario.listar_funcionarios_campos(db, campos, skip, limit)
+        return resposta_json(adaptador_parcial(FuncionarioResponse, campos, lista=True), funcionarios)
+    funcionarios = await querys_funcionario.listar_todos_funcionarios(db, skip, limit)
+    return resposta_json(_LISTA_FUNCIONARIOS, funcionarios)
+
+async def _obter_lote(db: AsyncSession, ids: List[int]) -> LoteFuncionarios:
+    ids = list(dict.fromkeys(ids))
+    por_id = {linha.id: linha for linha in await querys_funcionario.obter_funcionarios_resumidos_por_ids(db, ids)}
+    return LoteFuncionarios(
+        funcionarios=[FuncionarioResumo.model_validate(por_id[id]) for id in ids if id in por_id],
+        ids_ausentes=[id for id in ids if id not in por_id],
+    )
+
+@router.get("/lote", response_model=LoteFuncionarios)
+async def obter_funcionarios_em_lote(
+    ids: List[int] = Query(..., min_length=1, max_length=LOTE_MAX_IDS, description="Repetido: ?ids=1&ids=2"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Vários funcionários numa consulta só, na ordem pedida; os ids que não existem vêm em ids_ausentes."""
+    return await _obter_lote(db, ids)
+
+@router.post("/lote", response_model=LoteFuncionarios)
+async def obter_funcionarios_em_lote_post(corpo: IdsLote, db: AsyncSession = Depends(get_async_db)):
+    """Como GET /funcionarios/lote, com os ids no corpo (conjuntos grandes demais para a URL)."""
+    return await _obter_lote(db, corpo.ids)
+
+@router.get("/me", response_model=security.FuncionarioTokken)
+async def obter_funcionario_autenticado(
+    funcionario: security.FuncionarioTokken = Depends(security.get_current_funcionario)
+):
+    """ Funcionário dono do bearer token """
+    return funcionario
 
 @router.get("/{id}", response_model=FuncionarioResponse)
-def obter_funcionario_por_id(id: int, db: Session = Depends(get_db)):
-    funcionario = querys_funcionario.obter_funcionario(db, id)
+async def obter_funcionario_por_id(
+    id: int,
+    fields: Optional[str] = Query(None, description=_DESCRICAO_FIELDS),
+    db: AsyncSession = Depends(get_async_db)
+):
+    campos = ler_campos(fields, FuncionarioResponse)
+    if campos:
+        funcionarios = await querys_funcionario.listar_funcionarios_campos(db, campos, id=id)
+        if not funcionarios:
+            raise HTTPException(status_code=404, detail="Funcionário não encontrado")
+        return resposta_json(adaptador_parcial(FuncionarioResponse, campos), funcionarios[0])
+    funcionario = await querys_funcionario.obter_funcionario(db, id)
     if not funcionario:
         raise HTTPException(status_code=404, detail="Funcionário não encontrado")
     return funcionario
 
 
 @router.post("/", response_model=FuncionarioResponse)
-def criar_funcionario(funcionario: FuncionarioCreate, db: Session = Depends(get_db)):
+async def criar_funcionario(funcionario: FuncionarioCreate, db: AsyncSession = Depends(get_async_db)):
     """ Cria um novo funcionário com endereço associado """
-    if querys_funcionario.obter_funcionarios_email(db, funcionario.email):
+    if await querys_funcionario.obter_funcionarios_email(db, funcionario.email):
         raise HTTPException(status_code=400, detail="Email já cadastrado")
-    if querys_funcionario.obter_funcionarios_cpf(db, funcionario.cpf):
+    if await querys_funcionario.obter_funcionarios_cpf(db, funcionario.cpf):
         raise HTTPException(status_code=400, detail="CPF já cadastrado")
 
    
     dados_funcionario = funcionario.model_dump(exclude={"enderecos"}, exclude_none=True)
+    dados_funcionario["senha"] = await security.hash_senha(funcionario.senha)
     funcionario_db = Funcionarios(**dados_funcionario)
 
     dados_endereco = funcionario.enderecos.model_dump(exclude_none=True)
@@ -63,7 +122,7 @@ def criar_funcionario(funcionario: FuncionarioCreate, db: Session = Depends(get_
 
     funcionario_db.enderecos.append(endereco_db)
 
-    funcionario_persistido = querys_funcionario.criar_funcionario(db, funcionario_db)
+    funcionario_persistido = await querys_funcionario.criar_funcionario(db, funcionario_db)
     if not funcionario_persistido:
         raise HTTPException(status_code=400, detail="Erro ao criar funcionário")
 
@@ -71,25 +130,27 @@ def criar_funcionario(funcionario: FuncionarioCreate, db: Session = Depends(get_
   
 
 @router.put("/{id}", response_model=FuncionarioResponse)
-def atualizar_funcionario(id: int, funcionario: FuncionarioUpdate, db: Session = Depends(get_db)):
+async def atualizar_funcionario(id: int, funcionario: FuncionarioUpdate, db: AsyncSession = Depends(get_async_db)):
     """ Atualiza os dados de um funcionário existente """
-    funcionario_db = querys_funcionario.atualizar_funcionario(db, id, funcionario)
+    if funcionario.senha is not None:
+        funcionario = funcionario.model_copy(update={"senha": await security.hash_senha(funcionario.senha)})
+    funcionario_db = await querys_funcionario.atualizar_funcionario(db, id, funcionario)
     if not funcionario_db:
         raise HTTPException(status_code=404, detail="Funcionário não encontrado")
     return funcionario_db
 
 @router.delete("/{id}")
-def deletar_funcionario(id: int, db: Session = Depends(get_db)):
+async def deletar_funcionario(id: int, db: AsyncSession = Depends(get_async_db)):
     """ Deleta um funcionário existente """
-    funcionario_db = querys_funcionario.deletar_funcionario(db, id)
+    funcionario_db = await querys_funcionario.deletar_funcionario(db, id)
     if not funcionario_db:
         raise HTTPException(status_code=404, detail="Funcionário não encontrado")
     return {"detail": "Funcionário deletado"}
 
 @router.put("/endereco/{id}", response_model=EnderecoResponse)
-def atualizar_endereco(id: int, endereco: EnderecoUpdate, db: Session = Depends(get_db)):
+async def atualizar_endereco(id: int, endereco: EnderecoUpdate, db: AsyncSession = Depends(get_async_db)):
     """ Atualiza os dados de um endereço existente """
-    endereco_db = querys_funcionario.atualizar_endereco(db, id, endereco)
+    endereco_db = await querys_funcionario.atualizar_endereco(db, id, endereco)
     if not endereco_db:
         raise HTTPException(status_code=404, detail="Endereço não encontrado")
     return endereco_db
\ No newline at end of file
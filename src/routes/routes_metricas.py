@@ -0,0 +1,50 @@
+import os
+
+from fastapi import APIRouter
+
+from db.connection import engine, async_engine
+from db.pool_metricas import estado_pool
+from services.busca_produtos import busca_produtos
+from services import cache_relatorios, security, vendas_service
+from services.cache import cache_principais, cache_produtos, cache_titulos_produtos
+
+router = APIRouter(prefix="/metricas", tags=["Métricas"])
+
+
+@router.get("/pool")
+def obter_metricas_pool():
+    """
+    Estado dos pools de conexão deste processo (worker): conexões em uso e
+    ociosas, overflow, tempo de espera por checkout e timeouts.
+    """
+    return {
+        "pid": os.getpid(),
+        "async": estado_pool(async_engine.sync_engine.pool),
+        "sync": estado_pool(engine.pool),
+    }
+
+
+@router.get("/cache")
+def obter_metricas_cache():
+    """Hits, misses, evictions e tamanho dos caches em memória deste processo."""
+    return {
+        "pid": os.getpid(),
+        "produtos": cache_produtos.estatisticas(),
+        "busca_produtos": busca_produtos.estatisticas(),
+        "titulos_produtos": cache_titulos_produtos.estatisticas(),
+        "tokens": security.cache_tokens.estatisticas(),
+        "principais": cache_principais.estatisticas(),
+        "relatorios": cache_relatorios.estatisticas(),
+    }
+
+
+@router.get("/hash")
+def obter_metricas_hash():
+    """Ocupação do pool de hash de senhas deste processo e parâmetros do Argon2."""
+    return {"pid": os.getpid(), **security.estado_pool_hash()}
+
+
+@router.get("/relatorios")
+def obter_metricas_relatorios():
+    """Cálculos de relatório feitos e pedidos atendidos por um cálculo já em andamento."""
+    return {"pid": os.getpid(), **vendas_service.coalescedor.estatisticas()}
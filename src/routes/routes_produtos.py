@@ -1,66 +1,159 @@
-from fastapi import APIRouter, Depends, HTTPException, Header, Path
+import io
+
+from fastapi import APIRouter, Depends, HTTPException, Header, Path, Query, UploadFile
+from fastapi.concurrency import run_in_threadpool
 import httpx
-from pydantic import BaseModel
+from pydantic import BaseModel, TypeAdapter
 from typing import List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from schemas.schema_produtos import ProdutoCreate, ProdutoBase, Produto, ProdutoUpdate
-from db.dependeces import  get_db
-from db.querys_produtos import criar_produto, obter_produtos, obter_produto_id, obter_produto_por_titulo, atualiza_produto, deleta_produto, contar_produtos, sum_valor_total
+from schemas.schema_produtos import ProdutoCreate, ProdutoBase, Produto, ProdutoResumo, ProdutoUpdate, LoteProdutos, ResultadoImportacao
+from schemas.schema_lote import IdsLote, LOTE_MAX_IDS
+from db.dependeces import  get_async_db, get_db
+from db.querys_produtos_async import criar_produto, obter_produtos, listar_produtos_campos, obter_produtos_com_cache, obter_produtos_resumidos_por_ids, atualiza_produto, deleta_produto, contar_produtos, sum_valor_total
 from models import models_produtos
+from services import importacao_produtos
+from services.busca_produtos import busca_produtos
+from services.campos import adaptador_parcial, ler_campos
+from services.serializacao import resposta_json
 
 
 
 
 router = APIRouter(prefix="/produtos")
 
+_LISTA_PRODUTOS = TypeAdapter(List[Produto])
+
 
 @router.post("/", response_model=ProdutoCreate)
-def cadastrar_produto(produto: ProdutoCreate, db: Session = Depends(get_db)):
+async def cadastrar_produto(produto: ProdutoCreate, db: AsyncSession = Depends(get_async_db)):
     
     dados_produto = produto.model_dump()
     produto_data = models_produtos.Produto(**dados_produto)
-    return  criar_produto(db=db, produto=produto_data)
+    return  await criar_produto(db=db, produto=produto_data)
+
+@router.post("/importar", response_model=ResultadoImportacao)
+async def importar_catalogo(
+    arquivo: UploadFile,
+    formato: Optional[str] = Query(None, pattern="^(csv|jsonl)$", description="Padrão: pela extensão do arquivo"),
+    atualizar: bool = Query(False, description="Se true, atualiza os produtos que já existem com o mesmo título"),
+    db: Session = Depends(get_db)
+):
+    """
+    Importa um catálogo em CSV (com cabeçalho) ou JSON Lines, com os campos
+    de ProdutoCreate. As linhas com erro são listadas sem interromper a
+    importação das demais. A leitura do arquivo, a validação e a gravação
+    rodam numa thread do threadpool, com sessão síncrona, fora do event loop.
+    """
+    formato = formato or importacao_produtos.detectar_formato(arquivo.filename)
+    if formato is None:
+        raise HTTPException(status_code=400, detail="Informe formato=csv ou formato=jsonl")
+
+    linhas = io.TextIOWrapper(arquivo.file, encoding="utf-8-sig", newline="")
+    registros = importacao_produtos.ler_registros(linhas, formato)
+    try:
+        return await run_in_threadpool(importacao_produtos.importar_produtos, db, registros, atualizar)
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="O arquivo deve estar em UTF-8")
+
+@router.get("/busca", response_model=List[ProdutoResumo])
+async def buscar_produtos(
+    q: str = Query(..., min_length=1, max_length=100, description="Trecho do título (sem diferenciar acentos e maiúsculas)"),
+    limit: int = Query(10, ge=1, le=50),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Busca de produtos para o autocomplete do PDV. Primeiro os títulos que
+    começam com o termo, depois os que têm uma palavra começando com ele e
+    por fim os que apenas o contêm.
+    """
+    return await busca_produtos.buscar(db, q, limit)
+
+async def _obter_lote(db: AsyncSession, ids: List[int]) -> LoteProdutos:
+    ids = list(dict.fromkeys(ids))
+    por_id = {linha.id: linha for linha in await obter_produtos_resumidos_por_ids(db, ids)}
+    return LoteProdutos(
+        produtos=[ProdutoResumo.model_validate(por_id[id], from_attributes=True) for id in ids if id in por_id],
+        ids_ausentes=[id for id in ids if id not in por_id],
+    )
+
+@router.get("/lote", response_model=LoteProdutos)
+async def pegar_produtos_em_lote(
+    ids: List[int] = Query(..., min_length=1, max_length=LOTE_MAX_IDS, description="Repetido: ?ids=1&ids=2"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Vários produtos numa consulta só, na ordem pedida; os ids que não existem vêm em ids_ausentes."""
+    return await _obter_lote(db, ids)
+
+@router.post("/lote", response_model=LoteProdutos)
+async def pegar_produtos_em_lote_post(corpo: IdsLote, db: AsyncSession = Depends(get_async_db)):
+    """Como GET /produtos/lote, com os ids no corpo (conjuntos grandes demais para a URL)."""
+    return await _obter_lote(db, corpo.ids)
+
+_DESCRICAO_FIELDS = "Campos separados por vírgula (ex.: id,titulo,preco); padrão: todos"
 
 @router.get("/{titulo}", response_model=ProdutoBase)
-def pegar_produto_por_titulo(titulo: str, db: Session = Depends(get_db)):
-    db_produto = obter_produto_por_titulo(db, titulo=titulo)
-    if db_produto is None:
+async def pegar_produto_por_titulo(
+    titulo: str,
+    fields: Optional[str] = Query(None, description=_DESCRICAO_FIELDS),
+    db: AsyncSession = Depends(get_async_db)
+):
+    campos = ler_campos(fields, Produto)
+    produtos = await obter_produtos_com_cache(db, titulos=[titulo])
+    if not produtos:
         raise HTTPException(status_code=404, detail="Produto não encontrado")
-    return db_produto
+    if campos:
+        return resposta_json(adaptador_parcial(Produto, campos), produtos[0])
+    return produtos[0]
 
 @router.get("/", response_model=List[Produto])
-def listar_produtos(db: Session = Depends(get_db)):
-    return obter_produtos(db)
+async def listar_produtos(
+    fields: Optional[str] = Query(None, description=_DESCRICAO_FIELDS),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Lista os produtos; com fields, o SELECT traz só essas colunas."""
+    campos = ler_campos(fields, Produto)
+    if campos:
+        return resposta_json(adaptador_parcial(Produto, campos, lista=True), await listar_produtos_campos(db, campos))
+    return resposta_json(_LISTA_PRODUTOS, await obter_produtos(db))
 
 
 
 @router.put("/{id_produto}", response_model=Produto)
-def atualizar_produto(id_produto: int, produto: ProdutoUpdate, db: Session = Depends(get_db)):
-    db_produto = atualiza_produto(db, id=id_produto, produto=produto)
+async def atualizar_produto(id_produto: int, produto: ProdutoUpdate, db: AsyncSession = Depends(get_async_db)):
+    db_produto = await atualiza_produto(db, id=id_produto, produto=produto)
     if db_produto is None:
         raise HTTPException(status_code=404, detail="Produto não encontrado")
     return db_produto
 
 @router.delete("/{id_produto}", response_model=Produto)
-def deletar_produto(id_produto: int, db: Session = Depends(get_db)):
+async def deletar_produto(id_produto: int, db: AsyncSession = Depends(get_async_db)):
     # 🔧 ajuste: usar keyword correta esperada por querys.deleta_produto
-    db_produto = deleta_produto(db, produto_id=id_produto)
+    db_produto = await deleta_produto(db, produto_id=id_produto)
     if db_produto is None:
         raise HTTPException(status_code=404, detail="Produto não encontrado")
     return db_produto
 
 @router.get("/contar/", response_model=int)
-def pegar_total(db: Session = Depends(get_db)):
-    return contar_produtos(db)
+async def pegar_total(db: AsyncSession = Depends(get_async_db)):
+    return await contar_produtos(db)
 
 @router.get("/total_valor/", response_model=float)
-def total_valor_produtos(db: Session = Depends(get_db)):
-    return sum_valor_total(db)
+async def total_valor_produtos(db: AsyncSession = Depends(get_async_db)):
+    return await sum_valor_total(db)
 
 
 @router.get("/id/{id_produto}", response_model=Produto)
-def pegar_produto_por_id(id_produto: int, db: Session = Depends(get_db)):
-    db_produto = obter_produto_id(db, id=id_produto)
-    if db_produto is None:
+async def pegar_produto_por_id(
+    id_produto: int,
+    fields: Optional[str] = Query(None, description=_DESCRICAO_FIELDS),
+    db: AsyncSession = Depends(get_async_db)
+):
+    campos = ler_campos(fields, Produto)
+    produtos = await obter_produtos_com_cache(db, ids=[id_produto])
+    if not produtos:
         raise HTTPException(status_code=404, detail="Produto não encontrado")
-    return db_produto
\ No newline at end of file
+    if campos:
+        # o produto vem do cache completo: basta recortar os campos
+        return resposta_json(adaptador_parcial(Produto, campos), produtos[0])
+    return produtos[0]
\ No newline at end of file
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from typing import Optional
 from datetime import date
 from fastapi import Query
@@ -8,9 +8,9 @@ from datetime import date
 
 from services.vendas_service import obter_ranking_funcionarios, obter_ranking_produtos, obter_sumario_vendas_periodo, obter_vendas_por_periodo
 from schemas.schemas_relatorios import RelatorioVendasSumario, RelatorioVendasPorPeriodo, RelatorioRankingProdutos, RelatorioRankingFuncionarios
-# (Opcional: Importar get_db se precisar de acesso ao banco de dados do ms-relatorios)
-# from ..db.connection import get_db
-# from sqlalchemy.orm import Session
+from db.dependeces import get_async_db
+from services.cache_relatorios import responder_relatorio
+from sqlalchemy.ext.asyncio import AsyncSession
 
 router = APIRouter(prefix="/relatorios")
 
@@ -19,21 +19,22 @@ router = APIRouter(prefix="/relatorios")
     response_model=RelatorioVendasSumario
 )
 async def gerar_relatorio_sumario_vendas(
+    request: Request,
     data_inicio: Optional[date] = None,
-    data_fim: Optional[date] = None
-    # , db: Session = Depends(get_db) # Descomentar se precisar do DB
+    data_fim: Optional[date] = None,
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Gera um relatório sumário de vendas (total, valor, produtos)
-    para um período especificado, buscando dados do ms-vendas.
+    para um período especificado.
     """
+    parametros = {"data_inicio": data_inicio, "data_fim": data_fim}
     try:
-        # Chama a função assíncrona do nosso serviço para buscar os dados
-        relatorio = await obter_sumario_vendas_periodo(
-            data_inicio=data_inicio,
-            data_fim=data_fim
+        # Chama a função assíncrona do nosso serviço para buscar os dados (se não estiver em cache)
+        return await responder_relatorio(
+            request, db, "vendas-sumario", parametros,
+            lambda: obter_sumario_vendas_periodo(db=db, **parametros)
         )
-        return relatorio
     except HTTPException as e:
         # Re-levanta exceções HTTP que podem vir do vendas_service
         raise e
@@ -46,18 +47,20 @@ async def gerar_relatorio_sumario_vendas(
     response_model=RelatorioVendasPorPeriodo
 )
 async def vendas_por_periodo(
+    request: Request,
     data_inicio: date | None = None,
     data_fim: date | None = None,
-    granularidade: str = Query("dia", pattern="^(dia|mes)$")
+    granularidade: str = Query("dia", pattern="^(dia|mes)$"),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Série temporal de vendas agregadas por dia ou mês.
     """
+    parametros = {"data_inicio": data_inicio, "data_fim": data_fim, "granularidade": granularidade}
     try:
-        return await obter_vendas_por_periodo(
-            data_inicio=data_inicio,
-            data_fim=data_fim,
-            granularidade=granularidade,
+        return await responder_relatorio(
+            request, db, "vendas-por-periodo", parametros,
+            lambda: obter_vendas_por_periodo(db=db, **parametros)
         )
     except HTTPException as e:
         raise e
@@ -72,22 +75,28 @@ async def vendas_por_periodo(
     response_model=RelatorioRankingProdutos
 )
 async def ranking_produtos(
+    request: Request,
     data_inicio: date | None = None,
     data_fim: date | None = None,
     ordenar_por: str = Query("valor", pattern="^(qtd|valor)$"),
     top: int = Query(10, ge=1, le=1000),
-    incluir_titulos: bool = Query(False, description="Se true, busca 'titulo' no ms-produtos")
+    incluir_titulos: bool = Query(False, description="Se true, inclui o 'titulo' do produto"),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Top-N de produtos por quantidade vendida ou valor faturado.
     """
+    parametros = {
+        "data_inicio": data_inicio,
+        "data_fim": data_fim,
+        "ordenar_por": ordenar_por,
+        "top": top,
+        "incluir_titulos": incluir_titulos,
+    }
     try:
-        return await obter_ranking_produtos(
-            data_inicio=data_inicio,
-            data_fim=data_fim,
-            ordenar_por=ordenar_por,
-            top=top,
-            incluir_titulos=incluir_titulos,
+        return await responder_relatorio(
+            request, db, "ranking-produtos", parametros,
+            lambda: obter_ranking_produtos(db=db, **parametros)
         )
     except HTTPException as e:
         raise e
@@ -101,22 +110,28 @@ async def ranking_produtos(
     response_model=RelatorioRankingFuncionarios
 )
 async def ranking_funcionarios(
+    request: Request,
     data_inicio: date | None = None,
     data_fim: date | None = None,
     ordenar_por: str = Query("valor", pattern="^(qtd|valor)$"),
     top: int = Query(10, ge=1, le=1000),
-    incluir_nomes: bool = Query(False, description="Se true, busca 'nome' no ms-funcionarios")
+    incluir_nomes: bool = Query(False, description="Se true, inclui o 'nome' do funcionário"),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Top-N de funcionários por quantidade de vendas ou por valor faturado.
     """
+    parametros = {
+        "data_inicio": data_inicio,
+        "data_fim": data_fim,
+        "ordenar_por": ordenar_por,
+        "top": top,
+        "incluir_nomes": incluir_nomes,
+    }
     try:
-        return await obter_ranking_funcionarios(
-            data_inicio=data_inicio,
-            data_fim=data_fim,
-            ordenar_por=ordenar_por,
-            top=top,
-            incluir_nomes=incluir_nomes,
+        return await responder_relatorio(
+            request, db, "ranking-funcionarios", parametros,
+            lambda: obter_ranking_funcionarios(db=db, **parametros)
         )
     except HTTPException as e:
         raise e
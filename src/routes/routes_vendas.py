@@ -1,134 +1,157 @@
-from fastapi import APIRouter, Depends, HTTPException
-import httpx
-from sqlalchemy.orm import Session
+import asyncio
+
+import zlib
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 from datetime import date
-from schemas.schema_vendas import ItemVendaCreate, VendaCreate, Venda, PaginaVendas, RelatorioFuncionario,Produto, VendaUpdate
-from db.querys_vendas import criar_venda, listar_vendas, obter_venda_por_id, obter_relatorio_por_funcionario, deletar_venda, atualizar_venda
-from db.dependeces import get_db
-import os
+from schemas.schema_vendas import Venda, PaginaVendas, RelatorioFuncionario,Produto, VendaUpdate, NovaVendaCreate, ResultadoLote
+from db.querys_vendas_async import criar_venda, listar_vendas, obter_venda_por_id, obter_relatorio_por_funcionario, deletar_venda, atualizar_venda
+from db.dependeces import get_async_db
+from services.resolvers import ResolverServicos, get_resolver
+from services.exportacao_vendas import exportar_vendas, MEDIA_TYPES
+from services.vendas_lote import ingerir_vendas, ler_linhas_ndjson
+from services.carrinho import ProdutoNaoEncontrado, montar_venda, resolver_carrinhos
+from services.serializacao import resposta_json
 
 
 router = APIRouter(prefix="/vendas", tags=["Vendas"])
 
+_PAGINA_VENDAS = TypeAdapter(PaginaVendas)
 
 
-async def buscar_produtos_service(tituloProduto: str):
-    """função para acessar o serviço de produtos para pegar os produtos e salvar nos itens da venda"""
-
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.get(
-                f"{os.getenv('DEV_HOST')}/api/v1/produtos/{tituloProduto}"
-            )
-            if response.status_code == 200:
-                return response.json()
-            elif response.status_code == 404:
-                return httpx.Response(status_code=404)
-        except httpx.HTTPStatusError as exec:
-            raise HTTPException(status_code=503, detail=f"Erro ao contactar serviço de produtos: {exec}")
-        except httpx.RequestError as exc:
-            raise HTTPException(status_code=503, detail=f"Erro ao contactar serviço de produtos: {exc}")
-
 
+async def buscar_produtos_service(tituloProduto: str, resolver: ResolverServicos):
+    """função para acessar o serviço de produtos para pegar os produtos e salvar nos itens da venda"""
+    produto = await resolver.buscar_produto_por_titulo(tituloProduto)
+    if produto is None:
+        raise HTTPException(status_code=404, detail="Produto não encontrado no serviço de produtos")
+    return produto
 
 
-async def buscar_funcionario_service(id_funcionario:int):
+async def buscar_funcionario_service(id_funcionario: int, resolver: ResolverServicos):
     """função para acessar o serviço de funcionários para pegar os funcionários e salvar na venda"""
-
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.get(
-                f"{os.getenv('DEV_HOST')}/api/v1/funcionarios/{id_funcionario}"
-            )
-            if response.status_code == 200:
-                return response.json()
-            elif response.status_code == 404:
-                return httpx.Response(status_code=404)
-        except httpx.HTTPStatusError as exec:
-            raise HTTPException(status_code=503, detail=f"Erro ao contactar serviço de funcionários: {exec}")
-        except httpx.RequestError as exc:
-            raise HTTPException(status_code=503, detail=f"Erro ao contactar serviço de funcionários: {exc}")
+    funcionario = await resolver.buscar_funcionario(id_funcionario)
+    if funcionario is None:
+        raise HTTPException(status_code=404, detail="Funcionário não encontrado no serviço de funcionários")
+    return funcionario
 
 
 
 @router.get("/produtos/{tituloProduto}", response_model=Produto)
-async def obter_produto_por_titulo(tituloProduto: str):
+async def obter_produto_por_titulo(tituloProduto: str, resolver: ResolverServicos = Depends(get_resolver)):
     """Rota para obter produto por título via ms-produtos"""
-    produto_response = await buscar_produtos_service(tituloProduto)
-    if isinstance(produto_response, httpx.Response) and produto_response.status_code == 404:
-        raise HTTPException(status_code=404, detail="Produto não encontrado no serviço de produtos")
-    return produto_response
+    return await buscar_produtos_service(tituloProduto, resolver)
 
 @router.post("/", response_model=Venda)
-async def criar_nova_venda(novaVenda: VendaCreate, db: Session = Depends(get_db)):
-    """Cria uma nova venda, validando produtos via ms-produtos"""
-    produto_response = await buscar_produtos_service(novaVenda.titulo_produto)
-    funcionario_response = await buscar_funcionario_service(novaVenda.id_funcionario)
-
-    if isinstance(produto_response, httpx.Response) and produto_response.status_code == 404:
-        raise HTTPException(status_code=404, detail="Produto não encontrado no serviço de produtos")
-
-    if isinstance(funcionario_response, httpx.Response) and funcionario_response.status_code == 404:
-        raise HTTPException(status_code=404, detail="Funcionário não encontrado no serviço de funcionários")
-    
-    # 1. Mapeia a resposta do produto para o schema Produto
-    try:
-        produto_schema = Produto(**produto_response)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Resposta inesperada do serviço de produtos: {e}")
+async def criar_nova_venda(
+    novaVenda: NovaVendaCreate,
+    db: AsyncSession = Depends(get_async_db),
+    resolver: ResolverServicos = Depends(get_resolver)
+):
+    """
+    Cria uma nova venda com os itens do carrinho (titulo ou produto_id e
+    quantidade), validando produtos via ms-produtos. Todos os produtos são
+    resolvidos em uma única busca em lote, e a venda e os itens são gravados
+    na mesma transação.
+    """
+    carrinho = novaVenda.linhas_carrinho()
 
-    # 2. Cria o schema do ItemVenda (o item que foi vendido)
-    item_para_venda = ItemVendaCreate(
-        produto_id=produto_schema.id,
-        quantidade=1,  
-        preco_unitario=produto_schema.preco
+    # As duas buscas são independentes: roda em paralelo (latência ~ max, não soma)
+    catalogo, funcionario_response = await asyncio.gather(
+        resolver_carrinhos(resolver, [carrinho]),
+        buscar_funcionario_service(novaVenda.id_funcionario, resolver),
     )
 
-    # 3. Cria o schema da VendaCreate, já incluindo o item na lista "itens"
     try:
-        venda_schema_create = VendaCreate(
-            funcionario_id=funcionario_response["id"],
-            nome_funcionario=funcionario_response.get("nome", "Nome não encontrado"),
-            cpf=funcionario_response.get("cpf", "CPF não encontrado"),
-            cargo=funcionario_response.get("cargo", "Cargo não encontrado"),
-            itens=[item_para_venda]  
-        )
+        venda_schema_create = montar_venda(carrinho, catalogo, funcionario_response)
+    except ProdutoNaoEncontrado as e:
+        raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro ao criar schema da Venda: {e}")
 
-    # 4. Passa o schema da Venda (que agora contém os itens) para a função de query
-    return criar_venda(db=db, venda=venda_schema_create)
+    return await criar_venda(db=db, venda=venda_schema_create)
 
 
+@router.post("/lote", response_model=ResultadoLote)
+async def criar_vendas_em_lote(
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    resolver: ResolverServicos = Depends(get_resolver)
+):
+    """
+    Ingestão em lote para sincronização dos PDVs: o corpo é NDJSON (uma venda
+    por linha, com chave_idempotencia), opcionalmente com
+    Content-Encoding: gzip. Retorna o resultado de cada linha; reenviar o
+    mesmo lote não duplica as vendas já gravadas.
+    """
+    gzip = request.headers.get("content-encoding", "").lower() == "gzip"
+    try:
+        return await ingerir_vendas(db, resolver, ler_linhas_ndjson(request.stream(), gzip=gzip))
+    except zlib.error as e:
+        raise HTTPException(status_code=400, detail=f"Corpo gzip inválido: {e}")
+
 
 @router.get("/", response_model=PaginaVendas)
-def ler_vendas(
-    db: Session = Depends(get_db),
+async def ler_vendas(
+    db: AsyncSession = Depends(get_async_db),
     data_inicio: date | None = None,
     data_fim: date | None = None,
     skip: int = 0,
-    limit: int = 100
+    limit: int = 100,
+    stats: bool = True,
+    cursor: str | None = None
 ):
     """
     Retorna uma página de vendas com estatísticas, 
-    permitindo filtro por data.
-    """
-    return listar_vendas(
-        db=db, 
-        data_inicio=data_inicio, 
-        data_fim=data_fim, 
-        skip=skip, 
-        limit=limit
+    permitindo filtro por data. Com stats=false as estatísticas
+    não são calculadas (útil para quem só percorre as páginas).
+    Para paginar por cursor, envie o next_cursor da página anterior
+    em cursor (skip é ignorado).
+    """
+    try:
+        pagina = await listar_vendas(
+            db=db, 
+            data_inicio=data_inicio, 
+            data_fim=data_fim, 
+            skip=skip, 
+            limit=limit,
+            incluir_estatisticas=stats,
+            cursor=cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return resposta_json(_PAGINA_VENDAS, pagina)
+
+
+@router.get("/export")
+async def exportar_vendas_periodo(
+    formato: str = Query("csv", pattern="^(csv|ndjson)$"),
+    data_inicio: date | None = None,
+    data_fim: date | None = None,
+    linhas: str = Query("venda", pattern="^(venda|item)$", description="Uma linha por venda ou por item de venda")
+):
+    """
+    Exporta as vendas do período em CSV ou NDJSON, enviando as linhas
+    conforme são lidas do banco (sem montar a resposta inteira em memória).
+    """
+    nome_arquivo = f"vendas_{data_inicio or 'inicio'}_{data_fim or 'hoje'}.{formato}"
+    return StreamingResponse(
+        exportar_vendas(formato, data_inicio, data_fim, por_item=linhas == "item"),
+        media_type=MEDIA_TYPES[formato],
+        headers={"Content-Disposition": f'attachment; filename="{nome_arquivo}"'}
     )
 
 
 @router.get("/{venda_id}", response_model=Venda)
-def ler_venda_por_id(venda_id: int, db: Session = Depends(get_db)):
+async def ler_venda_por_id(venda_id: int, db: AsyncSession = Depends(get_async_db)):
     """
     Busca e retorna uma venda específica pelo seu ID.
     """
-    db_venda = obter_venda_por_id(db, venda_id=venda_id)
+    db_venda = await obter_venda_por_id(db, venda_id=venda_id)
     if db_venda is None:
         raise HTTPException(status_code=404, detail="Venda não encontrada")
     return db_venda
@@ -137,48 +160,53 @@ def ler_venda_por_id(venda_id: int, db: Session = Depends(get_db)):
     "/funcionario/{funcionario_id}", 
     response_model=RelatorioFuncionario
 )
-def gerar_relatorio_de_funcionario(
+async def gerar_relatorio_de_funcionario(
     funcionario_id: int, 
     data_inicio: date | None = None,
     data_fim: date | None = None,
     skip: int = 0,
     limit: int = 10,
-    db: Session = Depends(get_db)
+    cursor: str | None = None,
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Gera um relatório de vendas para um funcionário com estatísticas,
-    filtros por data e paginação.
-    """
-    relatorio = obter_relatorio_por_funcionario(
-        db=db, 
-        funcionario_id=funcionario_id,
-        data_inicio=data_inicio,
-        data_fim=data_fim,
-        skip=skip,
-        limit=limit
-    )
+    filtros por data e paginação (skip/limit ou cursor).
+    """
+    try:
+        relatorio = await obter_relatorio_por_funcionario(
+            db=db, 
+            funcionario_id=funcionario_id,
+            data_inicio=data_inicio,
+            data_fim=data_fim,
+            skip=skip,
+            limit=limit,
+            cursor=cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     return relatorio
 
 @router.delete("/{venda_id}", response_model=Venda)
-def deletar_venda_por_id(venda_id: int, db: Session = Depends(get_db)):
+async def deletar_venda_por_id(venda_id: int, db: AsyncSession = Depends(get_async_db)):
     """
     Deleta uma venda específica pelo seu ID.
     """
-    db_venda = deletar_venda(db, venda_id=venda_id)
+    db_venda = await deletar_venda(db, venda_id=venda_id)
     if db_venda is None:
         raise HTTPException(status_code=404, detail="Venda não encontrada")
     return db_venda
 
 @router.put("/{venda_id}", response_model=Venda)
-def atualizar_venda_por_id(
+async def atualizar_venda_por_id(
     venda_id: int, 
     venda_update: VendaUpdate, 
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Atualiza uma venda existente, substituindo completamente seus itens.
     """
-    db_venda = atualizar_venda(db, venda_id=venda_id, venda_update=venda_update)
+    db_venda = await atualizar_venda(db, venda_id=venda_id, venda_update=venda_update)
     if db_venda is None:
         raise HTTPException(status_code=404, detail="Venda não encontrada para atualização")
     return db_venda
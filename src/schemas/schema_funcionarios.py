@@ -2,7 +2,6 @@ from pydantic import BaseModel,field_validator, ConfigDict
 from typing import List, Optional
 from datetime import date, datetime
 from validate_docbr import CPF
-from services.security import get_password_hash, verify_password, create_access_token
 
 
 
@@ -58,13 +57,12 @@ class FuncionarioCreate(BaseModel):
 
     model_config = ConfigDict(from_attributes=True)
 
+    # o hash é feito na rota (security.hash_senha), fora do event loop
     @field_validator('senha')
     def validar_senha(cls, senha):
         if len(senha) < 8:
             raise ValueError('Senha deve ter pelo menos 8 caracteres')
-
-        hashed_senha = get_password_hash(senha)
-        return hashed_senha
+        return senha
 
     @field_validator('cpf')
     def validar_cpf(cls, cpf):
@@ -89,6 +87,7 @@ class FuncionarioCreate(BaseModel):
 
 
 class FuncionarioResponse(BaseModel):
+    """Funcionário nas respostas da API; o hash da senha nunca sai daqui."""
     id: int
     nome: str
     cpf: str
@@ -97,7 +96,6 @@ class FuncionarioResponse(BaseModel):
     data_nascimento: date
     cargo: str
     salario: float
-    senha: str
     data_contratacao: date
     enderecos: List[EnderecoResponse]
     created_at: datetime | None = None
@@ -107,6 +105,21 @@ class FuncionarioResponse(BaseModel):
 
 
 
+class FuncionarioResumo(BaseModel):
+    """Formato compacto do funcionário (consultas em lote), sem senha e endereços."""
+    id: int
+    nome: str
+    cpf: str
+    cargo: str
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class LoteFuncionarios(BaseModel):
+    funcionarios: List[FuncionarioResumo]
+    ids_ausentes: List[int]
+
+
 class FuncionarioUpdate(BaseModel):
     nome: Optional[str] = None
     email: Optional[str] = None
@@ -118,6 +131,12 @@ class FuncionarioUpdate(BaseModel):
 
     model_config = ConfigDict(from_attributes=True)
 
+    @field_validator('senha')
+    def validar_senha(cls, senha):
+        if senha is not None and len(senha) < 8:
+            raise ValueError('Senha deve ter pelo menos 8 caracteres')
+        return senha
+
 
 
    
\ No newline at end of file
@@ -0,0 +1,12 @@
+import os
+from typing import List
+
+from pydantic import BaseModel, Field
+
+# Limite de ids por consulta em lote (GET/POST /produtos/lote e /funcionarios/lote)
+LOTE_MAX_IDS = int(os.getenv("LOTE_MAX_IDS", "1000"))
+
+
+class IdsLote(BaseModel):
+    """Corpo do POST das consultas em lote, para conjuntos grandes demais para a URL."""
+    ids: List[int] = Field(..., min_length=1, max_length=LOTE_MAX_IDS)
@@ -36,3 +36,33 @@ class Produto(ProdutoBase):
 
     class Config:
         orm_mode = True
+
+
+class ProdutoResumo(BaseModel):
+    """Formato compacto do produto (busca do PDV). titulo e preco podem ser nulos no banco."""
+    id: int
+    titulo: Optional[str] = None
+    preco: Optional[float] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class LoteProdutos(BaseModel):
+    produtos: List[ProdutoResumo]
+    ids_ausentes: List[int]
+
+
+class ErroImportacao(BaseModel):
+    linha: int
+    titulo: Optional[str] = None
+    erro: str
+
+
+class ResultadoImportacao(BaseModel):
+    """Resumo da importação em lote do catálogo."""
+    total_linhas: int = 0
+    inseridos: int = 0
+    atualizados: int = 0
+    # títulos que já existiam, importados sem atualizar=true
+    ignorados: int = 0
+    erros: List[ErroImportacao] = []
@@ -1,5 +1,5 @@
-from pydantic import BaseModel, ConfigDict
-from typing import List, Optional
+from pydantic import BaseModel, ConfigDict, Field, model_validator
+from typing import List, Literal, Optional
 from datetime import datetime
 
 # --- Schemas para ItemVenda ---
@@ -28,6 +28,9 @@ class VendaBase(BaseModel):
 
 class VendaCreate(VendaBase):
     itens: List[ItemVendaCreate]
+    # preenchidos só pela ingestão em lote (PDV); None = padrão do banco
+    data_venda: Optional[datetime] = None
+    chave_idempotencia: Optional[str] = None
 
 class Venda(VendaBase):
     id: int
@@ -45,8 +48,10 @@ class PaginaVendasStats(BaseModel):
 
 class PaginaVendas(BaseModel):
     """Schema completo para a resposta da listagem de vendas."""
-    estatisticas: PaginaVendasStats
+    estatisticas: Optional[PaginaVendasStats] = None
     vendas: List[Venda]
+    # cursor da próxima página (None na última)
+    next_cursor: Optional[str] = None
 
     model_config = ConfigDict(from_attributes=True)
     
@@ -61,6 +66,7 @@ class RelatorioFuncionario(BaseModel):
     """Schema completo para a resposta do relatório."""
     estatisticas: RelatorioFuncionarioStats
     vendas: List[Venda]
+    next_cursor: Optional[str] = None
 
     model_config = ConfigDict(from_attributes=True)
     
@@ -86,8 +92,59 @@ class Funcionario(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
+class ItemCarrinho(BaseModel):
+    """Linha do carrinho: o produto por título ou por id, e a quantidade."""
+    titulo: Optional[str] = None
+    produto_id: Optional[int] = None
+    quantidade: int = Field(1, ge=1)
+
+    @model_validator(mode="after")
+    def exigir_produto(self):
+        if self.titulo is None and self.produto_id is None:
+            raise ValueError("Informe titulo ou produto_id do item")
+        return self
+
+
 class NovaVendaCreate(BaseModel):
-    titulo_produto: str
+    # titulo_produto (um produto, quantidade 1) continua aceito; itens é o carrinho
+    titulo_produto: Optional[str] = None
     id_funcionario: int
+    itens: Optional[List[ItemCarrinho]] = None
+
+    model_config = ConfigDict(extra="allow")  # permite campos extras sem quebrar
+
+    @model_validator(mode="after")
+    def exigir_itens(self):
+        if not self.titulo_produto and not self.itens:
+            raise ValueError("Informe titulo_produto ou ao menos um item em itens")
+        return self
+
+    def linhas_carrinho(self) -> List[ItemCarrinho]:
+        """Itens da venda, incluindo o titulo_produto do formato antigo."""
+        linhas = list(self.itens or [])
+        if self.titulo_produto:
+            linhas.insert(0, ItemCarrinho(titulo=self.titulo_produto, quantidade=1))
+        return linhas
+
+
+class VendaLoteLinha(NovaVendaCreate):
+    """Uma linha do NDJSON de POST /vendas/lote."""
+    chave_idempotencia: str = Field(min_length=1, max_length=200)
+    # horário da venda no PDV; se ausente, vale o horário da gravação
+    data_venda: Optional[datetime] = None
+
+
+class ResultadoLinhaLote(BaseModel):
+    linha: int
+    chave_idempotencia: Optional[str] = None
+    status: Literal["criada", "duplicada", "erro"]
+    venda_id: Optional[int] = None
+    erro: Optional[str] = None
+
 
-    model_config = ConfigDict(extra="allow")  # permite campos extras sem quebrar
\ No newline at end of file
+class ResultadoLote(BaseModel):
+    total_linhas: int
+    criadas: int
+    duplicadas: int
+    erros: int
+    resultados: List[ResultadoLinhaLote]
@@ -0,0 +1,143 @@
+import asyncio
+import bisect
+import logging
+import os
+import time
+import unicodedata
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from db import querys_produtos_async
+from db.connection import AsyncSessionLocal
+from schemas.schema_produtos import ProdutoResumo
+from services.cache import cache_produtos
+
+logger = logging.getLogger(__name__)
+
+# auto: usa o índice de trigramas do Postgres se a migração 0003 o criou,
+# senão o índice em memória; banco/memoria forçam um dos dois
+BUSCA_PRODUTOS_MODO = os.getenv("BUSCA_PRODUTOS_MODO", "auto")
+# Validade do índice em memória: depois dela, ou de uma escrita no catálogo
+# deste processo, o índice é reconstruído em segundo plano e o antigo segue
+# respondendo até o novo ficar pronto
+BUSCA_INDICE_TTL = float(os.getenv("BUSCA_INDICE_TTL", "60"))
+
+
+def normalizar(texto: str) -> str:
+    """Sem acentos, em minúsculas e com os espaços colapsados ("Pão  Francês" -> "pao frances")."""
+    decomposto = unicodedata.normalize("NFKD", texto)
+    sem_acentos = "".join(c for c in decomposto if not unicodedata.combining(c))
+    return " ".join(sem_acentos.casefold().split())
+
+
+class IndicePrefixos:
+    """
+    Índice em memória dos títulos normalizados: uma lista ordenada de
+    (palavra, posição da palavra, produto) onde o prefixo é procurado com
+    bisect. Acha os títulos com alguma palavra começando pelo termo (com
+    espaço, pela primeira palavra dele e depois o termo inteiro); trechos no
+    meio de palavras só a busca por trigramas do banco encontra. O custo é
+    o das palavras com o prefixo, nunca o do catálogo inteiro.
+    """
+
+    def __init__(self, produtos):
+        self.produtos = [
+            (ProdutoResumo(id=id, titulo=titulo, preco=preco), normalizar(titulo))
+            for id, titulo, preco in produtos
+        ]
+        self.palavras = sorted(
+            (palavra, posicao, indice)
+            for indice, (_, titulo) in enumerate(self.produtos)
+            for posicao, palavra in enumerate(titulo.split())
+        )
+
+    def buscar(self, termo: str, limit: int) -> list[ProdutoResumo]:
+        termo = normalizar(termo)
+        if not termo:
+            return []
+
+        # nível 0: o título começa com o termo; 1: alguma palavra começa com ele
+        primeira = termo.split(" ", 1)[0]
+        niveis: dict[int, int] = {}
+        for posicao_lista in range(bisect.bisect_left(self.palavras, (primeira,)), len(self.palavras)):
+            palavra, _, indice = self.palavras[posicao_lista]
+            if not palavra.startswith(primeira):
+                break
+            if indice in niveis:
+                continue
+            titulo = self.produtos[indice][1]
+            if titulo.startswith(termo):
+                niveis[indice] = 0
+            elif f" {termo}" in titulo:
+                niveis[indice] = 1
+
+        ordem = sorted(niveis, key=lambda i: (niveis[i], len(self.produtos[i][1]), self.produtos[i][1]))
+        return [self.produtos[i][0] for i in ordem[:limit]]
+
+
+class BuscaProdutos:
+    """Escolhe entre a busca no banco e o índice em memória e mantém este atualizado."""
+
+    def __init__(self, modo: str, ttl: float):
+        self.modo = modo
+        self.ttl = ttl
+        self._usar_banco: bool | None = None if modo == "auto" else modo == "banco"
+        self._indice: IndicePrefixos | None = None
+        self._versao = -1
+        self._construido_em = 0.0
+        self._lock = asyncio.Lock()
+        self._reconstrucao: asyncio.Task | None = None
+
+    async def _construir(self, db: AsyncSession):
+        """Lê o catálogo e monta o índice numa thread, fora do event loop."""
+        versao = cache_produtos.versao_catalogo
+        produtos = await querys_produtos_async.listar_produtos_resumidos(db)
+        self._indice = await run_in_threadpool(IndicePrefixos, produtos)
+        self._versao = versao
+        self._construido_em = time.monotonic()
+
+    async def _reconstruir(self):
+        try:
+            async with AsyncSessionLocal() as db:
+                await self._construir(db)
+        except Exception:
+            logger.exception("Falha ao reconstruir o índice de busca de produtos")
+        finally:
+            self._reconstrucao = None
+
+    async def _indice_atual(self, db: AsyncSession) -> IndicePrefixos:
+        """
+        Só a primeira busca espera o índice ser montado. Depois, um índice
+        vencido continua respondendo enquanto o novo é montado numa task.
+        """
+        if self._indice is None:
+            async with self._lock:
+                if self._indice is None:
+                    await self._construir(db)
+            return self._indice
+        expirado = time.monotonic() - self._construido_em > self.ttl
+        if (expirado or self._versao != cache_produtos.versao_catalogo) and self._reconstrucao is None:
+            self._reconstrucao = asyncio.create_task(self._reconstruir())
+        return self._indice
+
+    async def buscar(self, db: AsyncSession, termo: str, limit: int = 10) -> list[ProdutoResumo]:
+        if self._usar_banco is None:
+            self._usar_banco = await querys_produtos_async.busca_trigram_disponivel(db)
+            logger.info("Busca de produtos: %s", "índice de trigramas" if self._usar_banco else "índice em memória")
+        if self._usar_banco:
+            linhas = await querys_produtos_async.buscar_produtos_por_trecho(db, termo, limit)
+            return [ProdutoResumo.model_validate(linha, from_attributes=True) for linha in linhas]
+        indice = await self._indice_atual(db)
+        return indice.buscar(termo, limit)
+
+    def estatisticas(self) -> dict:
+        return {
+            "modo": self.modo,
+            "usando": None if self._usar_banco is None else ("banco" if self._usar_banco else "memoria"),
+            "produtos_no_indice": len(self._indice.produtos) if self._indice else 0,
+            "reconstruindo": self._reconstrucao is not None,
+        }
+
+
+busca_produtos = BuscaProdutos(BUSCA_PRODUTOS_MODO, BUSCA_INDICE_TTL)
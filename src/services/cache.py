@@ -0,0 +1,172 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Iterable
+
+from schemas.schema_produtos import Produto as ProdutoSchema
+
+# Catálogo de produtos em memória (por processo/worker)
+CACHE_PRODUTOS_MAX = int(os.getenv("CACHE_PRODUTOS_MAX", "10000"))
+CACHE_PRODUTOS_TTL = float(os.getenv("CACHE_PRODUTOS_TTL", "300"))
+# Títulos vindos do ms-produtos para os rankings (modo remote)
+CACHE_TITULOS_MAX = int(os.getenv("CACHE_TITULOS_MAX", "5000"))
+CACHE_TITULOS_TTL = float(os.getenv("CACHE_TITULOS_TTL", "300"))
+# Autenticação: tokens já verificados (valem até o exp de cada um) e o
+# funcionário de cada CPF, por pouco tempo (atualizar/deletar o removem)
+CACHE_TOKENS_MAX = int(os.getenv("CACHE_TOKENS_MAX", "10000"))
+CACHE_PRINCIPAIS_MAX = int(os.getenv("CACHE_PRINCIPAIS_MAX", "5000"))
+CACHE_PRINCIPAIS_TTL = float(os.getenv("CACHE_PRINCIPAIS_TTL", "60"))
+
+
+class CacheTTL:
+    """
+    Cache LRU em memória com tamanho máximo e validade (TTL) por entrada,
+    seguro entre threads. obter() devolve None quando a chave não está no
+    cache ou expirou, então None não deve ser guardado como valor.
+    Com max_itens=0 o cache fica desligado (tudo é miss).
+    """
+
+    def __init__(self, nome: str, max_itens: int, ttl: float):
+        self.nome = nome
+        self.max_itens = max_itens
+        self.ttl = ttl
+        self._itens: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expiracoes = 0
+        self.invalidacoes = 0
+
+    def obter(self, chave: Hashable):
+        with self._lock:
+            entrada = self._itens.get(chave)
+            if entrada is None:
+                self.misses += 1
+                return None
+            expira_em, valor = entrada
+            if expira_em <= time.monotonic():
+                del self._itens[chave]
+                self.expiracoes += 1
+                self.misses += 1
+                return None
+            self._itens.move_to_end(chave)
+            self.hits += 1
+            return valor
+
+    def espiar(self, chave: Hashable):
+        """Como obter(), mas sem contar hit/miss nem mexer na ordem do LRU."""
+        with self._lock:
+            entrada = self._itens.get(chave)
+            return entrada[1] if entrada is not None else None
+
+    def guardar(self, chave: Hashable, valor: Any):
+        if self.max_itens <= 0:
+            return
+        with self._lock:
+            self._itens[chave] = (time.monotonic() + self.ttl, valor)
+            self._itens.move_to_end(chave)
+            while len(self._itens) > self.max_itens:
+                self._itens.popitem(last=False)
+                self.evictions += 1
+
+    def remover(self, chave: Hashable):
+        with self._lock:
+            if self._itens.pop(chave, None) is not None:
+                self.invalidacoes += 1
+
+    def limpar(self):
+        with self._lock:
+            self.invalidacoes += len(self._itens)
+            self._itens.clear()
+
+    def estatisticas(self) -> dict:
+        with self._lock:
+            consultas = self.hits + self.misses
+            return {
+                "nome": self.nome,
+                "itens": len(self._itens),
+                "max_itens": self.max_itens,
+                "ttl_segundos": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "taxa_acerto": round(self.hits / consultas, 4) if consultas else None,
+                "evictions": self.evictions,
+                "expiracoes": self.expiracoes,
+                "invalidacoes": self.invalidacoes,
+            }
+
+
+class CacheProdutos:
+    """
+    Produtos indexados por id e por título. Guarda cópias (schema Produto),
+    nunca objetos ORM presos a uma sessão. É local ao processo: as escritas
+    de querys_produtos atualizam o cache deste worker, e nos demais a
+    entrada vale até o TTL.
+    """
+
+    def __init__(self, max_itens: int, ttl: float):
+        self.por_id = CacheTTL("produtos_por_id", max_itens, ttl)
+        self.por_titulo = CacheTTL("produtos_por_titulo", max_itens, ttl)
+        # muda a cada escrita no catálogo; o índice de busca em memória
+        # (services/busca_produtos.py) se reconstrói quando ela muda
+        self.versao_catalogo = 0
+
+    def catalogo_alterado(self):
+        self.versao_catalogo += 1
+
+    def obter_por_id(self, produto_id: int) -> ProdutoSchema | None:
+        return self.por_id.obter(produto_id)
+
+    def obter_por_titulo(self, titulo: str) -> ProdutoSchema | None:
+        return self.por_titulo.obter(titulo)
+
+    def guardar(self, produto) -> ProdutoSchema:
+        """Guarda (ou substitui) o produto nos dois índices; aceita o objeto ORM."""
+        copia = ProdutoSchema.model_validate(produto, from_attributes=True)
+        self.por_id.guardar(copia.id, copia)
+        self.por_titulo.guardar(copia.titulo, copia)
+        return copia
+
+    def buscar_varios(self, titulos: Iterable[str] = (), ids: Iterable[int] = ()):
+        """
+        Procura vários produtos de uma vez. Retorna (encontrados por id,
+        títulos que faltaram, ids que faltaram).
+        """
+        encontrados: dict[int, ProdutoSchema] = {}
+        faltam_titulos = []
+        for titulo in set(titulos):
+            produto = self.por_titulo.obter(titulo)
+            if produto is None:
+                faltam_titulos.append(titulo)
+            else:
+                encontrados[produto.id] = produto
+        faltam_ids = []
+        for produto_id in set(ids):
+            produto = self.por_id.obter(produto_id)
+            if produto is None:
+                faltam_ids.append(produto_id)
+            else:
+                encontrados[produto.id] = produto
+        return encontrados, faltam_titulos, faltam_ids
+
+    def invalidar(self, ids: Iterable[int] = (), titulos: Iterable[str] = ()):
+        """Remove os produtos pelos ids (e os títulos que eles ocupavam) e pelos títulos."""
+        titulos = set(titulos)
+        for produto_id in ids:
+            atual = self.por_id.espiar(produto_id)
+            if atual is not None:
+                titulos.add(atual.titulo)
+            self.por_id.remover(produto_id)
+        for titulo in titulos:
+            self.por_titulo.remover(titulo)
+        self.catalogo_alterado()
+
+    def estatisticas(self) -> dict:
+        return {"por_id": self.por_id.estatisticas(), "por_titulo": self.por_titulo.estatisticas()}
+
+
+cache_produtos = CacheProdutos(CACHE_PRODUTOS_MAX, CACHE_PRODUTOS_TTL)
+cache_titulos_produtos = CacheTTL("titulos_produtos", CACHE_TITULOS_MAX, CACHE_TITULOS_TTL)
+cache_principais = CacheTTL("principais", CACHE_PRINCIPAIS_MAX, CACHE_PRINCIPAIS_TTL)
@@ -0,0 +1,81 @@
+import hashlib
+import os
+from datetime import date, datetime
+from typing import Any, Awaitable, Callable
+from zoneinfo import ZoneInfo
+
+from fastapi import Request, Response
+from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from db import querys_resumos
+from db.querys_resumos import RELATORIOS_TIMEZONE
+from services.cache import CacheTTL
+
+# Respostas prontas (JSON + ETag) dos relatórios, por processo, na chave a
+# versão das vendas gravada no banco (tabela versao_vendas): uma escrita em
+# qualquer processo, inclusive na CLI, invalida as entradas de todos. Períodos
+# que chegam até hoje (ou sem data_fim) valem pouco; os já encerrados só mudam
+# com vendas retroativas, então ficam bem mais tempo.
+RELATORIOS_CACHE_MAX = int(os.getenv("RELATORIOS_CACHE_MAX", "1000"))
+RELATORIOS_CACHE_TTL = float(os.getenv("RELATORIOS_CACHE_TTL", "30"))
+RELATORIOS_CACHE_TTL_ENCERRADOS = float(os.getenv("RELATORIOS_CACHE_TTL_ENCERRADOS", "3600"))
+
+_TZ = ZoneInfo(RELATORIOS_TIMEZONE)
+
+cache_relatorios = CacheTTL("relatorios", RELATORIOS_CACHE_MAX, RELATORIOS_CACHE_TTL)
+cache_relatorios_encerrados = CacheTTL("relatorios_encerrados", RELATORIOS_CACHE_MAX, RELATORIOS_CACHE_TTL_ENCERRADOS)
+
+
+def _etag_confere(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidatos = [valor.strip() for valor in if_none_match.split(",")]
+    # comparação fraca (RFC 9110): W/"x" e "x" são a mesma versão
+    return "*" in candidatos or etag in (valor.removeprefix("W/") for valor in candidatos)
+
+
+async def responder_relatorio(
+    request: Request,
+    db: AsyncSession,
+    relatorio: str,
+    parametros: dict[str, Any],
+    calcular: Callable[[], Awaitable[BaseModel]],
+) -> Response:
+    """
+    Resposta do relatório a partir do cache, calculando só quando não há
+    entrada para (relatório, parâmetros já validados pela rota, versão das
+    vendas, lida do banco a cada pedido). Toda escrita em vendas muda a
+    versão; para períodos encerrados vale a versão do histórico, que só muda
+    com vendas de dias anteriores.
+    Com If-None-Match igual ao ETag, responde 304 sem corpo.
+    """
+    data_fim: date | None = parametros.get("data_fim")
+    encerrado = data_fim is not None and data_fim < datetime.now(_TZ).date()
+    cache = cache_relatorios_encerrados if encerrado else cache_relatorios
+    # a versão é lida antes do cálculo: uma escrita no meio o deixa numa chave antiga
+    geral, historico = await db.run_sync(querys_resumos.obter_versao_vendas)
+    # encerra a leitura para devolver a conexão ao pool: o cálculo (coalescido)
+    # usa uma sessão própria e não deve somar uma segunda conexão por pedido
+    await db.commit()
+    versao = historico if encerrado else geral
+    chave = (relatorio, tuple(sorted(parametros.items())), versao)
+
+    entrada = cache.obter(chave)
+    if entrada is None:
+        corpo = (await calcular()).model_dump_json().encode()
+        entrada = (f'"{hashlib.blake2b(corpo, digest_size=16).hexdigest()}"', corpo)
+        cache.guardar(chave, entrada)
+
+    etag, corpo = entrada
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if _etag_confere(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=corpo, media_type="application/json", headers=headers)
+
+
+def estatisticas() -> dict:
+    return {
+        "periodo_aberto": cache_relatorios.estatisticas(),
+        "periodo_encerrado": cache_relatorios_encerrados.estatisticas(),
+    }
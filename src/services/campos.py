@@ -0,0 +1,38 @@
+from functools import lru_cache
+from typing import Iterable, List
+
+from fastapi import HTTPException
+from pydantic import BaseModel, TypeAdapter, create_model
+
+
+def ler_campos(fields: str | None, esquema: type[BaseModel], proibidos: Iterable[str] = ()) -> tuple[str, ...] | None:
+    """
+    Interpreta o ?fields= das rotas de leitura ("id,titulo,preco"). Retorna
+    os campos na ordem do schema completo, sempre com o id, ou None quando
+    o parâmetro não veio (resposta completa). Campos desconhecidos ou
+    proibidos (ex.: senha) geram 422.
+    """
+    if fields is None:
+        return None
+    pedidos = {campo.strip() for campo in fields.split(",") if campo.strip()}
+    desconhecidos = pedidos - esquema.model_fields.keys()
+    if desconhecidos:
+        raise HTTPException(status_code=422, detail=f"Campos desconhecidos em fields: {', '.join(sorted(desconhecidos))}")
+    negados = pedidos & set(proibidos)
+    if negados:
+        raise HTTPException(status_code=422, detail=f"Campos não permitidos em fields: {', '.join(sorted(negados))}")
+    pedidos.add("id")
+    return tuple(campo for campo in esquema.model_fields if campo in pedidos)
+
+
+@lru_cache(maxsize=256)
+def adaptador_parcial(esquema: type[BaseModel], campos: tuple[str, ...], lista: bool = False) -> TypeAdapter:
+    """
+    TypeAdapter de um schema só com os campos pedidos (mesmos tipos do
+    completo), montado uma vez por combinação de campos.
+    """
+    modelo = create_model(
+        f"{esquema.__name__}Parcial",
+        **{campo: (esquema.model_fields[campo].annotation, ...) for campo in campos},
+    )
+    return TypeAdapter(List[modelo] if lista else modelo)
@@ -0,0 +1,64 @@
+from typing import Any, Dict, List
+
+from schemas.schema_vendas import ItemCarrinho, ItemVendaCreate, VendaCreate
+from services.resolvers import ResolverServicos
+
+
+class ProdutoNaoEncontrado(Exception):
+    """Um item do carrinho aponta para um produto que não existe."""
+
+
+class CatalogoCarrinho:
+    """Produtos de um ou mais carrinhos, resolvidos de uma vez e indexados por título e id."""
+
+    def __init__(self, produtos: List[Dict[str, Any]]):
+        self.por_titulo = {produto["titulo"]: produto for produto in produtos}
+        self.por_id = {produto["id"]: produto for produto in produtos}
+
+    def produto(self, linha: ItemCarrinho) -> Dict[str, Any]:
+        if linha.produto_id is not None:
+            produto = self.por_id.get(linha.produto_id)
+            referencia = f"id {linha.produto_id}"
+        else:
+            produto = self.por_titulo.get(linha.titulo)
+            referencia = f"'{linha.titulo}'"
+        if produto is None:
+            raise ProdutoNaoEncontrado(f"Produto {referencia} não encontrado no serviço de produtos")
+        return produto
+
+
+async def resolver_carrinhos(resolver: ResolverServicos, carrinhos: List[List[ItemCarrinho]]) -> CatalogoCarrinho:
+    """Resolve os produtos de todos os carrinhos em uma única busca em lote."""
+    titulos = {linha.titulo for carrinho in carrinhos for linha in carrinho if linha.produto_id is None}
+    ids = {linha.produto_id for carrinho in carrinhos for linha in carrinho if linha.produto_id is not None}
+    produtos = await resolver.buscar_produtos(titulos=list(titulos), ids=list(ids))
+    return CatalogoCarrinho(produtos)
+
+
+def montar_venda(
+    carrinho: List[ItemCarrinho],
+    catalogo: CatalogoCarrinho,
+    funcionario: Dict[str, Any],
+    **extras
+) -> VendaCreate:
+    """
+    Monta a VendaCreate com um item por linha do carrinho, ao preço atual do
+    produto. Levanta ProdutoNaoEncontrado se algum produto não existir.
+    """
+    itens = []
+    for linha in carrinho:
+        produto = catalogo.produto(linha)
+        itens.append(ItemVendaCreate(
+            produto_id=produto["id"],
+            quantidade=linha.quantidade,
+            preco_unitario=produto["preco"]
+        ))
+
+    return VendaCreate(
+        funcionario_id=funcionario["id"],
+        nome_funcionario=funcionario.get("nome", "Nome não encontrado"),
+        cpf=funcionario.get("cpf", "CPF não encontrado"),
+        cargo=funcionario.get("cargo", "Cargo não encontrado"),
+        itens=itens,
+        **extras
+    )
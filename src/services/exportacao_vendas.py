@@ -0,0 +1,73 @@
+import csv
+import io
+import json
+import os
+from datetime import date, datetime
+
+from db.connection import AsyncSessionLocal
+from db.querys_vendas import consulta_exportacao
+
+# Linhas buscadas do cursor do servidor por vez (e escritas por pedaço da resposta)
+EXPORTACAO_LOTE = int(os.getenv("EXPORTACAO_LOTE", "1000"))
+
+MEDIA_TYPES = {"csv": "text/csv; charset=utf-8", "ndjson": "application/x-ndjson"}
+
+
+def _valor_json(valor):
+    if isinstance(valor, datetime):
+        return valor.isoformat()
+    return valor
+
+
+def _formatar_csv(colunas, linhas, cabecalho: bool) -> str:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if cabecalho:
+        writer.writerow(colunas)
+    writer.writerows(
+        [valor.isoformat() if isinstance(valor, datetime) else valor for valor in linha]
+        for linha in linhas
+    )
+    return buffer.getvalue()
+
+
+def _formatar_ndjson(colunas, linhas) -> str:
+    return "".join(
+        json.dumps(
+            {coluna: _valor_json(valor) for coluna, valor in zip(colunas, linha)},
+            ensure_ascii=False
+        ) + "\n"
+        for linha in linhas
+    )
+
+
+async def exportar_vendas(
+    formato: str = "csv",
+    data_inicio: date | None = None,
+    data_fim: date | None = None,
+    por_item: bool = False
+):
+    """
+    Gera a exportação em pedaços de texto para um StreamingResponse. As linhas
+    vêm de um cursor do servidor (stream + yield_per), de EXPORTACAO_LOTE em
+    EXPORTACAO_LOTE, então a memória não cresce com o tamanho do período.
+
+    Usa uma sessão própria: a sessão da dependência get_async_db é fechada
+    antes do corpo de um StreamingResponse começar a ser enviado.
+    """
+    stmt = consulta_exportacao(data_inicio, data_fim, por_item=por_item)
+    async with AsyncSessionLocal() as db:
+        result = await db.stream(stmt.execution_options(yield_per=EXPORTACAO_LOTE))
+        colunas = list(result.keys())
+
+        cabecalho_pendente = True
+        async for linhas in result.partitions():
+            if formato == "csv":
+                yield _formatar_csv(colunas, linhas, cabecalho_pendente)
+                cabecalho_pendente = False
+            else:
+                yield _formatar_ndjson(colunas, linhas)
+
+        # período sem vendas: o CSV ainda sai com o cabeçalho
+        if formato == "csv" and cabecalho_pendente:
+            yield _formatar_csv(colunas, [], True)
@@ -0,0 +1,67 @@
+import os
+from typing import Dict
+
+import httpx
+from dotenv import load_dotenv
+
+load_dotenv()
+
+DEV_HOST = os.getenv("DEV_HOST")
+
+# Um cliente por serviço de origem, criado e fechado no lifespan da aplicação
+SERVICOS_HOSTS = {
+    "produtos": os.getenv("PRODUTOS_HOST", DEV_HOST),
+    "funcionarios": os.getenv("FUNCIONARIOS_HOST", DEV_HOST),
+    "vendas": os.getenv("VENDAS_HOST", DEV_HOST),
+}
+
+HTTP_MAX_CONEXOES = int(os.getenv("HTTP_MAX_CONEXOES", "100"))
+HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "20"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30"))
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "5"))
+HTTP_HABILITAR_HTTP2 = os.getenv("HTTP_HABILITAR_HTTP2", "true").lower() == "true"
+
+try:
+    import h2  # noqa: F401
+    HTTP2_DISPONIVEL = True
+except ImportError:
+    HTTP2_DISPONIVEL = False
+
+
+_clientes: Dict[str, httpx.AsyncClient] = {}
+
+
+def _criar_cliente(servico: str) -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        base_url=SERVICOS_HOSTS[servico] or "",
+        http2=HTTP_HABILITAR_HTTP2 and HTTP2_DISPONIVEL,
+        timeout=HTTP_TIMEOUT,
+        limits=httpx.Limits(
+            max_connections=HTTP_MAX_CONEXOES,
+            max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+            keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+        ),
+    )
+
+
+def obter_cliente(servico: str) -> httpx.AsyncClient:
+    """
+    Retorna o cliente compartilhado do serviço. Se o lifespan ainda não
+    tiver criado (ex.: uso fora da aplicação), cria sob demanda.
+    """
+    cliente = _clientes.get(servico)
+    if cliente is None or cliente.is_closed:
+        cliente = _criar_cliente(servico)
+        _clientes[servico] = cliente
+    return cliente
+
+
+async def iniciar_clientes():
+    for servico in SERVICOS_HOSTS:
+        obter_cliente(servico)
+
+
+async def fechar_clientes():
+    for cliente in _clientes.values():
+        await cliente.aclose()
+    _clientes.clear()
@@ -0,0 +1,171 @@
+import csv
+import json
+import os
+from typing import Iterable, Iterator
+
+from pydantic import ValidationError
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from db import querys_produtos
+from services.cache import cache_produtos
+from schemas.schema_produtos import ErroImportacao, ProdutoCreate, ResultadoImportacao
+
+# Linhas validadas e gravadas por bloco (um INSERT multi-linha e um commit por bloco)
+IMPORTACAO_LOTE = int(os.getenv("IMPORTACAO_LOTE", "1000"))
+
+FORMATOS = ("csv", "jsonl")
+
+
+def detectar_formato(nome_arquivo: str | None) -> str | None:
+    """Formato pela extensão do arquivo (.csv, .jsonl ou .ndjson)."""
+    if not nome_arquivo:
+        return None
+    extensao = nome_arquivo.rsplit(".", 1)[-1].lower()
+    if extensao == "csv":
+        return "csv"
+    if extensao in ("jsonl", "ndjson"):
+        return "jsonl"
+    return None
+
+
+def ler_registros(linhas: Iterable[str], formato: str) -> Iterator[tuple[int, dict | None, str | None]]:
+    """
+    Lê o arquivo linha a linha e gera (numero_linha, registro, erro). O número
+    é a linha do arquivo (no CSV o cabeçalho é a linha 1); registro vem None
+    quando a linha não pôde ser lida.
+    """
+    if formato == "csv":
+        leitor = csv.DictReader(linhas)
+        for registro in leitor:
+            # campos vazios do CSV contam como ausentes
+            yield leitor.line_num, {chave: valor for chave, valor in registro.items() if valor not in ("", None)}, None
+        return
+
+    for numero, linha in enumerate(linhas, start=1):
+        if not linha.strip():
+            continue
+        try:
+            registro = json.loads(linha)
+        except ValueError as e:
+            yield numero, None, f"JSON inválido: {e}"
+            continue
+        if not isinstance(registro, dict):
+            yield numero, None, "Cada linha deve ser um objeto JSON"
+            continue
+        yield numero, registro, None
+
+
+def _mensagem_banco(erro: SQLAlchemyError) -> str:
+    """Primeira linha da mensagem do banco (ex.: "value too long for type character varying(100)")."""
+    original = getattr(erro, "orig", None) or erro
+    return (str(original).strip().splitlines() or [erro.__class__.__name__])[0]
+
+
+def _gravar_linha_a_linha(
+    db: Session,
+    operacoes: list[tuple[int, ProdutoCreate, dict | None, list[dict]]],
+    resultado: ResultadoImportacao
+):
+    """
+    Depois de um bloco recusado pelo banco: grava cada linha no seu próprio
+    SAVEPOINT, para que só as linhas com problema entrem em "erros", com a
+    mensagem do banco, e as demais sejam gravadas.
+    """
+    for numero, produto, novo, alteracoes in operacoes:
+        try:
+            with db.begin_nested():
+                querys_produtos.inserir_produtos_lote(db, [novo] if novo else [])
+                querys_produtos.atualizar_produtos_lote(db, alteracoes)
+        except SQLAlchemyError as e:
+            resultado.erros.append(ErroImportacao(linha=numero, titulo=produto.titulo, erro=f"Erro ao gravar: {_mensagem_banco(e)}"))
+            continue
+        resultado.inseridos += 1 if novo else 0
+        resultado.atualizados += len(alteracoes)
+    db.commit()
+
+
+def _gravar_bloco(
+    db: Session,
+    bloco: list[tuple[int, ProdutoCreate]],
+    atualizar: bool,
+    resultado: ResultadoImportacao
+):
+    existentes = querys_produtos.obter_ids_por_titulos(db, [produto.titulo for _, produto in bloco])
+
+    # (linha, produto, dados do INSERT ou None, UPDATEs) de cada linha a gravar
+    operacoes: list[tuple[int, ProdutoCreate, dict | None, list[dict]]] = []
+    for numero, produto in bloco:
+        dados = produto.model_dump()
+        if produto.titulo not in existentes:
+            operacoes.append((numero, produto, dados, []))
+        elif atualizar:
+            operacoes.append((numero, produto, None, [{"id": produto_id, **dados} for produto_id in existentes[produto.titulo]]))
+        else:
+            resultado.ignorados += 1
+    novos = [novo for _, _, novo, _ in operacoes if novo]
+    alteracoes = [alteracao for _, _, _, alteracoes_linha in operacoes for alteracao in alteracoes_linha]
+
+    try:
+        querys_produtos.inserir_produtos_lote(db, novos)
+        querys_produtos.atualizar_produtos_lote(db, alteracoes)
+        db.commit()
+    except SQLAlchemyError:
+        db.rollback()
+        _gravar_linha_a_linha(db, operacoes, resultado)
+    else:
+        resultado.inseridos += len(novos)
+        resultado.atualizados += len(alteracoes)
+
+    # os títulos atualizados (ou que passaram a existir) saem do cache deste processo
+    cache_produtos.invalidar(
+        ids=[alteracao["id"] for alteracao in alteracoes],
+        titulos=[produto.titulo for _, produto in bloco]
+    )
+
+
+def importar_produtos(
+    db: Session,
+    registros: Iterable[tuple[int, dict | None, str | None]],
+    atualizar: bool = False
+) -> ResultadoImportacao:
+    """
+    Valida os registros com ProdutoCreate e grava em blocos de IMPORTACAO_LOTE
+    linhas, com um commit por bloco. Títulos que ainda não existem são
+    inseridos; os que já existem são atualizados (atualizar=True) ou
+    ignorados. Linhas inválidas, títulos repetidos no arquivo e linhas que o
+    banco recusar (um bloco que falha é regravado linha a linha) entram em
+    "erros" sem interromper o restante.
+    """
+    resultado = ResultadoImportacao()
+    bloco: list[tuple[int, ProdutoCreate]] = []
+    titulos_vistos: set[str] = set()
+
+    for numero, registro, erro in registros:
+        resultado.total_linhas += 1
+        if erro is not None:
+            resultado.erros.append(ErroImportacao(linha=numero, erro=erro))
+            continue
+        try:
+            produto = ProdutoCreate.model_validate(registro)
+        except ValidationError as e:
+            resultado.erros.append(ErroImportacao(
+                linha=numero, titulo=registro.get("titulo"), erro=str(e.errors(include_url=False))
+            ))
+            continue
+        # o mesmo título duas vezes no arquivo viraria dois cadastros (ou duas atualizações)
+        if produto.titulo in titulos_vistos:
+            resultado.erros.append(ErroImportacao(
+                linha=numero, titulo=produto.titulo, erro="Título repetido no arquivo"
+            ))
+            continue
+
+        bloco.append((numero, produto))
+        titulos_vistos.add(produto.titulo)
+        if len(bloco) >= IMPORTACAO_LOTE:
+            _gravar_bloco(db, bloco, atualizar, resultado)
+            bloco = []
+
+    if bloco:
+        _gravar_bloco(db, bloco, atualizar, resultado)
+    return resultado
@@ -0,0 +1,150 @@
+import asyncio
+import os
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List
+
+import httpx
+from fastapi import Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from db.dependeces import get_async_db
+from db import querys_produtos_async, querys_funcionario_async
+from schemas.schema_lote import LOTE_MAX_IDS
+from schemas.schema_vendas import Produto, Funcionario
+from services.http_clients import obter_cliente
+
+# "local": chama as querys direto na sessão do banco (tudo no mesmo processo)
+# "remote": mantém as chamadas HTTP para quando os serviços rodam separados
+RESOLVER_SERVICOS = os.getenv("RESOLVER_SERVICOS", "local")
+
+
+class ResolverServicos(ABC):
+    """
+    Interface comum usada pelas rotas para buscar produtos e funcionários.
+    Os métodos retornam dicionários no mesmo formato
+    do JSON das rotas, ou None quando o registro não existe. Uma subclasse
+    que não implemente todos eles falha já ao ser instanciada.
+    """
+
+    @abstractmethod
+    async def buscar_produto_por_titulo(self, titulo: str) -> Dict[str, Any] | None:
+        ...
+
+    @abstractmethod
+    async def buscar_funcionario(self, id_funcionario: int) -> Dict[str, Any] | None:
+        ...
+
+    @abstractmethod
+    async def buscar_produtos(
+        self, titulos: List[str] | None = None, ids: List[int] | None = None
+    ) -> List[Dict[str, Any]]:
+        """Busca em lote por títulos e/ou ids; os que não existem ficam de fora."""
+
+    @abstractmethod
+    async def buscar_funcionarios(self, ids: List[int]) -> List[Dict[str, Any]]:
+        """Busca em lote por ids; os que não existem ficam de fora."""
+
+
+class ResolverLocal(ResolverServicos):
+    """Resolve tudo no próprio processo, usando a sessão da requisição."""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        # uma AsyncSession não aceita operações concorrentes: buscas disparadas
+        # em paralelo (asyncio.gather) são serializadas aqui
+        self._lock = asyncio.Lock()
+
+    async def buscar_produto_por_titulo(self, titulo: str):
+        produtos = await self.buscar_produtos(titulos=[titulo])
+        return produtos[0] if produtos else None
+
+    async def buscar_funcionario(self, id_funcionario: int):
+        # sem os endereços: o resolver só devolve id, nome, cpf e cargo
+        funcionarios = await self.buscar_funcionarios([id_funcionario])
+        return funcionarios[0] if funcionarios else None
+
+    async def buscar_produtos(self, titulos=None, ids=None):
+        # catálogo em cache: no caso comum a busca nem chega ao banco
+        async with self._lock:
+            produtos = await querys_produtos_async.obter_produtos_com_cache(self.db, titulos or [], ids or [])
+        return [Produto.model_validate(produto).model_dump(mode="json") for produto in produtos]
+
+    async def buscar_funcionarios(self, ids):
+        async with self._lock:
+            funcionarios = await querys_funcionario_async.obter_funcionarios_por_ids(self.db, ids)
+        return [Funcionario.model_validate(funcionario).model_dump(mode="json") for funcionario in funcionarios]
+
+
+class ResolverRemoto(ResolverServicos):
+    """
+    Resolve via HTTP nos microserviços configurados, usando os clientes
+    compartilhados de services.http_clients (conexões reaproveitadas).
+    """
+
+    async def _get(self, servico: str, url: str, params: Dict[str, Any] | None = None):
+        try:
+            response = await obter_cliente(servico).get(url, params=params)
+        except httpx.RequestError as exc:
+            raise HTTPException(status_code=503, detail=f"Erro ao contactar serviço de {servico}: {exc}")
+        if response.status_code == 404:
+            return None
+        try:
+            response.raise_for_status()
+        except httpx.HTTPStatusError as exc:
+            raise HTTPException(status_code=exc.response.status_code, detail=f"Serviço de {servico} retornou erro: {exc.response.text}")
+        return response.json()
+
+    async def buscar_produto_por_titulo(self, titulo: str):
+        return await self._get("produtos", f"/api/v1/produtos/{titulo}")
+
+    async def buscar_funcionario(self, id_funcionario: int):
+        return await self._get("funcionarios", f"/api/v1/funcionarios/{id_funcionario}")
+
+    async def _post(self, servico: str, url: str, corpo: Dict[str, Any]):
+        try:
+            response = await obter_cliente(servico).post(url, json=corpo)
+            response.raise_for_status()
+        except httpx.RequestError as exc:
+            raise HTTPException(status_code=503, detail=f"Erro ao contactar serviço de {servico}: {exc}")
+        except httpx.HTTPStatusError as exc:
+            raise HTTPException(status_code=exc.response.status_code, detail=f"Serviço de {servico} retornou erro: {exc.response.text}")
+        return response.json()
+
+    async def _buscar_lote(self, servico: str, chave: str, ids) -> List[Dict[str, Any]]:
+        """POST /<servico>/lote em blocos de LOTE_MAX_IDS ids, os blocos em paralelo."""
+        ids = list(set(ids))
+        blocos = [ids[i:i + LOTE_MAX_IDS] for i in range(0, len(ids), LOTE_MAX_IDS)]
+        respostas = await asyncio.gather(*(
+            self._post(servico, f"/api/v1/{servico}/lote", {"ids": bloco}) for bloco in blocos
+        ))
+        return [registro for resposta in respostas for registro in resposta[chave]]
+
+    # Títulos não têm rota em lote: saem em paralelo pelo cliente compartilhado
+    # (limitados pelo pool de conexões dele); os ids vão em POST /produtos/lote
+    async def buscar_produtos(self, titulos=None, ids=None):
+        buscas = [self.buscar_produto_por_titulo(titulo) for titulo in set(titulos or [])]
+        if ids:
+            buscas.append(self._buscar_lote("produtos", "produtos", ids))
+        encontrados = []
+        for resultado in await asyncio.gather(*buscas):
+            if isinstance(resultado, list):
+                encontrados += resultado
+            elif resultado is not None:
+                encontrados.append(resultado)
+        return list({produto["id"]: produto for produto in encontrados}.values())
+
+    async def buscar_funcionarios(self, ids):
+        if not ids:
+            return []
+        return await self._buscar_lote("funcionarios", "funcionarios", ids)
+
+
+def criar_resolver(db: AsyncSession) -> ResolverServicos:
+    """Cria o resolver conforme a variável RESOLVER_SERVICOS."""
+    if RESOLVER_SERVICOS == "remote":
+        return ResolverRemoto()
+    return ResolverLocal(db)
+
+
+def get_resolver(db: AsyncSession = Depends(get_async_db)) -> ResolverServicos:
+    return criar_resolver(db)
@@ -1,16 +1,23 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from zoneinfo import ZoneInfo
 from pwdlib import PasswordHash
+from pwdlib.hashers.argon2 import Argon2Hasher
 from datetime import datetime, timedelta
 from datetime import datetime, timedelta, timezone
 from jose import JWTError
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import Depends,HTTPException, status
 from http import HTTPStatus
-from jwt import encode, decode, DecodeError
+from jwt import encode, decode, InvalidTokenError
 from fastapi.security import OAuth2PasswordBearer
 from http import HTTPStatus
 from pydantic import BaseModel, ConfigDict
 from db.dependeces import get_db  as get_session
+from db.connection import AsyncSessionLocal
+from services.cache import CACHE_TOKENS_MAX, CacheTTL, cache_principais
 
 
 import os
@@ -24,6 +31,18 @@ SECRETY_KEY = os.getenv("SECRETY_KEY", "FSDFSDFSDFSDFSDSDS.ASDASDASDASD")
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "10080"))  # 7 dias
 
+# Parâmetros do Argon2 (os padrões são os do PasswordHash.recommended()).
+# Ao mudar, as senhas antigas continuam válidas e são refeitas no próximo login.
+ARGON2_TIME_COST = int(os.getenv("ARGON2_TIME_COST", "3"))
+ARGON2_MEMORY_COST = int(os.getenv("ARGON2_MEMORY_COST", "65536"))  # KiB
+ARGON2_PARALLELISM = int(os.getenv("ARGON2_PARALLELISM", "4"))
+
+# Pool exclusivo para hash/verificação de senha (o argon2 libera o GIL), para
+# uma rajada de logins não ocupar o threadpool das rotas. Com HASH_FILA_MAX
+# operações pendentes (rodando + esperando), as novas recebem 503 na hora.
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+HASH_FILA_MAX = int(os.getenv("HASH_FILA_MAX", str(HASH_WORKERS * 8)))
+
 class FuncionarioTokken(BaseModel):
     id: int
     nome: str
@@ -34,11 +53,22 @@ class FuncionarioTokken(BaseModel):
 
 
 
-pwd_context = PasswordHash.recommended()
+pwd_context = PasswordHash((
+    Argon2Hasher(time_cost=ARGON2_TIME_COST, memory_cost=ARGON2_MEMORY_COST, parallelism=ARGON2_PARALLELISM),
+))
+
+_executor_hash = ThreadPoolExecutor(max_workers=HASH_WORKERS, thread_name_prefix="hash-senha")
+_vagas_hash = threading.BoundedSemaphore(HASH_FILA_MAX)
+_hash_pendentes = 0
+_hash_rejeitados = 0
+_trava_hash = threading.Lock()
 
 
 auth2_scheme = OAuth2PasswordBearer(tokenUrl="funcionarios/auth/")
 
+# token -> (cpf, exp); a validade de cada entrada é conferida pelo exp do próprio token
+cache_tokens = CacheTTL("tokens", CACHE_TOKENS_MAX, ACCESS_TOKEN_EXPIRE_MINUTES * 60)
+
 def get_password_hash(password: str):
     """Retorna o hash da senha do usuário.
     Args:
@@ -62,6 +92,65 @@ def verify_password(plain_password: str, hashed_password: str):
 
 
 
+def _hash_concluido(_futuro=None):
+    """Libera a vaga quando o job termina de fato (ou é cancelado antes de começar)."""
+    global _hash_pendentes
+    with _trava_hash:
+        _hash_pendentes -= 1
+    _vagas_hash.release()
+
+
+async def _executar_hash(funcao, *args):
+    """
+    Roda funcao no pool de hash; sem vaga na fila, responde 503 sem esperar.
+    A vaga só volta quando o job do executor termina: se a requisição for
+    cancelada com o Argon2 já rodando, ele continua ocupando a vaga.
+    """
+    global _hash_pendentes, _hash_rejeitados
+    if not _vagas_hash.acquire(blocking=False):
+        with _trava_hash:
+            _hash_rejeitados += 1
+        raise HTTPException(
+            status_code=HTTPStatus.SERVICE_UNAVAILABLE,
+            detail="Serviço de autenticação sobrecarregado, tente novamente",
+            headers={"Retry-After": "1"},
+        )
+    with _trava_hash:
+        _hash_pendentes += 1
+    try:
+        futuro = _executor_hash.submit(funcao, *args)
+    except BaseException:
+        _hash_concluido()
+        raise
+    futuro.add_done_callback(_hash_concluido)
+    return await asyncio.wrap_future(futuro)
+
+
+async def hash_senha(password: str) -> str:
+    """get_password_hash fora do event loop, no pool de hash."""
+    return await _executar_hash(get_password_hash, password)
+
+
+async def verificar_senha(plain_password: str, hashed_password: str) -> tuple[bool, str | None]:
+    """Verifica a senha no pool de hash. Retorna (confere, novo hash), com o
+    novo hash preenchido quando o atual foi feito com outros parâmetros."""
+    return await _executar_hash(pwd_context.verify_and_update, plain_password, hashed_password)
+
+
+def estado_pool_hash() -> dict:
+    return {
+        "workers": HASH_WORKERS,
+        "fila_max": HASH_FILA_MAX,
+        "pendentes": _hash_pendentes,
+        "rejeitados": _hash_rejeitados,
+        "argon2": {"time_cost": ARGON2_TIME_COST, "memory_cost": ARGON2_MEMORY_COST, "parallelism": ARGON2_PARALLELISM},
+    }
+
+
+def fechar_pool_hash():
+    _executor_hash.shutdown(wait=False, cancel_futures=True)
+
+
 def create_access_token(data_payload: dict):
     """Cria um token de acesso para o usuário.
     Args:
@@ -85,33 +174,77 @@ def verify_access_token(token: str, credentials_exception):
     """Verifica se o token de acesso é válido.
     Args:
         token (str): token de acesso.
-        credentials_exception: exceção a ser levantada em caso de falha na verificação.
+        credentials_exception: exceção a ser levantada em caso de falha na verificação
+            (assinatura inválida, token expirado ou sem 'sub').
     Returns:
-        TokenData: dados do usuário extraídos do token.
+        tuple[str, float]: CPF do funcionário ('sub') e expiração do token (timestamp).
     """
     try:
         payload = decode(token, SECRETY_KEY, algorithms=[ALGORITHM])
-        cpf: str = payload.get("sub")
-        if cpf is None:
-            raise credentials_exception
-        token_data = FuncionarioTokken(cpf=cpf)
-    except (JWTError, DecodeError):
+    except (JWTError, InvalidTokenError):
+        raise credentials_exception
+    cpf: str = payload.get("sub")
+    if cpf is None or "exp" not in payload:
         raise credentials_exception
-    return token_data
+    return cpf, float(payload["exp"])
+
+
+async def get_current_funcionario(token: str = Depends(auth2_scheme)) -> FuncionarioTokken:
+    """Dependência das rotas protegidas: o funcionário dono do bearer token.
 
+    O token verificado fica em cache até expirar e o funcionário (id, nome,
+    cpf, cargo) por CACHE_PRINCIPAIS_TTL segundos, então no caso comum a
+    requisição autenticada não vai ao banco nem refaz a verificação do JWT.
+    """
+    credentials_exception = HTTPException(
+        status_code=HTTPStatus.UNAUTHORIZED,
+        detail="Credenciais inválidas",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+    verificado = cache_tokens.obter(token)
+    if verificado is None or verificado[1] <= datetime.now(tz=timezone.utc).timestamp():
+        cpf, exp = verify_access_token(token, credentials_exception)
+        cache_tokens.guardar(token, (cpf, exp))
+    else:
+        cpf = verificado[0]
+
+    funcionario = cache_principais.obter(cpf)
+    if funcionario is None:
+        async with AsyncSessionLocal() as db:
+            resultado = await db.execute(
+                select(Funcionarios.id, Funcionarios.nome, Funcionarios.cpf, Funcionarios.cargo)
+                .where(Funcionarios.cpf == cpf)
+            )
+            linha = resultado.first()
+        if linha is None:
+            # funcionário removido depois de emitir o token
+            raise credentials_exception
+        funcionario = FuncionarioTokken.model_validate(linha)
+        cache_principais.guardar(cpf, funcionario)
+    return funcionario
 
-def authenticate_user(db: Session, cpf: str, password: str):
+
+async def authenticate_user(db: AsyncSession, cpf: str, password: str):
     """Autentica o usuário verificando CPF e Senha."""
     
     # 1. Busca o funcionário pelo CPF na tabela Funcionarios
-    funcionario = db.query(Funcionarios).filter(Funcionarios.cpf == cpf).first()
+    resultado = await db.execute(select(Funcionarios).where(Funcionarios.cpf == cpf))
+    funcionario = resultado.scalars().first()
     
     # 2. Verifica se o funcionário existe e se a senha está correta
-    if not funcionario or not verify_password(password, funcionario.senha):
+    #    (o Argon2 é CPU pesado: roda no pool de hash, fora do event loop)
+    confere, novo_hash = (await verificar_senha(password, funcionario.senha)) if funcionario else (False, None)
+    if not confere:
         raise HTTPException(
             status_code=HTTPStatus.UNAUTHORIZED,
             detail="CPF ou senha inválidos",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    
+
+    # 3. Hash feito com parâmetros antigos do Argon2: grava o refeito
+    if novo_hash:
+        funcionario.senha = novo_hash
+        await db.commit()
+
     return funcionario
\ No newline at end of file
@@ -0,0 +1,16 @@
+from typing import Any
+
+from fastapi import Response
+from pydantic import TypeAdapter
+
+
+def resposta_json(adapter: TypeAdapter, dados: Any, status_code: int = 200) -> Response:
+    """
+    Caminho rápido das listagens: valida as linhas do banco (objetos ORM,
+    Row ou dicts) uma única vez com um TypeAdapter já montado e serializa
+    direto para bytes no pydantic-core. O Response sai pronto, sem passar
+    pela revalidação do response_model, pelo jsonable_encoder e pelo json
+    do FastAPI. O response_model da rota continua valendo para o OpenAPI.
+    """
+    validados = adapter.validate_python(dados, from_attributes=True)
+    return Response(content=adapter.dump_json(validados), status_code=status_code, media_type="application/json")
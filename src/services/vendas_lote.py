@@ -0,0 +1,173 @@
+import asyncio
+import logging
+import os
+import zlib
+from typing import AsyncIterator
+
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from db import querys_vendas_async
+from schemas.schema_vendas import ResultadoLinhaLote, ResultadoLote, VendaCreate, VendaLoteLinha
+from services.carrinho import ProdutoNaoEncontrado, montar_venda, resolver_carrinhos
+from services.resolvers import ResolverServicos
+
+# Linhas gravadas por bloco (um INSERT multi-linha e um commit por bloco)
+VENDAS_LOTE_TAMANHO = int(os.getenv("VENDAS_LOTE_TAMANHO", "500"))
+
+logger = logging.getLogger(__name__)
+
+
+async def ler_linhas_ndjson(
+    corpo: AsyncIterator[bytes], gzip: bool = False
+) -> AsyncIterator[tuple[int, bytes]]:
+    """
+    Quebra o corpo da requisição em linhas (numeradas a partir de 1) à medida
+    que ele chega, descompactando o gzip aos pedaços. Linhas em branco são
+    puladas. Levanta zlib.error se o gzip for inválido.
+    """
+    descompactador = zlib.decompressobj(wbits=31) if gzip else None
+    numero = 0
+    resto = b""
+
+    async for pedaco in corpo:
+        if descompactador is not None:
+            pedaco = descompactador.decompress(pedaco)
+        *linhas, resto = (resto + pedaco).split(b"\n")
+        for linha in linhas:
+            numero += 1
+            if linha.strip():
+                yield numero, linha
+
+    if descompactador is not None:
+        resto += descompactador.flush()
+    for linha in resto.split(b"\n"):
+        numero += 1
+        if linha.strip():
+            yield numero, linha
+
+
+def _erro(numero: int, mensagem: str, chave: str | None = None) -> ResultadoLinhaLote:
+    return ResultadoLinhaLote(linha=numero, chave_idempotencia=chave, status="erro", erro=mensagem)
+
+
+async def _processar_bloco(
+    db: AsyncSession, resolver: ResolverServicos, bloco: list[tuple[int, bytes]]
+) -> list[ResultadoLinhaLote]:
+    resultados: dict[int, ResultadoLinhaLote] = {}
+
+    # 1. Validação de cada linha
+    validas: list[tuple[int, VendaLoteLinha]] = []
+    for numero, bruto in bloco:
+        try:
+            validas.append((numero, VendaLoteLinha.model_validate_json(bruto)))
+        except ValidationError as e:
+            resultados[numero] = _erro(numero, f"Linha inválida: {e.errors(include_url=False)}")
+
+    # 2. Chaves já gravadas (reenvio) ou repetidas dentro do bloco
+    existentes = await querys_vendas_async.obter_ids_por_chave(
+        db, [linha.chave_idempotencia for _, linha in validas]
+    )
+    pendentes: list[tuple[int, VendaLoteLinha]] = []
+    vistas: set[str] = set()
+    for numero, linha in validas:
+        chave = linha.chave_idempotencia
+        if chave in existentes:
+            resultados[numero] = ResultadoLinhaLote(
+                linha=numero, chave_idempotencia=chave, status="duplicada", venda_id=existentes[chave]
+            )
+        elif chave in vistas:
+            resultados[numero] = _erro(numero, "Chave de idempotência repetida no mesmo lote", chave)
+        else:
+            vistas.add(chave)
+            pendentes.append((numero, linha))
+
+    # 3. Produtos e funcionários do bloco inteiro em uma busca de cada
+    vendas: list[tuple[int, VendaCreate]] = []
+    if pendentes:
+        carrinhos = {numero: linha.linhas_carrinho() for numero, linha in pendentes}
+        catalogo, funcionarios = await asyncio.gather(
+            resolver_carrinhos(resolver, list(carrinhos.values())),
+            resolver.buscar_funcionarios([linha.id_funcionario for _, linha in pendentes]),
+        )
+        funcionarios_por_id = {funcionario["id"]: funcionario for funcionario in funcionarios}
+
+    # 4. Monta as vendas; linhas com produto/funcionário inexistente viram erro
+    for numero, linha in pendentes:
+        funcionario = funcionarios_por_id.get(linha.id_funcionario)
+        if funcionario is None:
+            resultados[numero] = _erro(numero, "Funcionário não encontrado no serviço de funcionários", linha.chave_idempotencia)
+            continue
+        try:
+            vendas.append((numero, montar_venda(
+                carrinhos[numero], catalogo, funcionario,
+                data_venda=linha.data_venda,
+                chave_idempotencia=linha.chave_idempotencia,
+            )))
+        except ProdutoNaoEncontrado as e:
+            resultados[numero] = _erro(numero, str(e), linha.chave_idempotencia)
+
+    # 5. Grava o bloco (um commit); uma chave gravada por outra requisição
+    # entre o passo 2 e aqui não é inserida e volta como duplicada. Qualquer
+    # falha fica só neste bloco: as linhas dele viram erro e os próximos seguem
+    if vendas:
+        try:
+            criadas = await querys_vendas_async.inserir_vendas_lote(db, [venda for _, venda in vendas])
+        except Exception as e:
+            logger.exception("Falha ao gravar bloco de %d vendas do lote", len(vendas))
+            await db.rollback()
+            for numero, venda in vendas:
+                resultados[numero] = _erro(numero, f"Erro ao gravar o bloco: {e.__class__.__name__}", venda.chave_idempotencia)
+        else:
+            try:
+                concorrentes = await querys_vendas_async.obter_ids_por_chave(
+                    db, [venda.chave_idempotencia for _, venda in vendas if venda.chave_idempotencia not in criadas]
+                )
+            except Exception:
+                # o bloco já foi confirmado; só fica sem o id das duplicadas
+                logger.exception("Falha ao buscar os ids das vendas duplicadas do lote")
+                await db.rollback()
+                concorrentes = {}
+            for numero, venda in vendas:
+                chave = venda.chave_idempotencia
+                if chave in criadas:
+                    resultados[numero] = ResultadoLinhaLote(
+                        linha=numero, chave_idempotencia=chave, status="criada", venda_id=criadas[chave]
+                    )
+                else:
+                    resultados[numero] = ResultadoLinhaLote(
+                        linha=numero, chave_idempotencia=chave, status="duplicada", venda_id=concorrentes.get(chave)
+                    )
+
+    return [resultados[numero] for numero, _ in bloco]
+
+
+async def ingerir_vendas(
+    db: AsyncSession, resolver: ResolverServicos, linhas: AsyncIterator[tuple[int, bytes]]
+) -> ResultadoLote:
+    """
+    Processa o NDJSON em blocos de VENDAS_LOTE_TAMANHO linhas, sem carregar
+    o corpo inteiro. Cada bloco é gravado e confirmado antes do próximo, então
+    um lote interrompido pode ser reenviado: as chaves já gravadas voltam
+    como "duplicada".
+    """
+    resultados: list[ResultadoLinhaLote] = []
+    bloco: list[tuple[int, bytes]] = []
+    async for numero, linha in linhas:
+        bloco.append((numero, linha))
+        if len(bloco) >= VENDAS_LOTE_TAMANHO:
+            resultados += await _processar_bloco(db, resolver, bloco)
+            bloco = []
+    if bloco:
+        resultados += await _processar_bloco(db, resolver, bloco)
+
+    contagem = {"criada": 0, "duplicada": 0, "erro": 0}
+    for resultado in resultados:
+        contagem[resultado.status] += 1
+    return ResultadoLote(
+        total_linhas=len(resultados),
+        criadas=contagem["criada"],
+        duplicadas=contagem["duplicada"],
+        erros=contagem["erro"],
+        resultados=resultados,
+    )
@@ -1,123 +1,198 @@
+import asyncio
+import functools
+import inspect
+import logging
 import os
 
-import httpx
-from datetime import date
-from typing import Optional, Dict, Any, Literal, cast
-from collections import defaultdict
+from datetime import date, timedelta
+from typing import Any, Awaitable, Callable, Hashable, Optional, Literal, cast
 from fastapi import HTTPException
-from functools import lru_cache
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from db import querys_relatorios
+from db.connection import AsyncSessionLocal
 from schemas import schemas_relatorios as schemas  # Importa os nossos schemas de relatório
+from services.cache import cache_titulos_produtos
+from services.resolvers import RESOLVER_SERVICOS, ResolverRemoto
 
-# URL base da API do ms-vendas (deve apontar diretamente para o microserviço de vendas)
-MS_VENDAS_URL = f"{os.getenv('DEV_HOST')}/api/v1/vendas/"
-MS_PRODUTOS_URL = f"{os.getenv('DEV_HOST')}/api/v1/produtos/"
-MS_FUNCIONARIOS_URL = f"{os.getenv('DEV_HOST')}/api/v1/funcionarios/"
+logger = logging.getLogger(__name__)
+
+# Busca dos títulos no ms-produtos (modo remote): ids por requisição em lote
+# e quantos lotes podem estar em andamento ao mesmo tempo
+TITULOS_LOTE = int(os.getenv("TITULOS_LOTE", "50"))
+TITULOS_CONCORRENCIA = int(os.getenv("TITULOS_CONCORRENCIA", "4"))
+
+# Relatórios idênticos pedidos ao mesmo tempo (vários tablets abrindo o
+# dashboard) são calculados uma vez só e o resultado é dividido entre eles
+RELATORIOS_COALESCER = os.getenv("RELATORIOS_COALESCER", "true").lower() == "true"
+
+
+class Coalescedor:
+    """
+    Single-flight: enquanto um cálculo de uma chave está em andamento, quem
+    pedir a mesma chave espera por ele em vez de começar outro. O cálculo
+    roda numa task própria; cada chamador espera através de asyncio.shield,
+    então o cancelamento de um (cliente que desconectou) não interrompe o
+    cálculo dos outros. Quando o último que esperava desiste, o cálculo é
+    cancelado e devolve a conexão. Erros chegam a todos os que esperavam.
+    """
+
+    def __init__(self):
+        self._em_andamento: dict[Hashable, asyncio.Task] = {}
+        self._esperando: dict[asyncio.Task, int] = {}
+        self.execucoes = 0
+        self.coalescidas = 0
+        self.canceladas = 0
+
+    async def executar(self, chave: Hashable, calcular: Callable[[], Awaitable[Any]]):
+        tarefa = self._em_andamento.get(chave)
+        if tarefa is None:
+            self.execucoes += 1
+            tarefa = asyncio.create_task(calcular())
+            self._em_andamento[chave] = tarefa
+            tarefa.add_done_callback(functools.partial(self._concluida, chave))
+        else:
+            self.coalescidas += 1
+        self._esperando[tarefa] = self._esperando.get(tarefa, 0) + 1
+        try:
+            return await asyncio.shield(tarefa)
+        finally:
+            self._esperando[tarefa] -= 1
+            if not self._esperando[tarefa]:
+                del self._esperando[tarefa]
+                if not tarefa.done():
+                    # ninguém mais espera: cancela e tira da vez, para que um
+                    # pedido novo comece outro cálculo em vez de herdar o cancelado
+                    self.canceladas += 1
+                    tarefa.cancel()
+                    if self._em_andamento.get(chave) is tarefa:
+                        del self._em_andamento[chave]
+
+    def _concluida(self, chave: Hashable, tarefa: asyncio.Task):
+        if self._em_andamento.get(chave) is tarefa:
+            del self._em_andamento[chave]
+        # se todos desistiram, ninguém leu o erro: lê aqui para o asyncio não reclamar
+        if not tarefa.cancelled():
+            tarefa.exception()
+
+    def estatisticas(self) -> dict:
+        pedidos = self.execucoes + self.coalescidas
+        return {
+            "habilitado": RELATORIOS_COALESCER,
+            "pedidos": pedidos,
+            "execucoes": self.execucoes,
+            "coalescidas": self.coalescidas,
+            "canceladas": self.canceladas,
+            "taxa_coalescencia": round(self.coalescidas / pedidos, 4) if pedidos else None,
+            "em_andamento": len(self._em_andamento),
+        }
+
+
+coalescedor = Coalescedor()
+
+
+def _coalescido(funcao):
+    """
+    Passa o relatório pelo coalescedor, com chave = nome + parâmetros (sem o
+    db). O cálculo compartilhado usa uma sessão própria, e não a do chamador
+    que o iniciou, porque ela fecha quando esse chamador termina ou desiste.
+    A sessão do chamador não fica com conexão durante a espera
+    (responder_relatorio encerra a leitura da versão antes), então cada
+    cálculo em andamento ocupa uma conexão só, por mais pedidos que espere.
+    """
+    assinatura = inspect.signature(funcao)
+
+    @functools.wraps(funcao)
+    async def executar(db: AsyncSession, *args, **kwargs):
+        if not RELATORIOS_COALESCER:
+            return await funcao(db, *args, **kwargs)
+        argumentos = assinatura.bind(db, *args, **kwargs)
+        argumentos.apply_defaults()
+        parametros = {nome: valor for nome, valor in argumentos.arguments.items() if nome != "db"}
+
+        async def calcular():
+            async with AsyncSessionLocal() as sessao:
+                return await funcao(sessao, **parametros)
+
+        return await coalescedor.executar((funcao.__name__, tuple(sorted(parametros.items()))), calcular)
+
+    return executar
 
 
 # ============================================================
 #  RELATÓRIO: SUMÁRIO DE VENDAS
 # ============================================================
+@_coalescido
 async def obter_sumario_vendas_periodo(
+    db: AsyncSession,
     data_inicio: Optional[date] = None,
     data_fim: Optional[date] = None
 ) -> schemas.RelatorioVendasSumario:
     """
-    Busca as estatísticas de vendas do ms-vendas para um determinado período.
+    Busca as estatísticas de vendas para um determinado período.
     """
-    params = {}
-    if data_inicio:
-        params["data_inicio"] = data_inicio.isoformat()
-    if data_fim:
-        params["data_fim"] = data_fim.isoformat()
+    stats = await db.run_sync(querys_relatorios.sumario_vendas, data_inicio, data_fim)
+
+    relatorio = schemas.RelatorioVendasSumario(
+        periodo_inicio=data_inicio,
+        periodo_fim=data_fim,
+        total_vendas=int(stats.total_vendas),
+        valor_total_vendido=round(float(stats.valor_total), 2),
+        total_produtos_vendidos=int(stats.quantidade_itens)
+    )
+    return relatorio
 
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.get(MS_VENDAS_URL, params=params)
-            response.raise_for_status()
-            data = response.json()
 
-            if "estatisticas" not in data:
-                raise HTTPException(status_code=500, detail="Resposta inválida do serviço de vendas (sem estatísticas)")
+# ============================================================
+#  RELATÓRIO: VENDAS POR PERÍODO (DIA / MÊS)
+# ============================================================
+def _proximo_periodo(periodo: date, granularidade: str) -> date:
+    if granularidade == "mes":
+        return date(periodo.year + periodo.month // 12, periodo.month % 12 + 1, 1)
+    return periodo + timedelta(days=1)
 
-            stats = data["estatisticas"]
 
-            relatorio = schemas.RelatorioVendasSumario(
-                periodo_inicio=data_inicio,
-                periodo_fim=data_fim,
-                total_vendas=stats.get("total_registros", 0),
-                valor_total_vendido=stats.get("valor_total_periodo", 0.0),
-                total_produtos_vendidos=stats.get("total_produtos_periodo", 0)
-            )
-            return relatorio
+def _inicio_periodo(dia: date, granularidade: str) -> date:
+    return dia.replace(day=1) if granularidade == "mes" else dia
 
-        except httpx.RequestError as exc:
-            raise HTTPException(status_code=503, detail=f"Erro ao comunicar com o serviço de vendas: {exc}")
-        except httpx.HTTPStatusError as exc:
-            raise HTTPException(status_code=exc.response.status_code, detail=f"Serviço de vendas retornou erro: {exc.response.text}")
-        except Exception as exc:
-            raise HTTPException(status_code=500, detail=f"Erro inesperado ao processar dados de vendas: {exc}")
 
-
-# ============================================================
-#  RELATÓRIO: VENDAS POR PERÍODO (DIA / MÊS)
-# ============================================================
+@_coalescido
 async def obter_vendas_por_periodo(
+    db: AsyncSession,
     data_inicio: Optional[date] = None,
     data_fim: Optional[date] = None,
     granularidade: str = "dia",  # "dia" ou "mes"
 ) -> schemas.RelatorioVendasPorPeriodo:
     """
-    Agrega vendas por dia ou mês consultando o ms-vendas.
+    Agrega vendas por dia ou mês com uma única consulta agrupada no banco,
+    preenchendo com zero os períodos sem vendas.
     """
     if granularidade not in ("dia", "mes"):
         raise HTTPException(status_code=422, detail="granularidade deve ser 'dia' ou 'mes'")
 
-    params: Dict[str, Any] = {}
-    if data_inicio is not None:
-        params["data_inicio"] = data_inicio.isoformat()
-    if data_fim is not None:
-        params["data_fim"] = data_fim.isoformat()
-    params["limit"] = 1000
-    params["skip"] = 0
-
-    try:
-        async with httpx.AsyncClient() as client:
-            r = await client.get(MS_VENDAS_URL, params=params)
-            r.raise_for_status()
-            page = r.json()
-    except httpx.RequestError as exc:
-        raise HTTPException(status_code=503, detail=f"Erro ao comunicar com ms-vendas: {exc}")
-    except httpx.HTTPStatusError as exc:
-        raise HTTPException(status_code=exc.response.status_code, detail=f"ms-vendas retornou erro: {exc.response.text}")
-
-    # Extrai lista de vendas (ajuste para a sua chave real)
-    items = page.get("vendas") or page.get("items") or page.get("results") or []
-
-    # Agrupamento
-    buckets: Dict[str, Dict[str, Any]] = defaultdict(lambda: {"quantidade_vendas": 0, "valor_total": 0.0})
-    for v in items:
-        dt = v.get("data") or v.get("data_venda") or v.get("created_at") or ""
-        if not isinstance(dt, str) or len(dt) < 10:
-            continue
-
-        key = dt[:7] if granularidade == "mes" else dt[:10]
-        buckets[key]["quantidade_vendas"] += 1
-        valor = v.get("valor_total") or v.get("total") or 0
-        try:
-            buckets[key]["valor_total"] += float(valor)
-        except (TypeError, ValueError):
-            pass
-
-    # Monta lista de objetos Pydantic tipados (para evitar erro do mypy)
-    series_objs = [
-        schemas.VendasPeriodoItem(
-            periodo=k,
-            quantidade_vendas=v["quantidade_vendas"],
-            valor_total=round(v["valor_total"], 2),
-        )
-        for k, v in sorted(buckets.items(), key=lambda kv: kv[0])
-    ]
+    linhas = await db.run_sync(
+        querys_relatorios.vendas_por_periodo, data_inicio, data_fim, granularidade
+    )
+    buckets = {linha.periodo.date(): linha for linha in linhas}
+
+    # Intervalo a preencher: o pedido, ou o primeiro/último período com vendas
+    inicio = data_inicio or (min(buckets) if buckets else None)
+    fim = data_fim or (max(buckets) if buckets else None)
+
+    series_objs = []
+    if inicio is not None and fim is not None:
+        formato = "%Y-%m" if granularidade == "mes" else "%Y-%m-%d"
+        periodo = _inicio_periodo(inicio, granularidade)
+        while periodo <= fim:
+            linha = buckets.get(periodo)
+            series_objs.append(
+                schemas.VendasPeriodoItem(
+                    periodo=periodo.strftime(formato),
+                    quantidade_vendas=linha.quantidade_vendas if linha else 0,
+                    valor_total=round(float(linha.valor_total), 2) if linha else 0.0,
+                )
+            )
+            periodo = _proximo_periodo(periodo, granularidade)
 
     # Granularidade como Literal["dia","mes"] para o mypy
     typed_granularidade: Literal["dia", "mes"] = cast(Literal["dia", "mes"], granularidade)
@@ -135,20 +210,48 @@ def _coalesce(*vals, default=None):
             return v
     return default
 
-@lru_cache(maxsize=512)
-def _buscar_titulo_produto(produto_id: int) -> str | None:
-    try:
-        # busca direta no ms-produtos
-        r = httpx.get(f"{MS_PRODUTOS_URL}{produto_id}", timeout=5.0)
-        if r.status_code == 200:
-            j = r.json()
+async def _buscar_titulos_produtos(produto_ids: list[int]) -> dict[int, str]:
+    """
+    Títulos dos produtos no ms-produtos, sem bloquear o event loop: os ids
+    fora do cache são buscados em lotes de TITULOS_LOTE, no máximo
+    TITULOS_CONCORRENCIA lotes por vez. Lotes que falharem ficam sem
+    título (e fora do cache, para tentar de novo na próxima consulta).
+    """
+    titulos: dict[int, str] = {}
+    faltam = []
+    for produto_id in dict.fromkeys(produto_ids):
+        titulo = cache_titulos_produtos.obter(produto_id)
+        if titulo is None:
+            faltam.append(produto_id)
+        else:
+            titulos[produto_id] = titulo
+    if not faltam:
+        return titulos
+
+    resolver = ResolverRemoto()
+    semaforo = asyncio.Semaphore(TITULOS_CONCORRENCIA)
+
+    async def buscar_lote(ids: list[int]):
+        async with semaforo:
+            try:
+                return await resolver.buscar_produtos(ids=ids)
+            except HTTPException as e:
+                logger.warning("Títulos de %d produtos indisponíveis: %s", len(ids), e.detail)
+                return []
+
+    lotes = [faltam[i:i + TITULOS_LOTE] for i in range(0, len(faltam), TITULOS_LOTE)]
+    for produtos in await asyncio.gather(*(buscar_lote(lote) for lote in lotes)):
+        for produto in produtos:
             # tenta achar 'titulo' ou 'nome'
-            return _coalesce(j.get("titulo"), j.get("nome"))
-    except Exception:
-        pass
-    return None
+            titulo = _coalesce(produto.get("titulo"), produto.get("nome"))
+            if titulo is not None:
+                titulos[produto["id"]] = titulo
+                cache_titulos_produtos.guardar(produto["id"], titulo)
+    return titulos
 
+@_coalescido
 async def obter_ranking_produtos(
+    db: AsyncSession,
     data_inicio: Optional[date] = None,
     data_fim: Optional[date] = None,
     ordenar_por: str = "valor",  # 'qtd' ou 'valor'
@@ -156,96 +259,36 @@ async def obter_ranking_produtos(
     incluir_titulos: bool = False,
 ) -> schemas.RelatorioRankingProdutos:
     """
-    Soma quantidade e valor por produto no período e retorna o top-N.
+    Soma quantidade e valor por produto no período e retorna o top-N,
+    com a agregação, ordenação e limite feitos no banco.
     """
     if ordenar_por not in ("qtd", "valor"):
         raise HTTPException(status_code=422, detail="ordenar_por deve ser 'qtd' ou 'valor'")
     if top < 1 or top > 1000:
         raise HTTPException(status_code=422, detail="top deve estar entre 1 e 1000")
 
-    # monta params para ms-vendas
-    params: Dict[str, Any] = {}
-    if data_inicio is not None:
-        params["data_inicio"] = data_inicio.isoformat()
-    if data_fim is not None:
-        params["data_fim"] = data_fim.isoformat()
-    params["limit"] = 1000
-    params["skip"] = 0
-
-    try:
-        async with httpx.AsyncClient() as client:
-            r = await client.get(MS_VENDAS_URL, params=params)
-            r.raise_for_status()
-            page = r.json()
-    except httpx.RequestError as exc:
-        raise HTTPException(status_code=503, detail=f"Erro ao comunicar com ms-vendas: {exc}")
-    except httpx.HTTPStatusError as exc:
-        raise HTTPException(status_code=exc.response.status_code, detail=f"ms-vendas retornou erro: {exc.response.text}")
-
-    vendas = page.get("vendas") or page.get("items") or page.get("results") or []
-
-    # agrega por produto_id
-    agg: Dict[int, Dict[str, Any]] = {}
-    for v in vendas:
-        itens = v.get("itens") or v.get("items") or []
-        for it in itens:
-            # tenta extrair o produto_id de várias chaves comuns
-            produto_id = _coalesce(
-                it.get("produto_id"),
-                it.get("produtoId"),
-                it.get("id_produto"),
-                it.get("produto"),
-            )
-            if not isinstance(produto_id, int):
-                # tenta converter se vier como str numérica
-                try:
-                    produto_id = int(produto_id)
-                except Exception:
-                    continue
-            qtd = _coalesce(it.get("quantidade"), it.get("qtd"), it.get("qtde"), 1)
-            try:
-                qtd = int(qtd)
-            except Exception:
-                qtd = 1
-
-            # tenta obter valor do item; se não vier, calcula qtd * preco_unitario
-            valor_item = _coalesce(
-                it.get("valor_total"),
-                it.get("total"),
-                it.get("preco_total"),
-                it.get("subtotal"),
-                it.get("valor"),
-            )
-            if valor_item is None:
-                pu = _coalesce(it.get("preco_unitario"), it.get("preco"), it.get("unit_price"), 0)
-                try:
-                    valor_item = float(pu) * qtd
-                except Exception:
-                    valor_item = 0.0
-            else:
-                try:
-                    valor_item = float(valor_item)
-                except Exception:
-                    valor_item = 0.0
-
-            if produto_id not in agg:
-                agg[produto_id] = {"qtd_total": 0, "valor_total": 0.0}
-            agg[produto_id]["qtd_total"] += qtd
-            agg[produto_id]["valor_total"] += valor_item
-
-    # ordena conforme solicitado
-    key = (lambda x: x[1]["qtd_total"]) if ordenar_por == "qtd" else (lambda x: x[1]["valor_total"])
-    ordenado = sorted(agg.items(), key=key, reverse=True)[:top]
+    # Com o resolver local a tabela produtos está no mesmo banco: o título
+    # vem no próprio JOIN. No modo remote, busca no ms-produtos em lotes.
+    titulos_no_banco = incluir_titulos and RESOLVER_SERVICOS != "remote"
+
+    linhas = await db.run_sync(
+        querys_relatorios.ranking_produtos,
+        data_inicio, data_fim, ordenar_por, top, titulos_no_banco
+    )
+
+    titulos_remotos = {}
+    if incluir_titulos and not titulos_no_banco:
+        titulos_remotos = await _buscar_titulos_produtos([linha.produto_id for linha in linhas])
 
     itens_objs = []
-    for pid, vals in ordenado:
-        titulo = _buscar_titulo_produto(pid) if incluir_titulos else None
+    for linha in linhas:
+        titulo = linha.titulo if titulos_no_banco else titulos_remotos.get(linha.produto_id)
         itens_objs.append(
             schemas.RankingProdutoItem(
-                produto_id=pid,
+                produto_id=linha.produto_id,
                 titulo=titulo,
-                qtd_total=int(vals["qtd_total"]),
-                valor_total=round(float(vals["valor_total"]), 2),
+                qtd_total=int(linha.qtd_total or 0),
+                valor_total=round(float(linha.valor_total or 0.0), 2),
             )
         )
 
@@ -257,19 +300,9 @@ async def obter_ranking_produtos(
     )
     
 
-@lru_cache(maxsize=512)
-def _buscar_nome_funcionario(funcionario_id: int) -> str | None:
-    try:
-        r = httpx.get(f"{MS_FUNCIONARIOS_URL}{funcionario_id}", timeout=5.0)
-        if r.status_code == 200:
-            j = r.json()
-            return j.get("nome") or j.get("name")
-    except Exception:
-        pass
-    return None
-
-
+@_coalescido
 async def obter_ranking_funcionarios(
+    db: AsyncSession,
     data_inicio: Optional[date] = None,
     data_fim: Optional[date] = None,
     ordenar_por: str = "valor",  # 'qtd' ou 'valor'
@@ -278,72 +311,32 @@ async def obter_ranking_funcionarios(
 ) -> schemas.RelatorioRankingFuncionarios:
     """
     Soma quantidade de vendas e valor por funcionário no período e retorna top-N.
+    Os nomes vêm do cadastro (resolver local) ou de vendas.nome_funcionario,
+    sem nenhuma chamada ao ms-funcionarios.
     """
     if ordenar_por not in ("qtd", "valor"):
         raise HTTPException(status_code=422, detail="ordenar_por deve ser 'qtd' ou 'valor'")
     if top < 1 or top > 1000:
         raise HTTPException(status_code=422, detail="top deve estar entre 1 e 1000")
 
-    # Params para ms-vendas
-    params: Dict[str, Any] = {}
-    if data_inicio is not None:
-        params["data_inicio"] = data_inicio.isoformat()
-    if data_fim is not None:
-        params["data_fim"] = data_fim.isoformat()
-    params["limit"] = 1000
-    params["skip"] = 0
-
-    try:
-        async with httpx.AsyncClient() as client:
-            r = await client.get(MS_VENDAS_URL, params=params)
-            r.raise_for_status()
-            page = r.json()
-    except httpx.RequestError as exc:
-        raise HTTPException(status_code=503, detail=f"Erro ao comunicar com ms-vendas: {exc}")
-    except httpx.HTTPStatusError as exc:
-        raise HTTPException(status_code=exc.response.status_code, detail=f"ms-vendas retornou erro: {exc.response.text}")
-
-    vendas = page.get("vendas") or page.get("items") or page.get("results") or []
-
-    # agrega por funcionario_id
-    agg: Dict[int, Dict[str, Any]] = {}
-    for v in vendas:
-        funcionario_id = v.get("funcionario_id") or v.get("funcionarioId") or v.get("id_funcionario")
-        if not isinstance(funcionario_id, int):
-            try:
-                funcionario_id = int(funcionario_id)
-            except Exception:
-                continue
-
-        valor_total = v.get("valor_total") or v.get("total") or 0
-        try:
-            valor_total = float(valor_total)
-        except Exception:
-            valor_total = 0.0
-
-        if funcionario_id not in agg:
-            agg[funcionario_id] = {"qtd_vendas": 0, "valor_total": 0.0}
-        agg[funcionario_id]["qtd_vendas"] += 1
-        agg[funcionario_id]["valor_total"] += valor_total
-
-    key = (lambda x: x[1]["qtd_vendas"]) if ordenar_por == "qtd" else (lambda x: x[1]["valor_total"])
-    ordenado = sorted(agg.items(), key=key, reverse=True)[:top]
+    linhas = await db.run_sync(
+        querys_relatorios.ranking_funcionarios,
+        data_inicio, data_fim, ordenar_por, top, RESOLVER_SERVICOS != "remote"
+    )
 
-    itens_objs = []
-    for fid, vals in ordenado:
-        nome = _buscar_nome_funcionario(fid) if incluir_nomes else None
-        itens_objs.append(
-            schemas.RankingFuncionarioItem(
-                funcionario_id=fid,
-                nome=nome,
-                qtd_vendas=int(vals["qtd_vendas"]),
-                valor_total=round(float(vals["valor_total"]), 2),
-            )
+    itens_objs = [
+        schemas.RankingFuncionarioItem(
+            funcionario_id=linha.funcionario_id,
+            nome=linha.nome if incluir_nomes else None,
+            qtd_vendas=int(linha.total_vendas),
+            valor_total=round(float(linha.valor_total), 2),
         )
+        for linha in linhas
+    ]
 
     typed_ordenar: Literal["qtd", "valor"] = cast(Literal["qtd", "valor"], ordenar_por)
     return schemas.RelatorioRankingFuncionarios(
         ordenar_por=typed_ordenar,
         top=top,
         itens=itens_objs,
-    )
\ No newline at end of file
+    )
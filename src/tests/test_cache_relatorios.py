@@ -0,0 +1,40 @@
+API = "/api/v1"
+SUMARIO = f"{API}/relatorios/vendas-sumario"
+
+
+def _vender(client, funcionario, titulo="Arroz"):
+    resposta = client.post(f"{API}/vendas/", json={"titulo_produto": titulo, "id_funcionario": funcionario["id"]})
+    assert resposta.status_code == 200, resposta.text
+
+
+def test_if_none_match_igual_responde_304_sem_corpo(client, produtos, funcionario):
+    _vender(client, funcionario)
+    primeira = client.get(SUMARIO)
+    etag = primeira.headers["etag"]
+
+    repetida = client.get(SUMARIO, headers={"If-None-Match": etag})
+
+    assert primeira.status_code == 200
+    assert repetida.status_code == 304
+    assert repetida.content == b""
+    assert repetida.headers["etag"] == etag
+
+
+def test_if_none_match_aceita_etag_fraco_e_lista(client, produtos, funcionario):
+    etag = client.get(SUMARIO).headers["etag"]
+
+    resposta = client.get(SUMARIO, headers={"If-None-Match": f'"outro", W/{etag}'})
+
+    assert resposta.status_code == 304
+
+
+def test_venda_nova_troca_o_etag(client, produtos, funcionario):
+    _vender(client, funcionario)
+    etag = client.get(SUMARIO).headers["etag"]
+
+    _vender(client, funcionario, "Café")
+    resposta = client.get(SUMARIO, headers={"If-None-Match": etag})
+
+    assert resposta.status_code == 200
+    assert resposta.headers["etag"] != etag
+    assert resposta.json()["total_vendas"] == 2
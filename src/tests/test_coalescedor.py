@@ -0,0 +1,112 @@
+import asyncio
+
+import pytest
+
+from services.vendas_service import Coalescedor
+
+
+def test_chamadas_simultaneas_compartilham_um_calculo():
+    coalescedor = Coalescedor()
+    chamadas = 0
+
+    async def calcular():
+        nonlocal chamadas
+        chamadas += 1
+        await asyncio.sleep(0.01)
+        return object()
+
+    async def cenario():
+        return await asyncio.gather(*(coalescedor.executar("chave", calcular) for _ in range(5)))
+
+    resultados = asyncio.run(cenario())
+
+    assert chamadas == 1
+    assert all(r is resultados[0] for r in resultados)
+    assert (coalescedor.execucoes, coalescedor.coalescidas) == (1, 4)
+    assert coalescedor.estatisticas()["em_andamento"] == 0
+
+
+def test_chaves_diferentes_nao_coalescem():
+    coalescedor = Coalescedor()
+
+    async def cenario():
+        return await asyncio.gather(
+            coalescedor.executar("a", lambda: asyncio.sleep(0.01, result="a")),
+            coalescedor.executar("b", lambda: asyncio.sleep(0.01, result="b")),
+        )
+
+    assert asyncio.run(cenario()) == ["a", "b"]
+    assert coalescedor.execucoes == 2
+
+
+def test_erro_chega_a_todos_os_que_esperavam():
+    coalescedor = Coalescedor()
+
+    async def calcular():
+        await asyncio.sleep(0.01)
+        raise ValueError("falhou")
+
+    async def cenario():
+        return await asyncio.gather(
+            *(coalescedor.executar("chave", calcular) for _ in range(3)), return_exceptions=True
+        )
+
+    erros = asyncio.run(cenario())
+
+    assert [type(e) for e in erros] == [ValueError] * 3
+    assert coalescedor.execucoes == 1
+
+
+def test_cancelar_um_chamador_nao_interrompe_os_demais():
+    coalescedor = Coalescedor()
+    liberar = None
+
+    async def calcular():
+        await liberar.wait()
+        return 42
+
+    async def cenario():
+        nonlocal liberar
+        liberar = asyncio.Event()
+        primeiro = asyncio.create_task(coalescedor.executar("chave", calcular))
+        segundo = asyncio.create_task(coalescedor.executar("chave", calcular))
+        await asyncio.sleep(0)
+        primeiro.cancel()
+        await asyncio.sleep(0)
+        liberar.set()
+        with pytest.raises(asyncio.CancelledError):
+            await primeiro
+        return await segundo
+
+    assert asyncio.run(cenario()) == 42
+    assert coalescedor.canceladas == 0
+
+
+def test_calculo_e_cancelado_quando_todos_desistem():
+    coalescedor = Coalescedor()
+    calculo_cancelado = False
+
+    async def calcular():
+        nonlocal calculo_cancelado
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            calculo_cancelado = True
+            raise
+
+    async def cenario():
+        chamadores = [asyncio.create_task(coalescedor.executar("chave", calcular)) for _ in range(2)]
+        await asyncio.sleep(0)
+        for chamador in chamadores:
+            chamador.cancel()
+        await asyncio.gather(*chamadores, return_exceptions=True)
+        # deixa o cancelamento chegar à task do cálculo
+        await asyncio.sleep(0)
+        # um pedido novo começa outro cálculo em vez de herdar o cancelado
+        return await coalescedor.executar("chave", lambda: asyncio.sleep(0, result="novo"))
+
+    assert asyncio.run(cenario()) == "novo"
+    assert calculo_cancelado
+    assert coalescedor.canceladas == 1
+    assert coalescedor.execucoes == 2
+    assert coalescedor.estatisticas()["em_andamento"] == 0
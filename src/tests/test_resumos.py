@@ -0,0 +1,82 @@
+import json
+
+from sqlalchemy import text
+
+from db.connection import engine
+from db.querys_resumos import RELATORIOS_TIMEZONE
+
+API = "/api/v1"
+
+# mesmos agregados dos resumos, calculados direto das vendas
+_DIA = "date(timezone(:fuso, v.data_venda))"
+_CONSULTAS = {
+    "resumo_vendas_dia": (
+        f"""SELECT {_DIA} AS dia, count(*), coalesce(sum(i.quantidade), 0), round(sum(v.valor_total)::numeric, 2)
+            FROM vendas v
+            LEFT JOIN (SELECT venda_id, sum(quantidade) AS quantidade FROM itens_venda GROUP BY venda_id) i
+              ON i.venda_id = v.id
+            GROUP BY 1""",
+        "SELECT dia, quantidade_vendas, quantidade_itens, round(valor_total::numeric, 2) FROM resumo_vendas_dia",
+    ),
+    "resumo_funcionario_dia": (
+        f"""SELECT {_DIA} AS dia, v.funcionario_id, count(*), coalesce(sum(i.quantidade), 0),
+                   round(sum(v.valor_total)::numeric, 2)
+            FROM vendas v
+            LEFT JOIN (SELECT venda_id, sum(quantidade) AS quantidade FROM itens_venda GROUP BY venda_id) i
+              ON i.venda_id = v.id
+            GROUP BY 1, 2""",
+        """SELECT dia, funcionario_id, quantidade_vendas, quantidade_itens, round(valor_total::numeric, 2)
+           FROM resumo_funcionario_dia""",
+    ),
+    "resumo_produto_dia": (
+        f"""SELECT {_DIA} AS dia, i.produto_id, count(DISTINCT v.id), sum(i.quantidade),
+                   round(sum(i.quantidade * i.preco_unitario)::numeric, 2)
+            FROM itens_venda i JOIN vendas v ON v.id = i.venda_id
+            GROUP BY 1, 2""",
+        """SELECT dia, produto_id, quantidade_vendas, quantidade_itens, round(valor_total::numeric, 2)
+           FROM resumo_produto_dia""",
+    ),
+}
+
+
+def _conferir_resumos():
+    with engine.connect() as conexao:
+        for tabela, (bruto, resumo) in _CONSULTAS.items():
+            esperado = set(conexao.execute(text(bruto), {"fuso": RELATORIOS_TIMEZONE}).all())
+            # linhas zeradas (dia/produto que ficou sem vendas) equivalem a linha nenhuma
+            obtido = {linha for linha in conexao.execute(text(resumo)).all() if any(linha[-3:])}
+            assert obtido == esperado, tabela
+
+
+def test_resumos_acompanham_as_vendas(client, produtos, funcionario):
+    fid = funcionario["id"]
+    arroz, feijao, cafe = (p["id"] for p in produtos)
+
+    # criação: venda simples, carrinho e uma venda retroativa pelo lote
+    assert client.post(f"{API}/vendas/", json={"titulo_produto": "Arroz", "id_funcionario": fid}).status_code == 200
+    carrinho = client.post(f"{API}/vendas/", json={
+        "id_funcionario": fid,
+        "itens": [{"produto_id": arroz, "quantidade": 2}, {"produto_id": feijao, "quantidade": 3}],
+    })
+    assert carrinho.status_code == 200, carrinho.text
+    lote = json.dumps({
+        "titulo_produto": "Café", "id_funcionario": fid, "chave_idempotencia": "pdv-1",
+        "data_venda": "2025-03-01T23:30:00-03:00",
+    })
+    resultado = client.post(f"{API}/vendas/lote", content=lote.encode() + b"\n").json()
+    assert resultado["criadas"] == 1, resultado
+    _conferir_resumos()
+
+    # atualização: troca os itens da venda do carrinho
+    venda_id = carrinho.json()["id"]
+    resposta = client.put(f"{API}/vendas/{venda_id}", json={
+        "funcionario_id": fid, "nome_funcionario": "Ana", "cpf": funcionario["cpf"], "cargo": "caixa",
+        "itens": [{"produto_id": cafe, "quantidade": 4, "preco_unitario": 5.5}],
+    })
+    assert resposta.status_code == 200, resposta.text
+    _conferir_resumos()
+
+    # exclusão: a venda retroativa some dos resumos daquele dia
+    resposta = client.delete(f"{API}/vendas/{resultado['resultados'][0]['venda_id']}")
+    assert resposta.status_code == 200, resposta.text
+    _conferir_resumos()
@@ -0,0 +1,42 @@
+import json
+
+API = "/api/v1"
+
+
+def _enviar(client, linhas):
+    corpo = "\n".join(json.dumps(linha) for linha in linhas) + "\n"
+    resposta = client.post(
+        f"{API}/vendas/lote", content=corpo.encode(), headers={"Content-Type": "application/x-ndjson"}
+    )
+    assert resposta.status_code == 200, resposta.text
+    return resposta.json()
+
+
+def test_reenvio_do_lote_nao_duplica_vendas(client, produtos, funcionario):
+    linhas = [
+        {"titulo_produto": "Arroz", "id_funcionario": funcionario["id"], "chave_idempotencia": f"pdv-{i}"}
+        for i in range(3)
+    ]
+
+    primeiro = _enviar(client, linhas)
+    reenvio = _enviar(client, linhas)
+
+    assert (primeiro["criadas"], primeiro["duplicadas"], primeiro["erros"]) == (3, 0, 0)
+    assert (reenvio["criadas"], reenvio["duplicadas"], reenvio["erros"]) == (0, 3, 0)
+    assert [r["status"] for r in reenvio["resultados"]] == ["duplicada"] * 3
+    # a réplica devolve a venda gravada no primeiro envio
+    assert [r["venda_id"] for r in reenvio["resultados"]] == [r["venda_id"] for r in primeiro["resultados"]]
+
+    vendas = client.get(f"{API}/vendas/").json()
+    assert vendas["estatisticas"]["total_registros"] == 3
+
+
+def test_chave_repetida_no_mesmo_lote(client, produtos, funcionario):
+    linha = {"titulo_produto": "Arroz", "id_funcionario": funcionario["id"], "chave_idempotencia": "pdv-x"}
+
+    resultado = _enviar(client, [linha, linha])
+
+    assert resultado["criadas"] == 1
+    assert resultado["resultados"][0]["status"] == "criada"
+    assert resultado["resultados"][1]["status"] == "erro"
+    assert client.get(f"{API}/vendas/").json()["estatisticas"]["total_registros"] == 1